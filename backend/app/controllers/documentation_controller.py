@@ -1,8 +1,16 @@
-from app.services.documentation_service import download_and_save_repository, embed_repository_to_vector_db
+from typing import Optional
+from app.services.documentation_service import download_and_save_repository
+from app.services.job_service import job_manager
+from app.services.source_service import validate_repository_name, validate_source
 from fastapi import HTTPException
 
 
 async def get_documentation_controller(repo_name: str):
+    try:
+        validate_repository_name(repo_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         result = await download_and_save_repository(repo_name)
         return result
@@ -12,10 +20,15 @@ async def get_documentation_controller(repo_name: str):
             detail=f"Error fetching and saving documentation for repository {repo_name}: {e}",
         )
     
-async def embed_repository_controller(repo_name: str):
+async def embed_repository_controller(repo_name: str, source: Optional[str] = None, path: Optional[str] = None):
     try:
-        result = await embed_repository_to_vector_db(repo_name)
-        return result
+        source, path = validate_source(repo_name, source, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        job = job_manager.submit(repo_name, source=source, path=path)
+        return job.to_dict()
     except Exception as e:
         raise HTTPException(
             status_code=500,
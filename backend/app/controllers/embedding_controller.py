@@ -1,10 +1,20 @@
-from app.services.embedding_service import get_embeddings
+from app.services.embedding_service import get_embeddings, get_embedding_cache_stats
 from fastapi import HTTPException
 
 
 async def generate_embeddings_controller(text: str):
     try:
-        embeddings = get_embeddings(text)
+        embeddings = await get_embeddings(text)
         return {"embeddings": embeddings}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating embeddings: {e}")
+
+
+async def get_embedding_cache_stats_controller():
+    try:
+        stats = get_embedding_cache_stats()
+        if stats is None:
+            return {"enabled": False}
+        return {"enabled": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting embedding cache stats: {e}")
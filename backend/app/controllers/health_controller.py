@@ -0,0 +1,18 @@
+from fastapi.responses import JSONResponse
+
+from app.services.health_service import get_liveness, get_readiness
+
+
+async def get_liveness_controller():
+    """
+    Controller function to report that the process is alive.
+    """
+    return get_liveness()
+
+
+async def get_readiness_controller():
+    """
+    Controller function to report the state of the upstreams, with a 503 status when a required one is down.
+    """
+    readiness = await get_readiness()
+    return JSONResponse(content=readiness, status_code=200 if readiness["status"] == "ready" else 503)
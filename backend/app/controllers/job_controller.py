@@ -0,0 +1,29 @@
+from app.services.job_service import job_manager
+from fastapi import HTTPException
+
+
+async def list_jobs_controller():
+    """
+    Controller function to list the ingestion jobs.
+    """
+    return [job.to_dict() for job in job_manager.list()]
+
+
+async def get_job_controller(job_id: str):
+    """
+    Controller function to get the progress of an ingestion job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+async def cancel_job_controller(job_id: str):
+    """
+    Controller function to cancel an ingestion job.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
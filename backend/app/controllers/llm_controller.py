@@ -1,5 +1,7 @@
-from app.services.llm_service import get_response
+import json
+from app.services.llm_service import get_response, get_semantic_cache_stats, stream_response
 from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 
 
 async def generate_response_controller(user_message: str):
@@ -8,3 +10,30 @@ async def generate_response_controller(user_message: str):
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {e}")
+
+
+async def get_semantic_cache_stats_controller():
+    try:
+        stats = get_semantic_cache_stats()
+        if stats is None:
+            return {"enabled": False}
+        return {"enabled": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting semantic cache stats: {e}")
+
+
+async def stream_response_controller(user_message: str):
+    async def event_stream():
+        try:
+            async for event in stream_response(user_message):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            # Headers are already sent, so errors are reported in-band
+            error = {"type": "error", "message": f"Error generating response: {e}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,9 @@
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+
+async def get_metrics_controller():
+    """
+    Controller function to export the metrics in the Prometheus text format.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
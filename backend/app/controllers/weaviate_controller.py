@@ -1,13 +1,23 @@
+import json
+from dataclasses import asdict
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
+from app.services.vector_store import INDEX_PROFILES
 from app.services.weaviate_service import (
     create_documentation_collection,
     check_collection_exists,
     add_documentation_item,
     retrieve_documentation_items,
+    iter_documentation_items,
     delete_documentation_item,
     similarity_search,
+    search_filters,
     get_docs_count,
+    list_repository_tenants,
+    drop_repository,
+    set_repository_status,
 )
 
 
@@ -23,12 +33,12 @@ async def check_documentations_exists_controller():
         )
 
 
-async def create_documentations_collection_controller():
+async def create_documentations_collection_controller(profile=None):
     """
     Controller function to create the documentations collection.
     """
     try:
-        return await create_documentation_collection()
+        return await create_documentation_collection(profile=profile)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating collection: {e}")
 
@@ -38,7 +48,7 @@ async def add_documentation_item_controller(documentSource, documentURL, documen
     Controller function to add a documentation item to the collection.
     """
     try:
-        result = add_documentation_item(documentSource, documentURL, documentContent)
+        result = await add_documentation_item(documentSource, documentURL, documentContent)
         if result:
             return result
         else:
@@ -51,24 +61,57 @@ async def add_documentation_item_controller(documentSource, documentURL, documen
         )
 
 
-async def retrieve_documentation_items_controller(documentSource=None, documentURL=None):
+async def get_index_profiles_controller():
     """
-    Controller function to retrieve documentations items from the collection.
+    Controller function to list the vector index profiles available when creating the collection.
+    """
+    return {
+        name: {"description": profile.description, **asdict(profile)}
+        for name, profile in INDEX_PROFILES.items()
+    }
+
+
+async def retrieve_documentation_items_controller(
+    documentSource=None, documentURL=None, after=None, limit=100, include_vector=False, properties=None
+):
+    """
+    Controller function to retrieve a page of documentations items from the collection.
     """
     try:
-        return retrieve_documentation_items(documentSource, documentURL)
+        return await retrieve_documentation_items(
+            documentSource, documentURL, after, limit, include_vector, properties
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving documentations items: {e}"
         )
 
 
-async def delete_documentation_item_controller(uuid: str):
+async def stream_documentation_items_controller(
+    documentSource=None, documentURL=None, after=None, limit=None, include_vector=False, properties=None
+):
+    """
+    Controller function to stream documentations items as NDJSON, one item per line.
+    """
+    async def item_stream():
+        try:
+            async for item in iter_documentation_items(
+                documentSource, documentURL, after, limit, include_vector, properties
+            ):
+                yield json.dumps(jsonable_encoder(item)) + "\n"
+        except Exception as e:
+            # Headers are already sent, so errors are reported in-band
+            yield json.dumps({"error": f"Error retrieving documentations items: {e}"}) + "\n"
+
+    return StreamingResponse(item_stream(), media_type="application/x-ndjson")
+
+
+async def delete_documentation_item_controller(uuid: str, repository=None):
     """
     Controller function to delete a documentation item from the collection.
     """
     try:
-        delete_documentation_item(uuid)
+        await delete_documentation_item(uuid, repository)
         return {
             "message": f"documentations item with UUID {uuid} deleted successfully."
         }
@@ -78,12 +121,27 @@ async def delete_documentation_item_controller(uuid: str):
         )
 
 
-async def similarity_search_controller(prompt, top_k=5):
+async def similarity_search_controller(
+    prompt, top_k=5, mode=None, alpha=None, fusion=None, mmr=False, fetch_k=None, mmr_lambda=None,
+    repositories=None, filePath=None, docSection=None, docVersion=None, language=None,
+):
     """
-    Controller to perform a similarity search on the documentations collection.
+    Controller to perform a similarity search on the documentations collection,
+    optionally scoped to some repositories, files, doc section, version or language.
     """
     try:
-        return await similarity_search(prompt, top_k)
+        return await similarity_search(
+            prompt,
+            top_k,
+            mode=mode,
+            alpha=alpha,
+            fusion=fusion,
+            mmr=mmr,
+            fetch_k=fetch_k,
+            mmr_lambda=mmr_lambda,
+            filters=search_filters(filePath, docSection, docVersion, language),
+            repositories=repositories,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -100,4 +158,38 @@ async def get_docs_count_controller():
         raise HTTPException(
             status_code=500,
             detail=f"Error getting document count: {e}",
-        )
\ No newline at end of file
+        )
+
+
+async def list_repository_tenants_controller():
+    """
+    Controller to list the tenants of the repositories and their status.
+    """
+    try:
+        return await list_repository_tenants()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing tenants: {e}")
+
+
+async def drop_repository_controller(repository: str):
+    """
+    Controller to delete every chunk of a repository (its whole tenant in a multi-tenant collection).
+    """
+    try:
+        return await drop_repository(repository)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error dropping repository: {e}")
+
+
+async def set_repository_status_controller(repository: str, status: str):
+    """
+    Controller to activate, deactivate or offload the tenant of a repository.
+    """
+    try:
+        return await set_repository_status(repository, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error changing the tenant status: {e}")
@@ -0,0 +1,27 @@
+import asyncio
+from typing import Dict
+from app.core.config import settings
+
+# Maximum number of in-flight requests per upstream service
+UPSTREAM_LIMITS = {
+    "openai": settings.OPENAI_MAX_CONCURRENCY,
+    "groq": settings.GROQ_MAX_CONCURRENCY,
+    "weaviate": settings.WEAVIATE_MAX_CONCURRENCY,
+    # Embedding batches of the ingestion jobs, on top of the openai limit
+    "ingestion": settings.INGESTION_MAX_CONCURRENCY,
+}
+
+limiters: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_limiter(upstream: str) -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding the concurrent calls made to an upstream service.
+
+    Usage:
+        async with get_limiter("openai"):
+            await client.embeddings.create(...)
+    """
+    if upstream not in limiters:
+        limiters[upstream] = asyncio.Semaphore(UPSTREAM_LIMITS[upstream])
+    return limiters[upstream]
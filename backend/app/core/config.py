@@ -1,3 +1,4 @@
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,28 @@ class Settings(BaseSettings):
     WEAVIATE_PORT: int
     WEAVIATE_API_KEY: str
 
+    # Vector Store Config
+    VECTOR_STORE_BACKEND: str = "weaviate"  # "weaviate" or "numpy" (embedded, no server needed)
+    NUMPY_STORE_PATH: str = "vector_store"
+    VECTOR_INDEX_PROFILE: str = "default"  # Index profile of new collections (see vector_store/index_profiles.py)
+
+    # Multi-Tenancy Config
+    MULTI_TENANCY_ENABLED: bool = True  # New collections store every repository in its own tenant and index
+    MANUAL_TENANT: str = "manual"  # Tenant of the items added without repository (POST /vectordb)
+    TENANT_CACHE_SECONDS: float = 30  # How long the searches reuse the list of tenants
+    TENANT_REPOSITORIES_PATH: str = "vector_store/tenant_repositories.json"  # Repository name of each tenant
+
+    # Retrieval Config
+    SEARCH_MODE: str = "hybrid"  # "vector" or "hybrid" (BM25 keyword search + vector search)
+    HYBRID_FUSION: str = "rrf"  # "rrf" (reciprocal rank fusion) or "relative_score"
+    HYBRID_ALPHA: float = 0.5  # Weight of the vector search, 0 is pure BM25 and 1 pure vector search
+    RAG_TOP_K: int = 5  # Snippets retrieved for the LLM prompt
+    RAG_MMR: bool = True  # Re-rank the snippets of the LLM prompt by maximal marginal relevance
+    MMR_FETCH_K: int = 20  # Candidates fetched for the MMR re-ranking
+    MMR_LAMBDA: float = 0.5  # 1 ranks by relevance only, 0 by diversity only
+    CONTEXT_TOKEN_BUDGET: int = 3000  # Maximum tokens of the snippets in the LLM prompt
+    CONTEXT_MAX_DISTANCE: float = 0.25  # Snippets further away from the question (cosine distance) are dropped
+
     # Groq Config
     GROQ_API_KEY: str
 
@@ -21,6 +44,93 @@ class Settings(BaseSettings):
     OPENAI_API_VERSION: str
     OPENAI_AZURE_ENDPOINT: str
 
+    # Upstream Concurrency Limits (in-flight requests per worker)
+    OPENAI_MAX_CONCURRENCY: int = 16
+    GROQ_MAX_CONCURRENCY: int = 16
+    WEAVIATE_MAX_CONCURRENCY: int = 32
+
+    # Upstream Clients Config
+    HTTP2_ENABLED: bool = True  # HTTP/2 to Groq and Azure OpenAI (h2, installed with httpx[http2])
+    HTTP_MAX_CONNECTIONS: int = 100  # Connection pool size of each client
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20  # Idle connections kept open
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5
+    HTTP_TIMEOUT_SECONDS: float = 60  # Read, write and pool timeouts (a generation can be long)
+    UPSTREAM_MAX_RETRIES: int = 2  # Retries of the Groq and OpenAI SDKs, with backoff
+    WEAVIATE_SKIP_INIT_CHECKS: bool = False  # Skip the readiness and version checks when connecting
+    WEAVIATE_INIT_TIMEOUT_SECONDS: float = 2
+    WEAVIATE_QUERY_TIMEOUT_SECONDS: float = 30
+    WEAVIATE_INSERT_TIMEOUT_SECONDS: float = 90
+    WEAVIATE_POOL_CONNECTIONS: int = 20
+    WEAVIATE_POOL_MAXSIZE: int = 100
+
+    # Logging Config
+    LOG_LEVEL: str = "INFO"  # Level of the app loggers (DEBUG also logs the latency of every streamed answer)
+
+    # Health Check Config
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2
+    HEALTH_CHECK_CACHE_SECONDS: float = 10  # Upstreams are probed at most this often
+    READINESS_REQUIRED_UPSTREAMS: List[str] = ["weaviate"]  # Upstreams that must be up for /readyz
+
+    # Semantic Answer Cache Config
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97  # Minimum cosine similarity between questions (paraphrases only)
+    SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
+
+    # Request Coalescing Config
+    SINGLE_FLIGHT_ENABLED: bool = True  # Identical concurrent searches and questions share one computation
+
+    # Ingestion Config
+    EMBEDDING_BATCH_SIZE: int = 64  # Inputs sent per embeddings request
+    EMBEDDING_BATCH_RETRIES: int = 3  # Retries of a rate-limited or failed embeddings request, with backoff
+    WEAVIATE_BATCH_SIZE: int = 200  # Objects sent per insert_many call
+    CHUNK_ENCODING: str = "cl100k_base"  # Tokenizer of text-embedding-ada-002
+    CHUNKING_WORKERS: int = 0  # Chunking processes, 0 for one per CPU
+    INGESTION_MAX_CONCURRENT_JOBS: int = 2  # Repositories ingested at the same time
+    INGESTION_MAX_CONCURRENCY: int = 4  # In-flight embedding batches across all ingestion jobs
+    INGESTION_JOB_HISTORY: int = 100  # Finished jobs kept for GET /jobs
+
+    # Ingestion Sources Config
+    INGESTION_DEFAULT_SOURCE: str = "gitingest"  # "gitingest", "dump", "directory" or "tarball"
+    INGESTION_LOCAL_ROOTS: List[str] = ["parsed_repositories", "repositories"]  # Directories of the local sources
+    INGESTION_TARBALL_HOSTS: List[str] = ["codeload.github.com", "api.github.com"]  # Hosts tarballs are downloaded from
+    INGESTION_DOWNLOAD_RETRIES: int = 3  # Retries of the gitingest and tarball downloads, with backoff
+    INGESTION_MAX_FILE_KB: int = 1024  # Larger files of the directories and tarballs are skipped
+    INGESTION_READ_WORKERS: int = 8  # Threads reading the files of a directory
+
+    # Preprocessing Config
+    PREPROCESSING_MIN_CHARACTERS: int = 50  # Shorter files are not embedded
+    PREPROCESSING_MAX_LINE_LENGTH: int = 400  # Files with longer lines on average are minified
+    PREPROCESSING_MAX_ENTROPY: float = 5.9  # Bits per character, above is encoded or binary-like content
+    PREPROCESSING_EXCLUDE_PATTERNS: List[str] = []  # Glob patterns excluded from every repository
+    # {"owner/repo": {"include": [glob, ...], "exclude": [glob, ...]}}
+    PREPROCESSING_REPOSITORY_RULES: Dict[str, Dict[str, List[str]]] = {}
+
+    # Chunk Metadata Config
+    METADATA_BLOB_REF: str = "HEAD"  # Branch, tag or commit of the file URLs cited for the chunks
+    METADATA_SECTION_PATTERN: str = r"(?:^|/)docs/(?:components/)?([^/]+)/"  # First group is the doc section of a path
+    METADATA_VERSION_PATTERN: str = r"(?:legacy-)?(v\d+(?:\.\d+)*)"  # Directory names of older doc versions
+    METADATA_DEFAULT_VERSION: str = "latest"  # Version of the files outside of a versioned directory
+
+    # Deduplication Config
+    DEDUP_ENABLED: bool = True  # Skip the near-duplicate chunks before embedding them
+    DEDUP_THRESHOLD: float = 0.9  # Minimum Jaccard similarity of the word 5-grams of two duplicates
+    DEDUP_NUM_PERM: int = 128  # MinHash permutations, more is more precise but slower
+
+    # Embedding Cache Config
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "embedding_cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MEMORY_MB: int = 64  # In-memory LRU tier
+    EMBEDDING_CACHE_DISK_MB: int = 1024  # SQLite tier
+
+    # Chat WebSocket Config
+    WEBSOCKET_MAX_CONCURRENT_MESSAGES: int = 1  # Answers generated at the same time per connection
+    WEBSOCKET_CANCEL_ON_NEW_MESSAGE: bool = True  # A new message cancels the oldest answer instead of waiting
+    WEBSOCKET_MAX_PENDING_MESSAGES: int = 4  # Messages waiting for a free slot (without cancel), more are rejected
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256  # Outgoing messages buffered per connection
+    WEBSOCKET_SEND_TIMEOUT_SECONDS: float = 10  # A connection whose buffer stays full this long is closed
+
     class Config:
         env_file = ".env"
         cache_on_load = False
@@ -1,10 +1,21 @@
+import asyncio
+import logging
+import httpx
 import weaviate
-from groq import Groq
+from groq import AsyncGroq
+from weaviate.classes.init import AdditionalConfig, Timeout
+from weaviate.config import ConnectionConfig
 from app.core.config import settings
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
+
+logger = logging.getLogger(__name__)
+
+# The clients are created by the lifespan of the app (open_clients) and closed at
+# shutdown (close_clients), the getters create them on first use outside of the app.
 
 # Weaviate Client
 weaviate_client = None
+weaviate_lock = asyncio.Lock()
 
 # LLM Client
 groq_client = None
@@ -13,11 +24,38 @@ groq_client = None
 openai_client = None
 
 
+def create_http_client() -> httpx.AsyncClient:
+    """
+    HTTP client of the Groq and OpenAI SDKs: a keep-alive connection pool with the timeouts of the settings.
+    """
+    http2 = settings.HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but the h2 package (httpx[http2]) is not installed, using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS),
+        follow_redirects=True,
+    )
+
+
 # Groq
 def connect_groq():
     global groq_client
     if groq_client is None:
-        groq_client = Groq(api_key=settings.GROQ_API_KEY)
+        groq_client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            http_client=create_http_client(),
+            max_retries=settings.UPSTREAM_MAX_RETRIES,
+        )
     return groq_client
 
 
@@ -28,21 +66,37 @@ def get_groq_client():
 
 
 # Weaviate
-def connect_weaviate():
+async def connect_weaviate():
     global weaviate_client
-    if weaviate_client is None:
-        weaviate_client = weaviate.connect_to_local(
-            host=settings.WEAVIATE_HOST,
-            port=settings.WEAVIATE_PORT,
-        )
-
-        if not weaviate_client.is_ready():
-            raise ConnectionError("Unable to connect to the Weaviate server.")
+    async with weaviate_lock:
+        if weaviate_client is None:
+            weaviate_client = weaviate.use_async_with_local(
+                host=settings.WEAVIATE_HOST,
+                port=settings.WEAVIATE_PORT,
+                additional_config=AdditionalConfig(
+                    connection=ConnectionConfig(
+                        session_pool_connections=settings.WEAVIATE_POOL_CONNECTIONS,
+                        session_pool_maxsize=settings.WEAVIATE_POOL_MAXSIZE,
+                    ),
+                    timeout=Timeout(
+                        init=settings.WEAVIATE_INIT_TIMEOUT_SECONDS,
+                        query=settings.WEAVIATE_QUERY_TIMEOUT_SECONDS,
+                        insert=settings.WEAVIATE_INSERT_TIMEOUT_SECONDS,
+                    ),
+                ),
+                skip_init_checks=settings.WEAVIATE_SKIP_INIT_CHECKS,
+            )
+
+        if not weaviate_client.is_connected():
+            await weaviate_client.connect()
+
+            if not await weaviate_client.is_ready():
+                raise ConnectionError("Unable to connect to the Weaviate server.")
     return weaviate_client
 
 
-def get_weaviate_client():
-    connect_weaviate()
+async def get_weaviate_client():
+    await connect_weaviate()
     vecdb = weaviate_client
     return vecdb
 
@@ -51,10 +105,12 @@ def get_weaviate_client():
 def connect_openai():
     global openai_client
     if openai_client is None:
-        openai_client = AzureOpenAI(
+        openai_client = AsyncAzureOpenAI(
             api_key=settings.OPENAI_API_KEY,
             api_version=settings.OPENAI_API_VERSION,
             azure_endpoint=settings.OPENAI_AZURE_ENDPOINT,
+            http_client=create_http_client(),
+            max_retries=settings.UPSTREAM_MAX_RETRIES,
         )
     return openai_client
 
@@ -63,3 +119,39 @@ def get_openai_client():
     connect_openai()
     openai = openai_client
     return openai
+
+
+async def warm_up_weaviate():
+    try:
+        await connect_weaviate()
+        logger.info("Connected to Weaviate")
+    except Exception as e:
+        # The next request (or readiness check) connects again
+        logger.warning("Weaviate is not reachable yet: %s", e)
+
+
+async def open_clients():
+    """
+    Create the upstream clients. Weaviate is connected in the background,
+    so the app starts (and answers /livez) even when Weaviate is slow or down.
+    """
+    connect_groq()
+    connect_openai()
+    if settings.VECTOR_STORE_BACKEND == "weaviate":
+        return asyncio.create_task(warm_up_weaviate())
+    return None
+
+
+async def close_clients():
+    """
+    Close the upstream clients and their connection pools.
+    """
+    global weaviate_client, groq_client, openai_client
+    for name, client in (("Groq", groq_client), ("Azure OpenAI", openai_client), ("Weaviate", weaviate_client)):
+        if client is None:
+            continue
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning("Error closing the %s client: %s", name, e)
+    weaviate_client = groq_client = openai_client = None
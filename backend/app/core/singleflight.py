@@ -0,0 +1,150 @@
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+from prometheus_client import Counter
+from app.core.config import settings
+
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total",
+    "Calls by operation, the joined ones shared an identical call already in flight",
+    ["operation", "role"],
+)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a question for the coalescing keys: case and whitespace don't matter.
+    """
+    return " ".join(text.split()).casefold()
+
+
+class Flight:
+    """
+    One in-flight call and the callers waiting for it.
+    Streamed events are all kept, so a caller joining late replays them from the start.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.events: List = []
+        self.changed = asyncio.Event()  # Replaced by a new event at every change
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: the first caller of a key runs the call, the
+    callers arriving while it's in flight get its result instead of running it again.
+    Nothing is kept once the call is done, this is not a cache.
+
+    The call is cancelled only when every caller waiting for it is gone.
+    """
+
+    def __init__(self, enabled: bool = settings.SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self.flights: Dict[Hashable, Flight] = {}
+
+    def join(self, key: Hashable, operation: str):
+        flight = self.flights.get(key)
+        if flight is not None:
+            COALESCED_REQUESTS.labels(operation=operation, role="joined").inc()
+            return flight, False
+        flight = Flight()
+        self.flights[key] = flight
+        COALESCED_REQUESTS.labels(operation=operation, role="leader").inc()
+        return flight, True
+
+    def forget(self, key: Hashable, flight: Flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    def leave(self, key: Hashable, flight: Flight):
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # Nobody wants the result anymore
+            self.forget(key, flight)
+            flight.task.cancel()
+
+    async def do(self, key: Hashable, operation: str, function: Callable[[], Awaitable]):
+        """
+        Await function(), or the identical call already in flight.
+
+        :param key: Identifies identical calls, it must contain every parameter of the call
+        :param operation: The operation name, for the metrics
+        :param function: Starts the call
+        :return: The result of the call, shared by all its callers
+        """
+        if not self.enabled:
+            return await function()
+
+        flight, leader = self.join(key, operation)
+        if leader:
+            flight.task = asyncio.ensure_future(function())
+            flight.task.add_done_callback(lambda _: self.forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            # Shielded so a cancelled caller doesn't cancel the call of the others
+            return await asyncio.shield(flight.task)
+        finally:
+            self.leave(key, flight)
+
+    async def stream(self, key: Hashable, operation: str, function: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """
+        Iterate over function(), or over the identical stream already in flight.
+        Every caller receives all the events, from the first one.
+
+        :param key: Identifies identical calls, it must contain every parameter of the call
+        :param operation: The operation name, for the metrics
+        :param function: Returns the async iterator of the events
+        """
+        if not self.enabled:
+            async for event in function():
+                yield event
+            return
+
+        flight, leader = self.join(key, operation)
+        if leader:
+            flight.task = asyncio.ensure_future(self.pump(key, flight, function))
+
+        flight.waiters += 1
+        position = 0
+        try:
+            while True:
+                while position < len(flight.events):
+                    yield flight.events[position]
+                    position += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            self.leave(key, flight)
+
+    async def pump(self, key: Hashable, flight: Flight, function: Callable[[], AsyncIterator]):
+        """
+        Consume the stream of a flight for all its callers.
+        """
+        try:
+            async with aclosing(function()) as events:
+                async for event in events:
+                    flight.events.append(event)
+                    flight.notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self.forget(key, flight)
+            flight.notify()
+
+
+single_flight = SingleFlight()
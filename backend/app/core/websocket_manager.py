@@ -1,22 +1,118 @@
+import asyncio
+import logging
 from fastapi import WebSocket
-from typing import Dict
+from prometheus_client import Gauge
+from typing import Coroutine, Dict, List
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_CONNECTIONS = Gauge("websocket_connections_active", "Open chat WebSocket connections")
+
+
+class Connection:
+    """
+    The WebSocket of a conversation, every socket starts its own conversation.
+
+    Outgoing messages go through a bounded queue drained by a single sender task, so sends
+    never interleave and a slow client slows down (then disconnects) only its own producers.
+    Incoming messages run as tasks that can be cancelled.
+    """
+
+    def __init__(self, websocket: WebSocket, conversation_id: str, queue_size: int):
+        self.websocket = websocket
+        self.conversation_id = conversation_id
+        self.outbound: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.tasks: List[asyncio.Task] = []  # Running message tasks, oldest first
+        self.sender: asyncio.Task = None
+        self.closed = False
+
+    async def run_sender(self):
+        try:
+            while True:
+                message = await self.outbound.get()
+                await self.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The client is gone, the receive loop gets the disconnect and cleans up
+            self.closed = True
+
+    def start_task(self, coroutine: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self.tasks.append(task)
+        task.add_done_callback(self.forget_task)
+        return task
+
+    def forget_task(self, task: asyncio.Task):
+        if task in self.tasks:
+            self.tasks.remove(task)
+
+    def running_tasks(self) -> List[asyncio.Task]:
+        return [task for task in self.tasks if not task.done()]
+
+    def cancel_tasks(self, tasks: List[asyncio.Task] = None) -> int:
+        """
+        Cancel the given message tasks (all the running ones by default).
+
+        :return: The number of cancelled tasks
+        """
+        tasks = self.running_tasks() if tasks is None else tasks
+        for task in tasks:
+            # A cancelled task may take a moment to unwind, it's no longer counted as running
+            self.forget_task(task)
+            task.cancel()
+        return len(tasks)
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = (
-            {}
-        )  # {conversation_id: websocket}
+    def __init__(
+        self,
+        send_queue_size: int = settings.WEBSOCKET_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WEBSOCKET_SEND_TIMEOUT_SECONDS,
+    ):
+        self.active_connections: Dict[str, Connection] = {}  # {conversation_id: connection}
+        self.send_queue_size = send_queue_size
+        self.send_timeout = send_timeout
 
-    async def connect(self, websocket: WebSocket, conversation_id: str):
+    async def connect(self, websocket: WebSocket, conversation_id: str) -> Connection:
         await websocket.accept()
-        self.active_connections[conversation_id] = websocket
+        connection = Connection(websocket, conversation_id, self.send_queue_size)
+        connection.sender = asyncio.create_task(connection.run_sender())
+        self.active_connections[conversation_id] = connection
+        WEBSOCKET_CONNECTIONS.set(len(self.active_connections))
+        return connection
+
+    def disconnect(self, connection: Connection) -> int:
+        """
+        Forget a connection, cancelling its sender and its running message tasks.
+
+        :return: The number of cancelled message tasks
+        """
+        connection.closed = True
+        connection.sender.cancel()
+        cancelled = connection.cancel_tasks()
+
+        self.active_connections.pop(connection.conversation_id, None)
+        WEBSOCKET_CONNECTIONS.set(len(self.active_connections))
+        return cancelled
 
-    def disconnect(self, conversation_id: str):
-        if conversation_id in self.active_connections:
-            del self.active_connections[conversation_id]
+    async def send_message(self, connection: Connection, message: str):
+        """
+        Send a message to the socket of a conversation.
 
-    async def send_message(self, conversation_id: str, message: str):
-        if conversation_id in self.active_connections:
-            websocket = self.active_connections[conversation_id]
-            await websocket.send_text(message)
+        Waits while the socket's queue is full (backpressure on the producer), a socket that
+        doesn't drain it within the send timeout is considered stuck and is closed.
+        """
+        if connection.closed:
+            return
+        try:
+            await asyncio.wait_for(connection.outbound.put(message), self.send_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("WebSocket of conversation %s is not reading, closing it", connection.conversation_id)
+            connection.closed = True
+            connection.sender.cancel()
+            try:
+                await asyncio.wait_for(connection.websocket.close(code=1013), self.send_timeout)
+            except Exception:
+                pass
@@ -1,14 +1,45 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.db import close_clients, open_clients
+from app.services.chunking_service import shutdown_executor
+from app.services.embedding_cache import embedding_cache
+from app.services.job_service import job_manager
+from app.services.vector_store import close_vector_stores
 
 from app.routes.llm_route import router as llm_router
 from app.routes.documentation_route import router as documentation_router
 from app.routes.embedding_route import router as embedding_router
 from app.routes.weaviate_route import router as weaviate_router
 from app.routes.websocket import router as websocket_router
+from app.routes.job_route import router as job_router
+from app.routes.metrics_route import router as metrics_router
+from app.routes.health_route import router as health_router
 
-app = FastAPI(title="Kubeflow Demo API")
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: create the upstream clients, Weaviate connects in the background
+    warm_up = await open_clients()
+    yield
+    # Shutdown: stop the ingestion jobs, then close the clients, stores and workers
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+    await job_manager.shutdown()
+    await close_vector_stores()
+    await close_clients()
+    if embedding_cache is not None:
+        embedding_cache.close()
+    shutdown_executor()
+
+
+app = FastAPI(title="Kubeflow Demo API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,3 +54,6 @@ app.include_router(weaviate_router, tags=["Weaviate"])
 app.include_router(llm_router, tags=["LLM"])
 app.include_router(embedding_router, tags=["Embedding"])
 app.include_router(websocket_router, tags=["WebSocket"])
+app.include_router(job_router, tags=["Jobs"])
+app.include_router(metrics_router, tags=["Metrics"])
+app.include_router(health_router, tags=["Health"])
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import APIRouter
 from app.controllers.documentation_controller import get_documentation_controller, embed_repository_controller
 
@@ -10,6 +11,13 @@ async def get_documentation(repo_name: str):
     return await get_documentation_controller(repo_name)
 
 
-@router.post("/documentation/embed")
-async def embed_documentation(repo_name: str):
-    return await embed_repository_controller(repo_name)
\ No newline at end of file
+@router.post("/documentation/embed", status_code=202)
+async def embed_documentation(repo_name: str, source: Optional[str] = None, path: Optional[str] = None):
+    """
+    Submit a background ingestion job, follow it with GET /jobs/{job_id} or the /ws/jobs/{job_id} feed.
+
+    The repository contents come from gitingest, or without any network access from an existing
+    dump ("dump"), a local directory or git checkout ("directory") or a .tar.gz ("tarball", local or URL).
+    Local paths must be under INGESTION_LOCAL_ROOTS.
+    """
+    return await embed_repository_controller(repo_name, source, path)
\ No newline at end of file
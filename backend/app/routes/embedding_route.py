@@ -1,5 +1,8 @@
 from fastapi import APIRouter
-from app.controllers.embedding_controller import generate_embeddings_controller
+from app.controllers.embedding_controller import (
+    generate_embeddings_controller,
+    get_embedding_cache_stats_controller,
+)
 
 router = APIRouter()
 
@@ -7,3 +10,8 @@ router = APIRouter()
 @router.post("/embeddings")
 async def generate_embeddings(text: str):
     return await generate_embeddings_controller(text)
+
+
+@router.get("/embeddings/cache")
+async def get_embedding_cache_stats():
+    return await get_embedding_cache_stats_controller()
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from app.controllers.health_controller import get_liveness_controller, get_readiness_controller
+
+router = APIRouter()
+
+
+@router.get("/livez")
+async def get_liveness():
+    """
+    Liveness probe: answers as long as the process runs, whatever the state of the upstreams.
+    """
+    return await get_liveness_controller()
+
+
+@router.get("/readyz")
+async def get_readiness():
+    """
+    Readiness probe: the state and latency of Weaviate, Groq and Azure OpenAI,
+    with a 503 status when one of READINESS_REQUIRED_UPSTREAMS is down.
+    """
+    return await get_readiness_controller()
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.controllers.job_controller import cancel_job_controller, get_job_controller, list_jobs_controller
+from app.services.job_service import job_manager
+
+
+router = APIRouter()
+
+
+@router.get("/jobs")
+async def list_jobs():
+    """
+    Endpoint to list the ingestion jobs (running and recently finished).
+    """
+    return await list_jobs_controller()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Endpoint to get the status and progress of an ingestion job.
+    """
+    return await get_job_controller(job_id)
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Endpoint to cancel an ingestion job.
+    """
+    return await cancel_job_controller(job_id)
+
+
+@router.websocket("/ws/jobs/{job_id}")
+async def job_progress_websocket(websocket: WebSocket, job_id: str):
+    """
+    WebSocket progress feed of an ingestion job, sends the job state (JSON) on every update until it finishes.
+    """
+    await websocket.accept()
+    job = job_manager.get(job_id)
+    if job is None:
+        await websocket.close(code=4404, reason=f"Job {job_id} not found")
+        return
+
+    try:
+        async for snapshot in job.updates():
+            await websocket.send_json(snapshot)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -1,5 +1,9 @@
 from fastapi import APIRouter
-from app.controllers.llm_controller import generate_response_controller
+from app.controllers.llm_controller import (
+    generate_response_controller,
+    get_semantic_cache_stats_controller,
+    stream_response_controller,
+)
 
 
 router = APIRouter()
@@ -8,3 +12,19 @@ router = APIRouter()
 @router.post("/llm")
 async def generate_chat_response(user_message: str):
     return await generate_response_controller(user_message)
+
+
+@router.post("/llm/stream")
+async def stream_chat_response(user_message: str):
+    """
+    Server-Sent Events variant of /llm: start, sources, token... and end events.
+    """
+    return await stream_response_controller(user_message)
+
+
+@router.get("/llm/cache")
+async def get_semantic_cache_stats():
+    """
+    Hit rate and size of the semantic answer cache.
+    """
+    return await get_semantic_cache_stats_controller()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from app.controllers.metrics_controller import get_metrics_controller
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Endpoint scraped by Prometheus: embedding, search and LLM latency histograms,
+    token, cache and ingestion counters, open WebSocket connections.
+    """
+    return await get_metrics_controller()
@@ -1,27 +1,35 @@
-from fastapi import APIRouter, HTTPException
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
 
 from app.controllers.weaviate_controller import (
     add_documentation_item_controller,
     check_documentations_exists_controller,
     create_documentations_collection_controller,
     delete_documentation_item_controller,
+    get_index_profiles_controller,
     retrieve_documentation_items_controller,
     similarity_search_controller,
+    stream_documentation_items_controller,
     get_docs_count_controller,
+    list_repository_tenants_controller,
+    drop_repository_controller,
+    set_repository_status_controller,
 )
 
 from app.core.db import get_weaviate_client
+from app.services.vector_store import INDEX_PROFILES
 
 router = APIRouter()
 
 
 @router.get("/vectordb/healthcheck")
-def healthcheck():
+async def healthcheck():
     """
     Test route to check Weaviate connection.
     """
-    client = get_weaviate_client()
-    if client.is_ready():
+    client = await get_weaviate_client()
+    if await client.is_ready():
         return {"message": "Weaviate connection successful!"}
     else:
         return {"message": "Weaviate connection failed!"}
@@ -40,13 +48,26 @@ async def check_collection():
         )
 
 
+@router.get("/vectordb/profiles")
+async def get_index_profiles():
+    """
+    Endpoint to list the vector index profiles (HNSW tuning, quantization, flat index).
+    """
+    return await get_index_profiles_controller()
+
+
 @router.post("/vectordb/collection")
-async def create_collection():
+async def create_collection(profile: Optional[str] = None):
     """
-    Endpoint to create the documentations collection if it doesn't exist.
+    Endpoint to create the documentations collection if it doesn't exist,
+    with the given vector index profile (VECTOR_INDEX_PROFILE by default).
     """
+    if profile is not None and profile not in INDEX_PROFILES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown index profile '{profile}', see GET /vectordb/profiles"
+        )
     try:
-        result = await create_documentations_collection_controller()
+        result = await create_documentations_collection_controller(profile)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating collection: {e}")
@@ -65,14 +86,42 @@ async def add_documentation(documentSource: str, documentURL: str, documentConte
         raise HTTPException(status_code=500, detail=f"Error adding  item: {e}")
 
 
+MAX_PAGE_SIZE = 1000  # Larger exports go through format=ndjson
+
+
 @router.get("/vectordb")
-async def get_documentations(documentSource=None, documentURL=None):
+async def get_documentations(
+    documentSource: Optional[str] = None,
+    documentURL: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    include_vector: bool = False,
+    properties: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+):
     """
     Endpoint to retrieve documentations items with optional filters for documentSource, documentURL.
+
+    Items are paginated in UUID order: pass the next_cursor of a page as after to get the next one.
+    Vectors are only returned with include_vector=true, and properties (comma separated) restricts
+    the returned properties. format=ndjson streams the items one per line (all of them when no limit
+    is given), with a constant memory use whatever the size of the collection.
     """
+    fields = [name.strip() for name in properties.split(",") if name.strip()] if properties else None
+
+    if format == "ndjson":
+        return await stream_documentation_items_controller(
+            documentSource, documentURL, after, limit, include_vector, fields
+        )
+
+    if limit is not None and limit > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"limit can't exceed {MAX_PAGE_SIZE}, use format=ndjson for larger exports"
+        )
+
     try:
         items = await retrieve_documentation_items_controller(
-            documentSource, documentURL
+            documentSource, documentURL, after, limit or 100, include_vector, fields
         )
         return items
     except Exception as e:
@@ -81,13 +130,39 @@ async def get_documentations(documentSource=None, documentURL=None):
         )
 
 
+@router.get("/vectordb/repositories")
+async def get_repository_tenants():
+    """
+    Endpoint to list the tenants of the repositories (each one has its own vector index) and their status.
+    """
+    return await list_repository_tenants_controller()
+
+
+@router.put("/vectordb/repositories/{repository:path}")
+async def set_repository_status(repository: str, status: Literal["active", "inactive", "offloaded"]):
+    """
+    Endpoint to activate, deactivate or offload the tenant of a repository. Inactive and offloaded
+    tenants free their memory and are not searched until they are activated again.
+    """
+    return await set_repository_status_controller(repository, status)
+
+
+@router.delete("/vectordb/repositories/{repository:path}")
+async def drop_repository(repository: str):
+    """
+    Endpoint to delete every chunk of a repository, in one operation with multi-tenancy (its tenant is dropped).
+    """
+    return await drop_repository_controller(repository)
+
+
 @router.delete("/vectordb/{uuid}")
-async def delete_documentation(uuid: str):
+async def delete_documentation(uuid: str, repository: Optional[str] = None):
     """
     Endpoint to delete a documentations item by its UUID.
+    With multi-tenancy, repository avoids looking for the item in every tenant.
     """
     try:
-        await delete_documentation_item_controller(uuid)
+        await delete_documentation_item_controller(uuid, repository)
         return {
             "message": f"documentations item with UUID '{uuid}' deleted successfully."
         }
@@ -97,13 +172,41 @@ async def delete_documentation(uuid: str):
         )
 
 
+MAX_FETCH_K = 500  # MMR candidates, their similarities are a fetch_k x fetch_k matrix
+
+
 @router.get("/vectordb/similarity")
-async def Get_similar_documentations(prompt: str, top_k: int = 5):
+async def Get_similar_documentations(
+    prompt: str,
+    top_k: int = 5,
+    mode: Optional[Literal["vector", "hybrid"]] = None,
+    alpha: Optional[float] = Query(None, ge=0, le=1),
+    fusion: Optional[Literal["rrf", "relative_score"]] = None,
+    mmr: bool = False,
+    fetch_k: Optional[int] = Query(None, ge=1, le=MAX_FETCH_K),
+    mmr_lambda: Optional[float] = Query(None, ge=0, le=1),
+    repository: Optional[List[str]] = Query(None),
+    filePath: Optional[str] = None,
+    docSection: Optional[str] = None,
+    docVersion: Optional[str] = None,
+    language: Optional[str] = None,
+):
     """
     Endpoint to perform a similarity search for documentations items based on a given prompt and returning the top_k results.
+    The hybrid mode fuses a BM25 keyword search with the vector search (alpha is the weight of the vector search),
+    the defaults come from the SEARCH_MODE, HYBRID_ALPHA and HYBRID_FUSION settings.
+    With mmr=true, fetch_k candidates are re-ranked by maximal marginal relevance so near duplicates are skipped
+    (mmr_lambda 1 ranks by relevance only, 0 by diversity only), the defaults come from MMR_FETCH_K and MMR_LAMBDA.
+    The search can be scoped with repository (repeated to search several ones, each repository is a tenant
+    searched separately and the results are merged), filePath (a path, or a pattern where * matches any characters),
+    docSection (for example pipelines), docVersion (for example v1 or latest) and language, only the matching
+    chunks are searched.
     """
     try:
-        items = await similarity_search_controller(prompt, top_k)
+        items = await similarity_search_controller(
+            prompt, top_k, mode, alpha, fusion, mmr, fetch_k, mmr_lambda,
+            repository, filePath, docSection, docVersion, language,
+        )
         return items
     except Exception as e:
         raise HTTPException(
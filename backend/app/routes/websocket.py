@@ -1,45 +1,154 @@
+import asyncio
+import json
+from contextlib import aclosing
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.core.websocket_manager import ConnectionManager
-from app.services.llm_service import get_response
+from prometheus_client import Counter
+from app.core.config import settings
+from app.core.websocket_manager import Connection, ConnectionManager
+from app.services.llm_service import get_response, stream_response
 from uuid import uuid4
 
 router = APIRouter()
 manager = ConnectionManager()
 
+CHAT_CANCELLED = Counter(
+    "chat_cancelled_total", "Chat answers cancelled before the end (stop, new message or disconnect)", ["reason"]
+)
+CHAT_REJECTED = Counter("chat_rejected_total", "Chat messages rejected because too many were waiting on their socket")
+
+
+def parse_control_message(text: str) -> Optional[dict]:
+    """
+    Read a JSON control message: {"type": "stop"} or {"type": "message", "content": "..."}.
+
+    :return: The control message, or None if the text is a plain question
+    """
+    if not text.lstrip().startswith("{"):
+        return None
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(message, dict) and message.get("type") in ("stop", "message"):
+        return message
+    return None
+
+
+async def answer_message(
+    connection: Connection,
+    semaphore: asyncio.Semaphore,
+    user_message: str,
+    llm_model: str,
+    temperature: float,
+    max_tokens: int,
+    stream: bool,
+):
+    """
+    Generate the answer to one message and send it to the conversation.
+    Runs as a task of the connection, cancelling it stops the LLM call.
+    """
+    async with semaphore:
+        try:
+            if stream:
+                # Forward the tokens as they are generated
+                async with aclosing(stream_response(user_message=user_message,
+                                                    llm_model=llm_model,
+                                                    temperature=temperature,
+                                                    max_tokens=max_tokens)) as events:
+                    async for event in events:
+                        await manager.send_message(connection, json.dumps(event))
+                return
+
+            # Get bot's response using the LLM service
+            llm_response = await get_response(user_message=user_message,
+                                              llm_model=llm_model,
+                                              temperature=temperature,
+                                              max_tokens=max_tokens)
+
+            # Send response back to client
+            await manager.send_message(connection, llm_response)
+
+        except Exception as e:
+            error_message = f"Error: {str(e)}"
+            if stream:
+                error_message = json.dumps({"type": "error", "message": error_message})
+            await manager.send_message(connection, error_message)
+
+
+async def cancel_answers(connection: Connection, tasks, reason: str, stream: bool):
+    cancelled = connection.cancel_tasks(tasks)
+    if not cancelled:
+        return
+    CHAT_CANCELLED.labels(reason=reason).inc(cancelled)
+    if stream:
+        await manager.send_message(connection, json.dumps({"type": "cancelled", "reason": reason}))
+
+
+async def reject_message(connection: Connection, stream: bool):
+    CHAT_REJECTED.inc()
+    error_message = "Error: Too many messages waiting for an answer, try again once one is answered"
+    if stream:
+        error_message = json.dumps({"type": "error", "message": error_message})
+    await manager.send_message(connection, error_message)
+
 
 @router.websocket("/ws/chat")
 async def chat_websocket(
     websocket: WebSocket,
     llm_model: str = "llama-3.3-70b-versatile",
     temperature: float = 0.5,
-    max_tokens: int = 8192
+    max_tokens: int = 8192,
+    stream: bool = False,
     ):
     """
     WebSocket endpoint for the chat service.
+
+    With stream=true, every answer is sent as JSON framing messages
+    (start, sources, token..., end) instead of a single text message.
+
+    Every message is answered in its own task, so the connection keeps reading while an
+    answer is generated: {"type": "stop"} cancels the running answers, a new message
+    cancels the oldest one when the connection is at its concurrency limit (or waits, up to
+    WEBSOCKET_MAX_PENDING_MESSAGES waiting messages, more are rejected), and a
+    disconnect cancels everything.
     """
     # Create a new conversation
     conversation_id = str(uuid4())
 
     # Connect the WebSocket
-    await manager.connect(websocket, conversation_id)
+    connection = await manager.connect(websocket, conversation_id)
+    max_concurrency = max(1, settings.WEBSOCKET_MAX_CONCURRENT_MESSAGES)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    max_pending = max(0, settings.WEBSOCKET_MAX_PENDING_MESSAGES)
 
     try:
         while True:
             # Receive message from client
-            user_message = await websocket.receive_text()
+            text = await websocket.receive_text()
+            control = parse_control_message(text)
 
-            # Get bot's response using the LLM service
-            llm_response = await get_response(user_message=user_message,
-                                              llm_model=llm_model,
-                                              temperature=temperature,
-                                              max_tokens=max_tokens)
+            if control is not None and control["type"] == "stop":
+                await cancel_answers(connection, None, "stop", stream)
+                continue
+            user_message = control.get("content", "") if control is not None else text
 
-            # Send response back to client
-            await manager.send_message(conversation_id, llm_response)
+            running = connection.running_tasks()
+            if settings.WEBSOCKET_CANCEL_ON_NEW_MESSAGE and len(running) >= max_concurrency:
+                # Make room for the new message, the oldest answers are the least wanted
+                await cancel_answers(connection, running[: len(running) - max_concurrency + 1], "new_message", stream)
+            elif len(running) >= max_concurrency + max_pending:
+                # Every waiting message holds a task, a client can't pile them up
+                await reject_message(connection, stream)
+                continue
+
+            connection.start_task(
+                answer_message(connection, semaphore, user_message, llm_model, temperature, max_tokens, stream)
+            )
 
     except WebSocketDisconnect:
-        manager.disconnect(conversation_id)
-    except Exception as e:
-        error_message = f"Error: {str(e)}"
-        await manager.send_message(conversation_id, error_message)
-        manager.disconnect(conversation_id)
+        pass
+    finally:
+        cancelled = manager.disconnect(connection)
+        if cancelled:
+            CHAT_CANCELLED.labels(reason="disconnect").inc(cancelled)
@@ -0,0 +1,378 @@
+import asyncio
+import bisect
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import tiktoken
+
+from app.core.config import settings
+
+# Process pool shared by every ingestion, created on first use
+executor = None
+
+# Encodings loaded in the current process
+encodings: Dict[str, tiktoken.Encoding] = {}
+
+# Languages split along their structure, by file extension
+LANGUAGE_EXTENSIONS = {
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".mdx": "markdown",
+    ".py": "python",
+    ".ipynb": "python",  # gitingest converts the notebooks to Python scripts
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+# Blocks separated by blank lines, then lines, the innermost levels before the token windows
+PARAGRAPH_PATTERN = re.compile(r"(?<=\n\n)(?=[^\n])")
+LINE_PATTERN = re.compile(r"(?<=\n)(?=[^\n])")
+
+# Section starts of each language, from the outermost level to the innermost one
+SECTION_PATTERNS = {
+    "markdown": [
+        *(re.compile(rf"^{'#' * level}[ \t]", re.MULTILINE) for level in range(1, 7)),
+        PARAGRAPH_PATTERN,
+        LINE_PATTERN,
+    ],
+    "python": [
+        # Top-level definitions, starting at their decorators
+        re.compile(r"^(?:@[^\n]*\n)*(?:async[ \t]+def|def|class)\b", re.MULTILINE),
+        # Methods and nested definitions
+        re.compile(r"^[ \t]+(?:@[^\n]*\n[ \t]*)*(?:async[ \t]+def|def|class)\b", re.MULTILINE),
+        PARAGRAPH_PATTERN,
+        LINE_PATTERN,
+    ],
+    "yaml": [
+        # Documents
+        re.compile(r"^---[ \t]*$", re.MULTILINE),
+        # Top-level keys
+        re.compile(r"^[^\s#\-][^\n]*?:(?:[ \t]|$)", re.MULTILINE),
+        # Second-level keys
+        re.compile(r"^  [^\s#\-][^\n]*?:(?:[ \t]|$)", re.MULTILINE),
+        PARAGRAPH_PATTERN,
+        LINE_PATTERN,
+    ],
+}
+
+# Minimum share of chunk_size filled before a chunk can end at a section start
+SECTION_MIN_FILL = 0.8
+
+# Fenced code blocks of Markdown, whose lines are never section starts ("# comment" in a shell block)
+MARKDOWN_FENCE_PATTERN = re.compile(r"^[ \t]*(`{3,}|~{3,})", re.MULTILINE)
+
+
+def get_encoding(encoding_name: str) -> tiktoken.Encoding:
+    if encoding_name not in encodings:
+        encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+    return encodings[encoding_name]
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global executor
+    if executor is None:
+        executor = ProcessPoolExecutor(
+            max_workers=settings.CHUNKING_WORKERS or None,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return executor
+
+
+def shutdown_executor():
+    """
+    Stop the chunking processes (at shutdown), they are started again on the next use.
+    """
+    global executor
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+        executor = None
+
+
+def detect_language(filename: str) -> Optional[str]:
+    """
+    The language of a file for the structure-aware splitting, None for plain token windows.
+    """
+    return LANGUAGE_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def window_offsets(
+    text: str, chunk_size: int, chunk_overlap: int, encoding_name: str = settings.CHUNK_ENCODING
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Split a text in windows of chunk_size tokens overlapping by chunk_overlap tokens.
+
+    The text is tokenized once and the windows are cut by token offsets, so nothing is
+    re-encoded and only the window boundaries are decoded to find the character offsets.
+
+    :param text: The text to split
+    :param chunk_size: The size of each chunk in tokens
+    :param chunk_overlap: The number of overlapping tokens between chunks
+    :param encoding_name: The tiktoken encoding used to count tokens
+    :return: List of (start character, end character, start token, end token) for each chunk
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+
+    encoding = get_encoding(encoding_name)
+    tokens = encoding.encode_ordinary(text)
+    if not tokens:
+        return []
+
+    # Token windows, same stepping as LangChain's TokenTextSplitter
+    windows = []
+    start = 0
+    while True:
+        end = min(start + chunk_size, len(tokens))
+        windows.append((start, end))
+        if end == len(tokens):
+            break
+        start += chunk_size - chunk_overlap
+
+    # Byte offset of every window boundary, decoding each token only once
+    byte_offsets = {}
+    position = 0
+    previous = 0
+    for boundary in sorted({boundary for window in windows for boundary in window}):
+        position += len(encoding.decode_bytes(tokens[previous:boundary]))
+        byte_offsets[boundary] = position
+        previous = boundary
+
+    # Character offsets, a boundary inside a multi-byte character moves back to the start of that character
+    if text.isascii():
+        char_offsets = byte_offsets
+    else:
+        data = text.encode("utf-8")
+        char_offsets = {}
+        characters = 0
+        previous_byte = 0
+        for boundary, byte_offset in sorted(byte_offsets.items()):
+            while 0 < byte_offset < len(data) and 0x80 <= data[byte_offset] < 0xC0:
+                byte_offset -= 1
+            characters += len(data[previous_byte:byte_offset].decode("utf-8", errors="replace"))
+            char_offsets[boundary] = characters
+            previous_byte = byte_offset
+
+    return [(char_offsets[start], char_offsets[end], start, end) for start, end in windows]
+
+
+def fenced_ranges(text: str) -> List[Tuple[int, int]]:
+    """
+    The (start, end) character ranges of the fenced code blocks of a Markdown text.
+    """
+    ranges = []
+    opening = None
+    for match in MARKDOWN_FENCE_PATTERN.finditer(text):
+        fence = match.group(1)
+        if opening is None:
+            opening = (match.start(), fence)
+        elif fence[0] == opening[1][0] and len(fence) >= len(opening[1]):
+            ranges.append((opening[0], match.end()))
+            opening = None
+    if opening is not None:
+        # An unclosed fence runs until the end of the text
+        ranges.append((opening[0], len(text)))
+    return ranges
+
+
+def section_boundaries(text: str, language: str) -> Dict[int, int]:
+    """
+    The section starts of a text, outside of the Markdown code blocks.
+
+    :return: {character offset: level}, 0 being the outermost level (see SECTION_PATTERNS)
+    """
+    fenced = fenced_ranges(text) if language == "markdown" else []
+    fence_starts = [fence_start for fence_start, _ in fenced]
+    boundaries: Dict[int, int] = {}
+    for level, pattern in enumerate(SECTION_PATTERNS[language]):
+        for match in pattern.finditer(text):
+            position = match.start()
+            fence = bisect.bisect_right(fence_starts, position) - 1
+            if 0 < position < len(text) and not (fence >= 0 and position < fenced[fence][1]):
+                boundaries.setdefault(position, level)
+    return boundaries
+
+
+def chunk_offsets(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str = settings.CHUNK_ENCODING,
+    language: Optional[str] = None,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Split a text in chunks of at most chunk_size tokens.
+
+    Without a language, the chunks are overlapping token windows (see window_offsets).
+    Markdown, Python and YAML texts are cut in segments at their headings, definitions,
+    documents / keys and blank lines (see section_boundaries), and consecutive segments are
+    packed up to chunk_size tokens. A chunk ends at the outermost boundary past
+    SECTION_MIN_FILL of chunk_size, so chunks follow the sections without being left half empty.
+    Only the segments too large for a chunk are cut in windows overlapping by chunk_overlap.
+
+    :param language: The language of the text (see detect_language)
+    :return: List of (start character, end character, start token, end token) for each chunk,
+             the token positions count the tokens of the segments
+    """
+    if language not in SECTION_PATTERNS:
+        return window_offsets(text, chunk_size, chunk_overlap, encoding_name)
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+
+    encoding = get_encoding(encoding_name)
+    boundaries = section_boundaries(text, language)
+    positions = [0] + sorted(boundaries) + [len(text)]
+    # (start, end, tokens, level of the boundary at the end), the end of the text is the best boundary
+    segments = [
+        (start, end, len(encoding.encode_ordinary(text[start:end])), boundaries.get(end, -1))
+        for start, end in zip(positions, positions[1:])
+    ]
+
+    offsets = []
+    position = 0
+
+    def add_chunk(start: int, end: int, tokens: int):
+        nonlocal position
+        if text[start:end].strip():
+            offsets.append((start, end, position, position + tokens))
+        position += tokens
+
+    index = 0
+    while index < len(segments):
+        start, end, tokens, _ = segments[index]
+        if tokens > chunk_size:
+            for window_start, window_end, start_token, end_token in window_offsets(
+                text[start:end], chunk_size, chunk_overlap, encoding_name
+            ):
+                add_chunk(start + window_start, start + window_end, end_token - start_token)
+            index += 1
+            continue
+
+        # Every segment count that fits, then the best end among them
+        total = 0
+        ends = []
+        last = index
+        while last < len(segments) and total + segments[last][2] <= chunk_size:
+            total += segments[last][2]
+            ends.append((last, total))
+            last += 1
+        if last == len(segments):
+            best = ends[-1]
+        else:
+            filled = [(segment, total) for segment, total in ends if total >= chunk_size * SECTION_MIN_FILL] or ends
+            best = min(reversed(filled), key=lambda end: segments[end[0]][3])
+        add_chunk(start, segments[best[0]][1], best[1])
+        index = best[0] + 1
+    return offsets
+
+
+def chunk_offsets_batch(
+    texts: List[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str,
+    languages: Optional[List[Optional[str]]] = None,
+) -> List[List[Tuple[int, int, int, int]]]:
+    """
+    chunk_offsets for several texts, the unit of work sent to the process pool.
+    Only the offsets travel back to the parent process, not the chunk texts.
+    """
+    languages = languages or [None] * len(texts)
+    return [
+        chunk_offsets(text, chunk_size, chunk_overlap, encoding_name, language)
+        for text, language in zip(texts, languages)
+    ]
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str = settings.CHUNK_ENCODING,
+    language: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Split a text in chunks (see chunk_offsets).
+
+    :return: List of {"content", "startOffset", "endOffset", "tokenCount"} with character offsets in text
+    """
+    return [
+        {
+            "content": text[start:end],
+            "startOffset": start,
+            "endOffset": end,
+            "tokenCount": end_token - start_token,
+        }
+        for start, end, start_token, end_token in chunk_offsets(
+            text, chunk_size, chunk_overlap, encoding_name, language
+        )
+    ]
+
+
+async def chunk_texts(
+    texts: List[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str = settings.CHUNK_ENCODING,
+    batch_characters: int = 256 * 1024,
+    languages: Optional[List[Optional[str]]] = None,
+) -> List[List[Dict]]:
+    """
+    Split many texts in chunks (see chunk_offsets), spread across the process pool
+    so the CPU-bound tokenization never runs on the event loop.
+
+    :param texts: The texts to split
+    :param chunk_size: The size of each chunk in tokens
+    :param chunk_overlap: The number of overlapping tokens between chunks
+    :param encoding_name: The tiktoken encoding used to count tokens
+    :param batch_characters: Approximate number of characters sent to a worker at once
+    :param languages: The language of each text (see detect_language), aligned with texts
+    :return: The chunks of each text (see chunk_text), aligned with texts
+    """
+    # Group small texts together to amortize the inter-process overhead
+    batches = []
+    current = []
+    current_size = 0
+    for index, text in enumerate(texts):
+        current.append(index)
+        current_size += len(text)
+        if current_size >= batch_characters:
+            batches.append(current)
+            current = []
+            current_size = 0
+    if current:
+        batches.append(current)
+
+    loop = asyncio.get_running_loop()
+    pool = get_executor()
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                pool,
+                chunk_offsets_batch,
+                [texts[index] for index in batch],
+                chunk_size,
+                chunk_overlap,
+                encoding_name,
+                [languages[index] for index in batch] if languages else None,
+            )
+            for batch in batches
+        )
+    )
+
+    chunks: List[List[Dict]] = [[] for _ in texts]
+    for batch, batch_offsets in zip(batches, results):
+        for index, offsets in zip(batch, batch_offsets):
+            text = texts[index]
+            chunks[index] = [
+                {
+                    "content": text[start:end],
+                    "startOffset": start,
+                    "endOffset": end,
+                    "tokenCount": end_token - start_token,
+                }
+                for start, end, start_token, end_token in offsets
+            ]
+    return chunks
@@ -0,0 +1,119 @@
+import dataclasses
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.chunking_service import get_encoding
+from app.services.vector_store import ObjectMetadata, StoredObject
+
+
+def format_snippet(position: int, snippet: StoredObject) -> str:
+    """
+    Compact snippet format: a numbered source line followed by the raw content.
+    """
+    properties = snippet.properties
+    source = properties.get("documentURL") or properties.get("documentSource") or "unknown source"
+    if properties.get("heading"):
+        source = f"{source} ({properties['heading']})"
+    elif properties.get("filePath"):
+        source = f"{source} ({properties['filePath']})"
+    return f"[{position}] {source}\n{(properties.get('documentContent') or '').strip()}"
+
+
+def format_context(snippets: List[StoredObject]) -> str:
+    return "\n\n".join(format_snippet(position, snippet) for position, snippet in enumerate(snippets, start=1))
+
+
+def merge_snippets(first: StoredObject, second: StoredObject) -> Optional[StoredObject]:
+    """
+    Merge two chunks of the same file version whose character ranges overlap.
+
+    :return: A snippet covering both ranges, or None if they can't be merged
+    """
+    keys = ("repository", "filePath", "fileHash")
+    if any(first.properties.get(key) is None or first.properties.get(key) != second.properties.get(key) for key in keys):
+        return None
+    if any(snippet.properties.get(key) is None for snippet in (first, second) for key in ("startOffset", "endOffset")):
+        return None
+
+    best = first
+    first, second = sorted((first, second), key=lambda snippet: snippet.properties["startOffset"])
+    first_end = first.properties["endOffset"]
+    if second.properties["startOffset"] >= first_end:
+        return None
+
+    content = first.properties["documentContent"]
+    if second.properties["endOffset"] > first_end:
+        content += second.properties["documentContent"][first_end - second.properties["startOffset"] :]
+
+    distances = [snippet.metadata.distance for snippet in (first, second) if snippet.metadata.distance is not None]
+    scores = [snippet.metadata.score for snippet in (first, second) if snippet.metadata.score is not None]
+    return dataclasses.replace(
+        best,
+        properties={
+            **best.properties,
+            "documentContent": content,
+            "startOffset": first.properties["startOffset"],
+            "endOffset": max(first_end, second.properties["endOffset"]),
+        },
+        metadata=ObjectMetadata(
+            distance=min(distances) if distances else None,
+            score=max(scores) if scores else None,
+        ),
+    )
+
+
+def pack_context(
+    context: List[StoredObject],
+    token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+    max_distance: Optional[float] = settings.CONTEXT_MAX_DISTANCE,
+    encoding_name: str = settings.CHUNK_ENCODING,
+) -> List[StoredObject]:
+    """
+    Select the snippets of the RAG prompt.
+
+    Snippets past the distance cutoff are dropped, duplicated contents are kept once and
+    overlapping chunks of the same file are merged (so the overlap is only sent once),
+    then the snippets are packed best first into the token budget.
+
+    :param context: The retrieved snippets, best first
+    :param token_budget: The maximum number of tokens of the formatted context
+    :param max_distance: The maximum cosine distance to the question, None to keep every snippet
+    :param encoding_name: The tiktoken encoding used to count the tokens
+    :return: The packed snippets, best first
+    """
+    snippets: List[StoredObject] = []
+    seen_contents = set()
+    for snippet in context:
+        distance = snippet.metadata.distance
+        if max_distance is not None and distance is not None and distance > max_distance:
+            continue
+        content = (snippet.properties.get("documentContent") or "").strip()
+        if not content or content in seen_contents:
+            continue
+        seen_contents.add(content)
+
+        for index, kept in enumerate(snippets):
+            merged = merge_snippets(kept, snippet)
+            if merged is not None:
+                snippets[index] = merged
+                break
+        else:
+            snippets.append(snippet)
+
+    encoding = get_encoding(encoding_name)
+    packed: List[StoredObject] = []
+    used_tokens = 0
+    for snippet in snippets:
+        # Snippets are separated by a blank line, about one token
+        tokens = len(encoding.encode_ordinary(format_snippet(len(packed) + 1, snippet))) + 1
+        if used_tokens + tokens <= token_budget:
+            packed.append(snippet)
+            used_tokens += tokens
+        elif not packed:
+            # The best snippet alone is over budget, send its beginning rather than nothing
+            content_tokens = encoding.encode_ordinary(snippet.properties["documentContent"].strip())
+            header_tokens = tokens - len(content_tokens)
+            content = encoding.decode(content_tokens[: max(0, token_budget - header_tokens)])
+            packed.append(dataclasses.replace(snippet, properties={**snippet.properties, "documentContent": content}))
+            used_tokens = token_budget
+    return packed
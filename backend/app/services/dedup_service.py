@@ -0,0 +1,182 @@
+import json
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embedding_service import EMBEDDING_DIMENSIONS
+from app.services.vector_store import estimate_index_memory, get_index_profile
+from app.services.vector_store.keyword_search import tokenize
+
+SHINGLE_SIZE = 5  # Words per shingle
+SHINGLE_PRIME = np.uint64(1099511628211)  # Combines the word hashes of a shingle (wraps around 2^64)
+
+# Properties of a duplicate chunk kept in the aliases of its canonical chunk
+ALIAS_PROPERTIES = ("filePath", "fileHash", "chunkIndex", "chunkCount", "startOffset", "endOffset", "docVersion")
+
+# Only chunks with the same values are duplicates, so a search filtered on them still finds every content.
+# Copies across doc versions are the most common duplicates, the canonical chunk lists
+# the versions of its aliases in docVersions instead
+SCOPE_PROPERTIES = ("repository", "docSection")
+
+
+def shingle_hashes(text: str, word_hashes: Dict[str, int], shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    The distinct hashes of the word shingles (runs of shingle_size words) of a text.
+
+    :param word_hashes: Cache of the word hashes, shared by the texts of a run
+    """
+    words = tokenize(text)
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    ids = np.fromiter(
+        (word_hashes.setdefault(word, zlib.crc32(word.encode("utf-8"))) for word in words),
+        dtype=np.uint64,
+        count=len(words),
+    )
+    size = min(shingle_size, len(ids))
+    count = len(ids) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = hashes * SHINGLE_PRIME + ids[offset : offset + count]
+    return np.unique(hashes)
+
+
+class MinHasher:
+    """
+    MinHash signatures: the fraction of equal values between two signatures
+    estimates the Jaccard similarity of the two shingle sets.
+    Each permutation is a multiply-shift hash ((a * x + b) mod 2^64) >> 32, with an odd a.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        return ((self.a * shingles[None, :] + self.b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick the number of bands and rows per band of the LSH index for a similarity threshold.
+
+    Two signatures share a band with probability 1 - (1 - s^rows)^bands for a similarity s.
+    Missing a duplicate costs an embedding while a false candidate only costs a signature
+    comparison, so missed duplicates weigh more.
+    """
+    similarities = np.linspace(0, 1, 201)
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        probabilities = 1 - (1 - similarities**rows) ** bands
+        false_positives = probabilities[similarities < threshold].sum()
+        false_negatives = (1 - probabilities[similarities >= threshold]).sum()
+        cost = 0.2 * false_positives + 0.8 * false_negatives
+        if best is None or cost < best[0]:
+            best = (cost, bands, rows)
+    return best[1], best[2]
+
+
+def make_alias(chunk: Dict) -> str:
+    return json.dumps({name: chunk.get(name) for name in ALIAS_PROPERTIES}, separators=(",", ":"))
+
+
+def parse_alias(alias: str) -> Dict:
+    return json.loads(alias)
+
+
+def make_scope(chunk: Dict) -> bytes:
+    # Prefixes the LSH band keys, chunks of different scopes never share a bucket
+    return json.dumps([chunk.get(name) for name in SCOPE_PROPERTIES]).encode("utf-8")
+
+
+def deduplicate_chunks(
+    chunks: List[Dict],
+    threshold: float = settings.DEDUP_THRESHOLD,
+    num_perm: int = settings.DEDUP_NUM_PERM,
+) -> Tuple[List[Dict], Dict]:
+    """
+    Drop the near-duplicate chunks before they are embedded.
+
+    Chunks are compared by MinHash signatures of their word shingles, indexed with LSH
+    so each chunk is only compared with the few kept chunks sharing a band and its
+    SCOPE_PROPERTIES. The first chunk of a group is kept (canonical) and the others are
+    recorded in its "aliases" property, as JSON strings of their file, hash, index, offsets
+    and version. Their versions are added to its "docVersions", so version filters still find them.
+
+    :param chunks: The chunks of chunk_repository_contents
+    :param threshold: The minimum estimated Jaccard similarity of two duplicates
+    :param num_perm: The number of MinHash permutations
+    :return: The kept chunks (in their original order) and the savings report
+    """
+    hasher = MinHasher(num_perm)
+    bands, rows = lsh_bands(threshold, num_perm)
+    buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+    word_hashes: Dict[str, int] = {}
+
+    kept: List[Dict] = []
+    signatures: List[Optional[np.ndarray]] = []
+    for chunk in chunks:
+        shingles = shingle_hashes(chunk.get("documentContent") or "", word_hashes)
+        if len(shingles) == 0:
+            kept.append(chunk)
+            signatures.append(None)
+            continue
+
+        signature = hasher.signature(shingles)
+        scope = make_scope(chunk)
+        keys = [scope + signature[band * rows : (band + 1) * rows].tobytes() for band in range(bands)]
+        candidates = sorted({index for band, key in enumerate(keys) for index in buckets[band].get(key, ())})
+
+        best, best_similarity = None, threshold
+        for index in candidates:
+            similarity = float(np.mean(signatures[index] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = index, similarity
+
+        if best is not None:
+            canonical = kept[best]
+            canonical["aliases"] = canonical.get("aliases", []) + [make_alias(chunk)]
+            if chunk.get("docVersions"):
+                canonical["docVersions"] = sorted(set(canonical.get("docVersions", [])) | set(chunk["docVersions"]))
+            continue
+
+        for band, key in enumerate(keys):
+            buckets[band].setdefault(key, []).append(len(kept))
+        # Copied, the aliases are added to the kept chunk
+        kept.append(dict(chunk))
+        signatures.append(signature)
+
+    return kept, dedup_report(len(chunks), len(kept), threshold)
+
+
+def dedup_report(total: int, kept: int, threshold: float) -> Dict:
+    """
+    What the deduplication saved: embeddings requests and the vector index memory
+    of the skipped chunks, for the index profile of VECTOR_INDEX_PROFILE.
+    """
+    duplicates = total - kept
+    profile = get_index_profile(settings.VECTOR_INDEX_PROFILE)
+    vector_bytes = duplicates * EMBEDDING_DIMENSIONS * 4
+    return {
+        "threshold": threshold,
+        "chunks": total,
+        "canonical_chunks": kept,
+        "duplicate_chunks": duplicates,
+        "embeddings_saved": duplicates,
+        "vector_mb_saved": round(vector_bytes / 2**20, 2),
+        "index_memory_mb_saved": round(
+            (
+                estimate_index_memory(profile, total, EMBEDDING_DIMENSIONS)
+                - estimate_index_memory(profile, kept, EMBEDDING_DIMENSIONS)
+            )
+            / 2**20,
+            2,
+        ),
+    }
@@ -1,25 +1,106 @@
+import asyncio
+import hashlib
+import mmap
 import os
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from typing import List, Tuple, Dict
+from typing import Callable, Iterator, List, Optional, Tuple, Dict
 import re
-from langchain.text_splitter import TokenTextSplitter
-from app.services.weaviate_service import add_documentation_item
+from uuid import uuid4
+from weaviate.util import generate_uuid5
+from app.core.config import settings
+from app.core.db import create_http_client
+from app.services.chunking_service import chunk_texts, detect_language
+from app.services.dedup_service import deduplicate_chunks, parse_alias
+from app.services.metadata_service import chunk_heading, file_metadata, markdown_headings
+from app.services.preprocessing_service import filter_reason, get_repository_rules
+from app.services.source_service import (
+    check_tarball_request,
+    default_source_path,
+    is_url,
+    iter_directory_files,
+    iter_tarball_files,
+    list_directory_files,
+    repository_path,
+)
+from app.services.weaviate_service import (
+    add_documentation_items,
+    create_documentation_collection,
+    create_repository_tenant,
+    delete_repository_files,
+    get_repository_files,
+)
 
 BASE_URL = "https://gitingest.com"  # Base URL for constructing the full download link
 
+CHUNKING_VERSION = 5  # Bump when the chunking logic changes, so every file gets re-embedded
+CHUNKING_WINDOW_FILES = 512  # Files handed to the chunking process pool at once
 
-async def fetch_download_link(repository_name: str):
+
+async def send_with_retries(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a request, retried INGESTION_DOWNLOAD_RETRIES times with exponential backoff
+    on connection errors, timeouts and 5xx / 429 responses.
+    """
+    for attempt in range(settings.INGESTION_DOWNLOAD_RETRIES + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+            if response.status_code < 500 and response.status_code != 429:
+                return response
+            error = f"HTTP Status: {response.status_code}"
+        except httpx.TransportError as e:
+            error = f"{type(e).__name__}: {e}"
+        if attempt == settings.INGESTION_DOWNLOAD_RETRIES:
+            raise ConnectionError(f"{method} {url} failed after {attempt + 1} attempts ({error})")
+        delay = 2 ** attempt
+        print(f"{method} {url} failed ({error}), retrying in {delay} s")
+        await asyncio.sleep(delay)
+
+
+async def download_file(client: httpx.AsyncClient, url: str, save_path: str) -> str:
+    """
+    Stream a download to a file, the whole download is retried like send_with_retries.
+
+    The download is written to a temporary file of the same directory, then moved in place,
+    so a reader of the previous file (a memory-mapped dump) keeps a complete file.
+    """
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    temporary_path = f"{save_path}.{uuid4().hex}.tmp"
+    for attempt in range(settings.INGESTION_DOWNLOAD_RETRIES + 1):
+        try:
+            async with client.stream("GET", url) as response:
+                if response.status_code == 200:
+                    with open(temporary_path, "wb") as file:
+                        async for chunk in response.aiter_bytes(chunk_size=64 * 1024):
+                            file.write(chunk)
+                    os.replace(temporary_path, save_path)
+                    return save_path
+                error = f"HTTP Status: {response.status_code}"
+                if response.status_code < 500 and response.status_code != 429:
+                    raise ConnectionError(f"Failed to download {url}. {error}")
+        except httpx.TransportError as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        if attempt == settings.INGESTION_DOWNLOAD_RETRIES:
+            raise ConnectionError(f"Failed to download {url} after {attempt + 1} attempts ({error})")
+        delay = 2 ** attempt
+        print(f"Download of {url} failed ({error}), retrying in {delay} s")
+        await asyncio.sleep(delay)
+
+
+async def fetch_download_link(client: httpx.AsyncClient, repository_name: str) -> str:
     """
     Gitingest is used to fetch the content of a GitHub repository.
     This function is used to fetch the download link for the content of a given repository.
 
     Args:
+        client (httpx.AsyncClient): The client of the gitingest session, it keeps the cookies for the download.
         repository_name (str): The name of the repository to fetch. Example: kubeflow/website
 
     Returns:
         str: The download link for the content of the given repository.
-        requests.Session: A session object to maintain cookies and headers.
 
     PS: I saw how Gitingest send the request through Network tab in Chrome DevTools
         and I mimic it but it won't be like this in a prod version, this is a temporary solution.
@@ -32,16 +113,12 @@ async def fetch_download_link(repository_name: str):
         "pattern": "",
     }
 
-    # Create a session to maintain cookies and headers
-    session = requests.Session()
-
-    # Send the request using the session
-    response = session.post(BASE_URL, data=payload)
+    # Send the request, the client keeps the session cookies
+    response = await send_with_retries(client, "POST", BASE_URL, data=payload)
 
     # Ensure request was successful
     if response.status_code != 200:
-        print(f"Failed to fetch data. HTTP Status: {response.status_code}")
-        return None
+        raise ConnectionError(f"Failed to fetch data from gitingest. HTTP Status: {response.status_code}")
 
     # Parse HTML response
     soup = BeautifulSoup(response.text, "html.parser")
@@ -50,195 +127,465 @@ async def fetch_download_link(repository_name: str):
     download_link_tag = soup.find("a", href=lambda href: href and "download" in href)
 
     if not download_link_tag:
-        print("Failed to find the download link in the response.")
-        return None
+        raise ConnectionError("Failed to find the download link in the gitingest response.")
 
     # Extract the download link
     download_link = BASE_URL + download_link_tag["href"]
 
     print(f"Download link found: {download_link}")
-    return download_link, session
+    return download_link
 
 
-async def download_and_save_repository(repository_name: str):
+async def download_and_save_repository(repository_name: str) -> str:
     """
     Downloads the repository text file from Gitingest and saves it locally.
 
     Args:
-        repository_name (str): The name of the repository (for example "kubeflow-website").
-    """
-    # Get the download link
-    download_url, session = await fetch_download_link(repository_name)
+        repository_name (str): The name of the repository (for example "kubeflow/website").
 
-    if not download_url or not session:
-        print("Failed to obtain download URL or session. Cannot proceed with download.")
-        return False
+    Returns:
+        str: The path of the saved dump.
 
+    Raises:
+        ValueError: When the repository name is not "<owner>/<repo>".
+        ConnectionError: When gitingest can't be reached or doesn't return the dump, after the retries.
+            Nothing is returned in that case, so a failed download never looks like an empty repository.
+    """
     # Define the output directory and file path
-    save_dir = os.path.join(os.getcwd(), "parsed_repositories", repository_name)
-    os.makedirs(save_dir, exist_ok=True)
-    save_path = os.path.join(save_dir, "code.txt")
-
-    # Send a request to download the file
-    response = session.get(download_url, stream=True)
+    save_path = repository_path(os.path.join(os.getcwd(), "parsed_repositories"), repository_name, "code.txt")
 
-    if response.status_code == 200:
-        with open(save_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=1024):
-                file.write(chunk)
+    async with create_http_client() as client:
+        download_url = await fetch_download_link(client, repository_name)
+        await download_file(client, download_url, save_path)
 
-        print(f"Repository successfully downloaded and saved to: {save_path}")
-        return save_path
-    else:
-        print(f"Failed to download the repository. HTTP Status: {response.status_code}")
-        return "Failed to download the repository."
+    print(f"Repository successfully downloaded and saved to: {save_path}")
+    return save_path
 
 
-async def parse_repository_file(repository_name: str) -> List[Tuple[str, str]]:
+async def fetch_repository_source(
+    repository_name: str, source: Optional[str] = None, path: Optional[str] = None
+) -> Tuple[str, str]:
     """
-    Parse the downloaded repository content file and extract individual file contents.
-    
+    Make a source available locally: the gitingest dumps and the tarball URLs are downloaded
+    under parsed_repositories/, the local sources are used in place.
+
     Args:
         repository_name (str): The name of the repository (for example "kubeflow/website").
+        source (str, optional): One of source_service.SOURCES. Defaults to INGESTION_DEFAULT_SOURCE.
+        path (str, optional): The path or URL of the source. Defaults to default_source_path.
 
     Returns:
-        List[Tuple[str, str]]: List of tuples containing (filename, content).
+        Tuple[str, str]: The local source ("dump", "directory" or "tarball") and its path.
+    """
+    source = source or settings.INGESTION_DEFAULT_SOURCE
+    path = path or default_source_path(repository_name, source)
+    if source == "gitingest":
+        return "dump", await download_and_save_repository(repository_name)
+    if source == "tarball" and is_url(path):
+        save_path = repository_path(os.path.join(os.getcwd(), "parsed_repositories"), repository_name, "source.tar.gz")
+        async with create_http_client() as client:
+            client.event_hooks["request"].append(check_tarball_request)
+            await download_file(client, path, save_path)
+        print(f"Tarball successfully downloaded and saved to: {save_path}")
+        return source, save_path
+    return source, path
+
+
+# Separator pattern for the file separators
+# ================================================
+# File: (filename)
+# ================================================
+SEPARATOR_PATTERN = re.compile(rb'={48,}\s*File:\s*(.*?)\s*={48,}', re.DOTALL)
+
+
+def iter_repository_file(file_path: str) -> Iterator[Tuple[str, str]]:
     """
-    file_path = await download_and_save_repository(repository_name)
+    Lazily parse a gitingest dump file and yield the individual file contents.
 
+    The file is memory-mapped and scanned incrementally, so only the current file content
+    is decoded in memory, whatever the size of the dump.
+
+    Args:
+        file_path (str): The path of the dump file (for example "parsed_repositories/kubeflow/website/code.txt").
+
+    Yields:
+        Tuple[str, str]: (filename, content) for each file of the dump.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
-            content = file.read()
-        
-        # Separator pattern for the file separators
-        # ================================================
-        # File: (filename)
-        # ================================================
-        separator_pattern = r'={48,}\s*File:\s*(.*?)\s*={48,}'
-        
-        # Find all matches
-        matches = list(re.finditer(separator_pattern, content, re.DOTALL))
-        
-        if not matches:
-            print("No file separators found with the expected pattern.")
-            return []
-        
-        print(f"Found {len(matches)} file separators in the content.")
-        
-        # Extract filenames and positions
-        filenames = [match.group(1).strip() for match in matches]
-        start_positions = [match.start() for match in matches]
-        
-        file_contents = []
-        for i in range(len(start_positions)):
-            # Get current filename
-            filename = filenames[i]
-            
-            # Determine the content start position (end of current separator)
-            match_text = matches[i].group(0)
-            content_start = start_positions[i] + len(match_text)
-            
-            # Determine the content end position (start of next separator or end of file)
-            if i < len(start_positions) - 1:
-                content_end = start_positions[i + 1]
-            else:
-                content_end = len(content)
-            
-            # Extract the file content
-            file_content = content[content_start:content_end].strip()
-            
-            # Add the file info to the list
-            file_contents.append((filename, file_content))
-        
-        return file_contents
-    
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                print("No file separators found with the expected pattern.")
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                filename = None
+                content_start = 0
+                file_count = 0
+
+                for match in SEPARATOR_PATTERN.finditer(content):
+                    # The content of the previous file ends where the current separator starts
+                    if filename is not None:
+                        yield filename, content[content_start:match.start()].decode('utf-8', errors='replace').strip()
+
+                    filename = match.group(1).decode('utf-8', errors='replace').strip()
+                    content_start = match.end()
+                    file_count += 1
+
+                if filename is None:
+                    print("No file separators found with the expected pattern.")
+                    return
+
+                # The last file runs until the end of the dump
+                yield filename, content[content_start:].decode('utf-8', errors='replace').strip()
+                print(f"Found {file_count} file separators in the content.")
+
     except Exception as e:
         print(f"Error parsing repository file: {e}")
-        return []
 
 
-async def preprocess_repository_file(repository_name: str) -> List[Tuple[str, str]]:
+async def parse_repository_file(
+    repository_name: str, source: Optional[str] = None, path: Optional[str] = None
+) -> Iterator[Tuple[str, str]]:
     """
-    Preprocess the file content by removing unnecessary files (under 50 character for example)
+    Fetch the repository contents (see fetch_repository_source) and read the individual file contents lazily,
+    from a gitingest dump, a local directory or git checkout, or a tarball read as a stream.
+    The generator reads and decodes the files synchronously, iterate over it off the event loop
+    (see read_file_window).
 
     Args:
         repository_name (str): The name of the repository (for example "kubeflow/website").
+        source (str, optional): One of source_service.SOURCES. Defaults to INGESTION_DEFAULT_SOURCE.
+        path (str, optional): The path or URL of the source. Defaults to default_source_path.
+
+    Returns:
+        Iterator[Tuple[str, str]]: Generator of tuples containing (filename, content).
     """
-    file_contents = await parse_repository_file(repository_name)
-    
-    # Preprocess the file content
-    preprocessed_file_contents = []
+    source, path = await fetch_repository_source(repository_name, source, path)
+    if source == "directory":
+        return iter_directory_files(path, await list_directory_files(path))
+    if source == "tarball":
+        return iter_tarball_files(path)
+    return iter_repository_file(path)
+
+
+async def preprocess_repository_file(
+    repository_name: str,
+    filtered: Optional[Dict[str, int]] = None,
+    source: Optional[str] = None,
+    path: Optional[str] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Preprocess the file content by removing the files not worth embedding: excluded paths
+    (lockfiles, media, generated code...), too short, binary-like, minified or encoded contents.
+    See preprocessing_service, the repository include/exclude patterns come from the settings.
+
+    Args:
+        repository_name (str): The name of the repository (for example "kubeflow/website").
+        filtered (Dict[str, int], optional): Counts the removed files by reason. Defaults to None.
+        source (str, optional): One of source_service.SOURCES. Defaults to INGESTION_DEFAULT_SOURCE.
+        path (str, optional): The path or URL of the source. Defaults to default_source_path.
+
+    Returns:
+        Iterator[Tuple[str, str]]: Generator of the kept (filename, content) tuples.
+    """
+    file_contents = await parse_repository_file(repository_name, source, path)
+    rules = get_repository_rules(repository_name)
+
+    # Preprocess the file content lazily
+    def kept_files():
+        for filename, content in file_contents:
+            reason = filter_reason(filename, content, rules)
+            if reason is None:
+                yield filename, content
+            elif filtered is not None:
+                filtered[reason] = filtered.get(reason, 0) + 1
+
+    return kept_files()
+
+
+def hash_file_content(content: str, chunk_size: int, chunk_overlap: int) -> str:
+    """
+    Hash a file content together with the chunking parameters, so a file is re-embedded
+    when either its content or the way it is chunked changes.
+    """
+    fingerprint = f"{CHUNKING_VERSION}:{chunk_size}:{chunk_overlap}\0{content}"
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def make_chunk_uuid(repository_name: str, file_path: str, chunk_index: int, file_hash: str) -> str:
+    """
+    Deterministic UUID of a chunk, so re-ingesting the same file version replaces its chunks instead of duplicating them.
+    """
+    return generate_uuid5(f"{repository_name}:{file_path}:{chunk_index}:{file_hash}")
+
+
+def read_file_window(
+    file_contents: Iterator[Tuple[str, str]],
+    chunk_size: int,
+    chunk_overlap: int,
+    skip_file: Optional[Callable[[str, str], bool]] = None,
+) -> Tuple[List[Tuple[str, str, str]], int]:
+    """
+    Read the next window of files to chunk from the preprocessed file contents.
+
+    Parsing the source, preprocessing and hashing the files happen while iterating
+    over file_contents, so this runs in a worker thread, off the event loop.
+
+    Returns:
+        Tuple[List[Tuple[str, str, str]], int]: The (filename, file hash, content) of up to CHUNKING_WINDOW_FILES
+                                                files not skipped, and the number of files read (0 once exhausted).
+    """
+    window = []
+    file_count = 0
     for filename, content in file_contents:
-        if len(content) > 50:
-            preprocessed_file_contents.append((filename, content))
-    return preprocessed_file_contents
+        file_count += 1
+        file_hash = hash_file_content(content, chunk_size, chunk_overlap)
+        if skip_file is not None and skip_file(filename, file_hash):
+            continue
+
+        window.append((filename, file_hash, content))
+        if len(window) >= CHUNKING_WINDOW_FILES:
+            break
+    return window, file_count
 
 
-async def chunk_repository_contents(repository_name: str, chunk_size: int = 1000, chunk_overlap: int = 100) -> List[Dict[str, str]]:
+def make_file_chunks(
+    repository_name: str, window: List[Tuple[str, str, str]], file_chunks: List[List[Dict]]
+) -> List[Dict[str, str]]:
     """
-    Chunks the preprocessed repository file contents using TokenTextSplitter.
+    The chunk documents of a window of files, with the metadata of their file and their heading.
+    """
+    chunked_contents = []
+    for (filename, file_hash, content), chunks in zip(window, file_chunks):
+        # URL, section, version and language of the file, shared by its chunks
+        metadata = file_metadata(repository_name, filename)
+        headings = markdown_headings(content) if metadata.get("language") == "markdown" else []
+        # Create a document for each chunk with metadata
+        for i, chunk in enumerate(chunks):
+            chunked_content = {
+                "uuid": make_chunk_uuid(repository_name, filename, i, file_hash),
+                "documentSource" : "Github Repository:" + repository_name,
+                "documentContent": chunk["content"],
+                "repository": repository_name,
+                "filePath": filename,
+                "fileHash": file_hash,
+                "chunkIndex": i,
+                "chunkCount": len(chunks),
+                "startOffset": chunk["startOffset"],
+                "endOffset": chunk["endOffset"],
+                **metadata,
+            }
+            heading = chunk_heading(headings, chunk["startOffset"], chunk["endOffset"])
+            if heading is not None:
+                chunked_content["heading"] = heading
+            chunked_contents.append(chunked_content)
+    return chunked_contents
+
+
+async def chunk_repository_contents(
+    repository_name: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    skip_file: Optional[Callable[[str, str], bool]] = None,
+    filtered: Optional[Dict[str, int]] = None,
+    source: Optional[str] = None,
+    path: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """
+    Chunks the preprocessed repository file contents. Markdown, Python and YAML files are split
+    along their headings and definitions, the other files in overlapping token windows.
+
+    The files are read, preprocessed and hashed in a worker thread (see read_file_window) and
+    spread across a process pool (see chunking_service), a window of files at a time, so the
+    event loop keeps serving requests while a repository is ingested.
     
     Args:
         repository_name (str): The name of the repository (for example "kubeflow/website").
         chunk_size (int, optional): The size of each chunk in tokens. Defaults to 1000.
         chunk_overlap (int, optional): The number of overlapping tokens between chunks. Defaults to 100.
+        skip_file (Callable[[str, str], bool], optional): Called with (filename, file hash) for every file,
+            the file is not chunked when it returns True. Called from the worker thread. Defaults to None.
+        filtered (Dict[str, int], optional): Counts the files removed by the preprocessing, by reason.
+            Defaults to None.
+        source (str, optional): One of source_service.SOURCES. Defaults to INGESTION_DEFAULT_SOURCE.
+        path (str, optional): The path or URL of the source. Defaults to default_source_path.
         
     Returns:
-        List[Dict[str, str]]: A list of dictionaries containing the chunked content with metadata.
+        List[Dict[str, str]]: A list of dictionaries containing the chunked content with metadata
+                              (the URL of its file, the start/end character offsets of the chunk in it,
+                              its doc section, version, language and heading, see metadata_service).
     """
     # Get preprocessed file contents
-    file_contents = await preprocess_repository_file(repository_name)
-    
-    # Initialize the TokenTextSplitter
-    text_splitter = TokenTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    file_contents = await preprocess_repository_file(repository_name, filtered, source, path)
     
     chunked_contents = []
+    file_count = 0
+    while True:
+        window, read = await asyncio.to_thread(read_file_window, file_contents, chunk_size, chunk_overlap, skip_file)
+        if not read:
+            break
+        file_count += read
+        if not window:
+            continue
+
+        file_chunks = await chunk_texts(
+            [content for _, _, content in window],
+            chunk_size,
+            chunk_overlap,
+            languages=[detect_language(filename) for filename, _, _ in window],
+        )
+        chunked_contents += await asyncio.to_thread(make_file_chunks, repository_name, window, file_chunks)
     
-    for filename, content in file_contents:
-        # Split the content into chunks
-        chunks = text_splitter.split_text(content)
-        
-        # Create a document for each chunk with metadata
-        for i, chunk in enumerate(chunks):
-            chunked_contents.append({
-                "documentSource" : "Github Repository:" + repository_name,
-                "documentURL" : "https://github.com/" + repository_name,
-                "documentContent": chunk,
-            })
-    
-    print(f"Created {len(chunked_contents)} chunks from {len(file_contents)} files")
+    print(f"Created {len(chunked_contents)} chunks from {file_count} files")
     return chunked_contents
 
 
-async def embed_repository_to_vector_db(repository_name: str, chunk_size: int = 1000, chunk_overlap: int = 100):
+async def embed_repository_to_vector_db(
+    repository_name: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    progress: Optional[Callable[..., None]] = None,
+    source: Optional[str] = None,
+    path: Optional[str] = None,
+):
     """
-    Chunks the repository contents and embeds them in the vector database.
+    Incrementally syncs the repository contents with the vector database.
+
+    Only new and changed files are chunked and embedded (in batches), the chunks of
+    changed and deleted files are removed afterwards. In a multi-tenant collection, the
+    repository is synced in its own tenant, created (or activated) first. With DEDUP_ENABLED, near-duplicate
+    chunks are not embedded, they are recorded as aliases of the chunk they duplicate.
     
     Args:
         repository_name (str): The name of the repository (for example "kubeflow/website").
         chunk_size (int, optional): The size of each chunk in tokens. Defaults to 1000.
         chunk_overlap (int, optional): The number of overlapping tokens between chunks. Defaults to 100.
+        progress (Callable, optional): Called with the current stage, and chunks_done/chunks_total
+            keyword arguments while embedding. Defaults to None.
+        source (str, optional): One of source_service.SOURCES. Defaults to INGESTION_DEFAULT_SOURCE.
+        path (str, optional): The path or URL of the source. Defaults to default_source_path.
         
     Returns:
-        bool: True if all chunks are embedded successfully, False otherwise.
+        Dict: The ingestion report with the file changes, the files removed by the preprocessing (by reason),
+              the number of embedded and deleted chunks, the failed chunks (index, documentURL and error
+              for each one) and the deduplication savings.
     """
-    # Get chunked contents
-    chunks = await chunk_repository_contents(repository_name, chunk_size, chunk_overlap)
-    
-    # Counter for successful embeddings
-    successful_embeddings = 0
-    
-    # Embed each chunk in the vector database
-    for chunk in chunks:
-        try:
-            add_documentation_item(
-                documentSource=chunk["documentSource"],
-                documentURL=chunk["documentURL"],
-                documentContent=chunk["documentContent"]
-            )
-            successful_embeddings += 1
-        except Exception as e:
-            print(f"Error embedding chunk: {e}")
+    def report(stage: str, **counts):
+        if progress is not None:
+            progress(stage, **counts)
+
+    # Downloaded once, the second pass for the orphaned aliases reads the same contents
+    report("fetching")
+    source, path = await fetch_repository_source(repository_name, source, path)
+
+    # Files already stored, as {filePath: {fileHash: complete}}
+    report("scanning")
+    await create_documentation_collection()
+    await create_repository_tenant(repository_name)
+    alias_files: Dict[str, set] = {}
+    stored_files = await get_repository_files(repository_name, alias_files=alias_files)
+    current_files = {}
+
+    def is_unchanged(filename: str, file_hash: str) -> bool:
+        current_files[filename] = file_hash
+        return stored_files.get(filename, {}).get(file_hash, False)
+
+    async def embed_files(skip_file, filtered=None):
+        # Get chunked contents of the files to (re-)embed only
+        report("chunking")
+        chunks = await chunk_repository_contents(
+            repository_name,
+            chunk_size,
+            chunk_overlap,
+            skip_file=skip_file,
+            filtered=filtered,
+            source=source,
+            path=path,
+        )
+        chunked_files = {chunk["filePath"] for chunk in chunks}
+        dedup = None
+        if settings.DEDUP_ENABLED:
+            chunks, dedup = await asyncio.to_thread(deduplicate_chunks, chunks)
+
+        # Embed and insert the chunks in batches
+        result = await add_documentation_items(
+            chunks,
+            progress=lambda done, total: report("embedding", chunks_done=done, chunks_total=total),
+        )
+
+        failed_chunks = [
+            {
+                "index": failure["index"],
+                "documentURL": chunks[failure["index"]]["documentURL"],
+                "filePath": chunks[failure["index"]]["filePath"],
+                # The duplicates of a failed chunk are missing too
+                "aliasedFiles": sorted({
+                    parse_alias(alias)["filePath"] for alias in chunks[failure["index"]].get("aliases", [])
+                }),
+                "error": failure["error"],
+            }
+            for failure in result["failed"]
+        ]
+        for failure in failed_chunks:
+            print(f"Error embedding chunk {failure['index']}: {failure['error']}")
+        return chunked_files, len(chunks), result["inserted"], failed_chunks, dedup
+
+    filtered_files: Dict[str, int] = {}
+    changed_files, total_chunks, embedded_chunks, failed_chunks, dedup = await embed_files(
+        is_unchanged, filtered_files
+    )
+
+    # Remove deleted files and the previous versions of changed files,
+    # except for files whose new version failed to be stored
+    failed_files = {failure["filePath"] for failure in failed_chunks}
+    failed_files.update(file_path for failure in failed_chunks for file_path in failure["aliasedFiles"])
+    stale_files = [
+        file_path
+        for file_path, hashes in stored_files.items()
+        if file_path not in failed_files and set(hashes) != {current_files.get(file_path)}
+    ]
+    report("cleaning up")
+    deleted_chunks = await delete_repository_files(
+        repository_name,
+        stale_files,
+        keep_hashes={file_path: current_files[file_path] for file_path in stale_files if file_path in current_files},
+    )
+
+    # Unchanged files whose duplicates were stored as aliases of a chunk that was just
+    # deleted (with an old file version) lost them, they are embedded again
+    orphaned_files = {
+        alias_file for file_path in stale_files for alias_file in alias_files.get(file_path, ())
+    } & current_files.keys() - changed_files
+    if orphaned_files:
+        print(f"Re-embedding {len(orphaned_files)} files whose duplicate chunks were deleted")
+        _, orphaned_chunks, orphaned_embedded, orphaned_failed, _ = await embed_files(
+            lambda filename, file_hash: filename not in orphaned_files
+        )
+        total_chunks += orphaned_chunks
+        embedded_chunks += orphaned_embedded
+        failed_chunks += orphaned_failed
+
+    files_report = {
+        "unchanged": len(current_files) - len(changed_files),
+        "added": len(changed_files - stored_files.keys()),
+        "changed": len(changed_files & stored_files.keys()),
+        "deleted": len(stored_files.keys() - current_files.keys()),
+        "filtered": sum(filtered_files.values()),
+    }
     
-    print(f"Successfully embedded {successful_embeddings} out of {len(chunks)} chunks from repository {repository_name}")
-    return successful_embeddings/len(chunks)
\ No newline at end of file
+    print(f"Successfully embedded {embedded_chunks} out of {total_chunks} chunks from repository {repository_name} "
+          f"({files_report}), deleted {deleted_chunks} stale chunks")
+    if dedup is not None:
+        print(f"Deduplication: {dedup['duplicate_chunks']} near-duplicate chunks not embedded, "
+              f"~{dedup['index_memory_mb_saved']} MB of vector index saved")
+    return {
+        "repository": repository_name,
+        "source": source,
+        "files": files_report,
+        "total_chunks": total_chunks,
+        "embedded_chunks": embedded_chunks,
+        "deleted_chunks": deleted_chunks,
+        "failed_chunks": failed_chunks,
+        "filtered_files": filtered_files,
+        "deduplication": dedup,
+    }
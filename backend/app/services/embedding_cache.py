@@ -0,0 +1,218 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by sha256(model, text).
+
+    Vectors are stored as float32 bytes in two tiers: an in-memory LRU in front of
+    a SQLite file. Both tiers are bounded by size and evict the least recently used entries.
+    The SQLite file is opened on first use, not when the module is imported.
+    """
+
+    def __init__(self, path: str, memory_max_bytes: int, disk_max_bytes: int):
+        self.path = path
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Must be called with the lock held
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            )
+            db.commit()
+            self._disk_bytes = db.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several texts.
+
+        :param model: The embedding model name
+        :param texts: The texts to look up
+        :return: The cached embeddings aligned with texts, None for misses
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        found: Dict[str, bytes] = {}
+
+        with self._lock:
+            # Memory tier
+            for key in keys:
+                blob = self._memory.get(key)
+                if blob is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = blob
+                    self.memory_hits += 1
+
+            # Disk tier, for what is left
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing:
+                db = self._connect()
+                rows = []
+                for start in range(0, len(missing), 500):
+                    part = missing[start : start + 500]
+                    rows.extend(
+                        db.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                            part,
+                        ).fetchall()
+                    )
+                if rows:
+                    now = time.time()
+                    db.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows],
+                    )
+                    db.commit()
+                for key, blob in rows:
+                    found[key] = blob
+                    self._remember(key, blob)
+                self.disk_hits += len(rows)
+                self.misses += len(missing) - len(rows)
+
+        return [array("f", found[key]).tolist() if key in found else None for key in keys]
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text])[0]
+
+    def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[List[float]]):
+        """
+        Store the embeddings of several texts in both tiers.
+
+        :param model: The embedding model name
+        :param texts: The embedded texts
+        :param vectors: The embeddings aligned with texts
+        """
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            rows.append((self.make_key(model, text), array("f", vector).tobytes(), now))
+
+        with self._lock:
+            db = self._connect()
+            for key, blob, _ in rows:
+                self._remember(key, blob)
+            for key, blob, _ in rows:
+                previous = db.execute(
+                    "SELECT LENGTH(vector) FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                self._disk_bytes += len(blob) - (previous[0] if previous else 0)
+            db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._evict_disk()
+            db.commit()
+
+    def set(self, model: str, text: str, vector: List[float]):
+        self.set_many(model, [text], [vector])
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._connect()
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk_evictions,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            db = self._connect()
+            db.execute("DELETE FROM embeddings")
+            db.commit()
+            self._disk_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, blob: bytes):
+        # Must be called with the lock held
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.memory_evictions += 1
+
+    def _evict_disk(self):
+        # Must be called with the lock held, drops the least recently used rows until under budget
+        while self._disk_bytes > self.disk_max_bytes:
+            rows = self._db.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            evicted = []
+            for key, size in rows:
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                evicted.append((key,))
+                self._disk_bytes -= size
+            self._db.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+            self.disk_evictions += len(evicted)
+
+
+embedding_cache = (
+    EmbeddingCache(
+        path=settings.EMBEDDING_CACHE_PATH,
+        memory_max_bytes=settings.EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024,
+        disk_max_bytes=settings.EMBEDDING_CACHE_DISK_MB * 1024 * 1024,
+    )
+    if settings.EMBEDDING_CACHE_ENABLED
+    else None
+)
@@ -1,16 +1,147 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+import openai
+from prometheus_client import Counter, Histogram
+from app.core.concurrency import get_limiter
+from app.core.config import settings
 from app.core.db import get_openai_client
+from app.services.embedding_cache import embedding_cache
 
+logger = logging.getLogger(__name__)
 
-client = get_openai_client()
+EMBEDDING_LATENCY = Histogram(
+    "embedding_request_duration_seconds", "Embeddings API call latency", ["model", "operation"]
+)
+# Shared with the semantic answer cache of llm_service
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
 
 
-def get_embeddings(text: str):
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSIONS = 1536
+
+
+async def get_embeddings(text: str):
     """
     Get embeddings for a given text using the OpenAI embedding model.
+    Embeddings already computed for the same text and model are served from the cache.
 
     :param text: The text to embed
     :return: The embeddings as a list of floats
     """
+    if embedding_cache is not None:
+        cached = await asyncio.to_thread(embedding_cache.get, EMBEDDING_MODEL, text)
+        CACHE_REQUESTS.labels(cache="embedding", result="miss" if cached is None else "hit").inc()
+        if cached is not None:
+            return cached
+
     # Get embeddings
-    response = client.embeddings.create(input=text, model="text-embedding-ada-002")
-    return response.data[0].embedding
+    async with get_limiter("openai"):
+        with EMBEDDING_LATENCY.labels(model=EMBEDDING_MODEL, operation="single").time():
+            response = await get_openai_client().embeddings.create(input=text, model=EMBEDDING_MODEL)
+    embedding = response.data[0].embedding
+
+    if embedding_cache is not None:
+        await asyncio.to_thread(embedding_cache.set, EMBEDDING_MODEL, text, embedding)
+    return embedding
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Rate limits, 5xx responses, timeouts and connection errors are worth retrying, unlike a 400 on an invalid input.
+    """
+    if isinstance(error, openai.APIConnectionError):  # Includes the timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+async def create_embeddings_with_retries(inputs: List[str]):
+    """
+    Send an embeddings request, retried EMBEDDING_BATCH_RETRIES times with exponential backoff
+    when is_retryable. The retries of the SDK are turned off, so a batch is not retried twice over.
+
+    :param inputs: The texts of the request
+    :return: The embeddings response
+    """
+    for attempt in range(settings.EMBEDDING_BATCH_RETRIES + 1):
+        try:
+            async with get_limiter("openai"):
+                with EMBEDDING_LATENCY.labels(model=EMBEDDING_MODEL, operation="batch").time():
+                    return await get_openai_client().with_options(max_retries=0).embeddings.create(
+                        input=inputs, model=EMBEDDING_MODEL
+                    )
+        except Exception as e:
+            if not is_retryable(e) or attempt == settings.EMBEDDING_BATCH_RETRIES:
+                raise
+            delay = 2 ** attempt
+            logger.warning("Error embedding batch of %d inputs (%s), retrying in %d s", len(inputs), e, delay)
+        # Waiting outside of the limiter, other batches can use the slot meanwhile
+        await asyncio.sleep(delay)
+
+
+async def get_embeddings_batch(
+    texts: List[str], batch_size: int = settings.EMBEDDING_BATCH_SIZE
+) -> Tuple[List[Optional[List[float]]], Dict[int, str]]:
+    """
+    Get embeddings for many texts, sending up to batch_size inputs per request.
+
+    Cached texts are not sent at all. A request failing on a rate limit or a server error is
+    retried with backoff. A request rejected as invalid (400) is retried one input at a time,
+    so a single bad input (too long, filtered...) does not fail the rest of the batch.
+
+    :param texts: The texts to embed
+    :param batch_size: The maximum number of inputs sent in a single request
+    :return: The embeddings aligned with texts (None where it failed) and a dict of {index: error}
+    """
+    if embedding_cache is not None:
+        embeddings = await asyncio.to_thread(embedding_cache.get_many, EMBEDDING_MODEL, texts)
+    else:
+        embeddings = [None] * len(texts)
+    errors: Dict[int, str] = {}
+
+    # Only the cache misses go to the API
+    pending = [index for index, embedding in enumerate(embeddings) if embedding is None]
+    if embedding_cache is not None:
+        CACHE_REQUESTS.labels(cache="embedding", result="hit").inc(len(texts) - len(pending))
+        CACHE_REQUESTS.labels(cache="embedding", result="miss").inc(len(pending))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        try:
+            response = await create_embeddings_with_retries([texts[index] for index in batch])
+        except openai.BadRequestError as e:
+            logger.warning("Invalid input in a batch of %d inputs, retrying item by item: %s", len(batch), e)
+            for index in batch:
+                try:
+                    embeddings[index] = await get_embeddings(texts[index])
+                except Exception as item_error:
+                    errors[index] = str(item_error)
+            continue
+        except Exception as e:
+            logger.error("Error embedding batch of %d inputs: %s", len(batch), e)
+            errors.update((index, str(e)) for index in batch)
+            continue
+
+        # The API returns one item per input, tagged with its position in the request
+        for item in response.data:
+            embeddings[batch[item.index]] = item.embedding
+        if embedding_cache is not None:
+            await asyncio.to_thread(
+                embedding_cache.set_many,
+                EMBEDDING_MODEL,
+                [texts[index] for index in batch],
+                [embeddings[index] for index in batch],
+            )
+
+    return embeddings, errors
+
+
+def get_embedding_cache_stats():
+    """
+    Get the hit/miss counters and sizes of the embedding cache.
+
+    :return: The cache statistics, or None if the cache is disabled
+    """
+    if embedding_cache is None:
+        return None
+    return embedding_cache.stats()
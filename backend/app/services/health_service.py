@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Dict
+from app.core.config import settings
+from app.core.db import get_groq_client, get_openai_client, get_weaviate_client
+
+started_at = time.time()
+
+# Last probe of each upstream: {upstream: (checked_at, result)}
+probe_results: Dict[str, tuple] = {}
+
+
+async def probe_weaviate():
+    if settings.VECTOR_STORE_BACKEND != "weaviate":
+        return "not used"
+    client = await get_weaviate_client()
+    if not await client.is_ready():
+        raise ConnectionError("Weaviate is not ready")
+    return None
+
+
+async def probe_groq():
+    # Listing the models doesn't use any token
+    await get_groq_client().models.list()
+
+
+async def probe_openai():
+    await get_openai_client().models.list()
+
+
+PROBES = {"weaviate": probe_weaviate, "groq": probe_groq, "openai": probe_openai}
+
+
+async def check_upstream(name: str) -> Dict:
+    """
+    Probe an upstream, the result is reused for HEALTH_CHECK_CACHE_SECONDS
+    so frequent readiness checks don't flood the upstreams.
+
+    :return: {"status": "up" | "down", "latency_ms": ..., "error": ...}
+    """
+    cached = probe_results.get(name)
+    if cached is not None and time.time() - cached[0] < settings.HEALTH_CHECK_CACHE_SECONDS:
+        return cached[1]
+
+    probe_started_at = time.perf_counter()
+    try:
+        detail = await asyncio.wait_for(PROBES[name](), settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        result = {"status": "up"}
+        if detail:
+            result["detail"] = detail
+    except asyncio.TimeoutError:
+        result = {"status": "down", "error": f"No answer within {settings.HEALTH_CHECK_TIMEOUT_SECONDS} s"}
+    except Exception as e:
+        result = {"status": "down", "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - probe_started_at) * 1000, 1)
+    probe_results[name] = (time.time(), result)
+    return result
+
+
+def get_liveness() -> Dict:
+    """
+    The process is alive as long as it answers, upstreams are not checked
+    so an upstream restart never gets the pod restarted.
+    """
+    return {"status": "alive", "uptime_seconds": round(time.time() - started_at, 1)}
+
+
+async def get_readiness() -> Dict:
+    """
+    Probe every upstream at the same time. The app is ready when the upstreams
+    of READINESS_REQUIRED_UPSTREAMS are up, the other ones are only reported.
+    """
+    names = list(PROBES)
+    results = await asyncio.gather(*(check_upstream(name) for name in names))
+    upstreams = {
+        name: {**result, "required": name in settings.READINESS_REQUIRED_UPSTREAMS}
+        for name, result in zip(names, results)
+    }
+    ready = all(upstream["status"] == "up" for upstream in upstreams.values() if upstream["required"])
+    return {"status": "ready" if ready else "not ready", "upstreams": upstreams}
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import uuid4
+
+from prometheus_client import Gauge
+
+from app.core.config import settings
+from app.services.documentation_service import embed_repository_to_vector_db
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+INGESTION_JOBS_RUNNING = Gauge("ingestion_jobs_running", "Ingestion jobs currently running")
+
+
+class IngestionJob:
+    """
+    A repository ingestion running in the background, with its progress.
+    """
+
+    def __init__(
+        self,
+        repository_name: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        source: Optional[str] = None,
+        path: Optional[str] = None,
+    ):
+        self.id = str(uuid4())
+        self.repository_name = repository_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.source = source
+        self.path = path
+
+        self.status = "queued"  # queued, running, completed, failed or cancelled
+        self.stage = None  # fetching, scanning, chunking, embedding or cleaning up while running
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.result = None
+        self.error = None
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.embedding_started_at = None
+        self.finished_at = None
+
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers: List[asyncio.Queue] = []
+
+    def to_dict(self) -> Dict:
+        throughput = None
+        eta = None
+        if self.embedding_started_at is not None and self.chunks_done:
+            elapsed = (self.finished_at or time.time()) - self.embedding_started_at
+            throughput = self.chunks_done / elapsed if elapsed > 0 else None
+            if throughput and self.status == "running":
+                eta = (self.chunks_total - self.chunks_done) / throughput
+
+        return {
+            "job_id": self.id,
+            "repository": self.repository_name,
+            "source": self.source,
+            "path": self.path,
+            "status": self.status,
+            "stage": self.stage,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "chunks_per_second": round(throughput, 2) if throughput else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def update(self, **fields):
+        """
+        Update the job and push the new state to the progress feed subscribers.
+        """
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+        snapshot = self.to_dict()
+        for queue in self.subscribers:
+            # Subscribers only care about the latest state, drop the one they haven't read yet
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+
+    async def updates(self) -> AsyncIterator[Dict]:
+        """
+        Yield the current state of the job, then every update until the job is finished.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.subscribers.append(queue)
+        try:
+            snapshot = self.to_dict()
+            yield snapshot
+            while snapshot["status"] not in TERMINAL_STATUSES:
+                snapshot = await queue.get()
+                yield snapshot
+        finally:
+            self.subscribers.remove(queue)
+
+
+class JobManager:
+    """
+    Runs the ingestion jobs in the background, at most max_concurrent_jobs at a time.
+    """
+
+    def __init__(self, max_concurrent_jobs: int, history: int):
+        self.jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self.history = history
+        self.slots = asyncio.Semaphore(max_concurrent_jobs)
+
+    def submit(
+        self,
+        repository_name: str,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        source: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> IngestionJob:
+        """
+        Submit the ingestion of a repository. A repository is ingested by one job at a time,
+        the unfinished job of the repository is returned instead of starting another one
+        (both would write the same download and the same tenant).
+        """
+        for job in self.jobs.values():
+            if job.repository_name == repository_name and job.status not in TERMINAL_STATUSES:
+                return job
+
+        job = IngestionJob(repository_name, chunk_size, chunk_overlap, source, path)
+        self.jobs[job.id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[IngestionJob]:
+        return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        job = self.jobs.get(job_id)
+        if job is not None and job.status not in TERMINAL_STATUSES:
+            job.task.cancel()
+        return job
+
+    async def shutdown(self):
+        """
+        Cancel the running and queued jobs (at shutdown) and wait for them to stop.
+        """
+        tasks = [job.task for job in self.jobs.values() if job.status not in TERMINAL_STATUSES]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: IngestionJob):
+        def progress(stage: str, chunks_done: int = None, chunks_total: int = None):
+            fields = {"stage": stage}
+            if chunks_total is not None:
+                fields.update(chunks_done=chunks_done, chunks_total=chunks_total)
+                if job.embedding_started_at is None:
+                    fields["embedding_started_at"] = time.time()
+            job.update(**fields)
+
+        try:
+            async with self.slots:
+                job.update(status="running", started_at=time.time())
+                INGESTION_JOBS_RUNNING.inc()
+                try:
+                    result = await embed_repository_to_vector_db(
+                        job.repository_name,
+                        job.chunk_size,
+                        job.chunk_overlap,
+                        progress=progress,
+                        source=job.source,
+                        path=job.path,
+                    )
+                finally:
+                    INGESTION_JOBS_RUNNING.dec()
+            job.update(status="completed", stage=None, result=result, finished_at=time.time())
+        except asyncio.CancelledError:
+            job.update(status="cancelled", stage=None, finished_at=time.time())
+        except Exception as e:
+            logger.exception("Error in ingestion job %s for %s", job.id, job.repository_name)
+            job.update(status="failed", stage=None, error=str(e), finished_at=time.time())
+
+    def _prune(self):
+        # Forget the oldest finished jobs beyond the history size
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in TERMINAL_STATUSES]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+
+job_manager = JobManager(settings.INGESTION_MAX_CONCURRENT_JOBS, settings.INGESTION_JOB_HISTORY)
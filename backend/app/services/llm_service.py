@@ -1,10 +1,38 @@
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List
+from prometheus_client import Counter, Histogram
+from app.core.concurrency import get_limiter
+from app.core.config import settings
 from app.core.db import get_groq_client
+from app.core.singleflight import normalize_query, single_flight
 from langchain.prompts import PromptTemplate
+from app.services.context_service import format_context, pack_context
+from app.services.embedding_service import CACHE_REQUESTS, get_embeddings
+from app.services.semantic_cache import semantic_cache
 from app.services.weaviate_service import similarity_search
 
-# Initialize the Groq client
-llm_client = get_groq_client()
+logger = logging.getLogger(__name__)
 
+# Latency buckets in seconds, up to a long generation
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "LLM latency, until the first token (streaming only) or the complete answer",
+    ["model", "stage"],
+    buckets=LLM_BUCKETS,
+)
+CHAT_LATENCY = Histogram(
+    "chat_response_duration_seconds",
+    "End to end chat answer latency",
+    ["model", "mode", "cached"],
+    buckets=(0.005, 0.025, *LLM_BUCKETS),
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens", "Prompt size in tokens", ["model"], buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens sent to and generated by the LLM", ["model", "direction"])
 
 prompt_template = """You are a helpful Kubeflow Documentation assistant that answers questions based on the provided context.
 
@@ -25,6 +53,57 @@ prompt = PromptTemplate(
 )
 
 
+def build_messages(user_message: str, context) -> List[Dict[str, str]]:
+    """
+    Build the chat messages (system prompt with the packed snippets + user message).
+    """
+    # Format the prompt with the numbered snippets (source and content)
+    formatted_prompt = prompt.format(context=format_context(context))
+
+    return [
+        {
+            "role": "system",
+            "content": formatted_prompt,
+        },
+        {"role": "user", "content": user_message},
+    ]
+
+
+def format_sources(context) -> List[Dict]:
+    """
+    Format the retrieved snippets as citations sent to the client.
+    """
+    return [
+        {
+            "documentURL": snippet.properties.get("documentURL"),
+            "filePath": snippet.properties.get("filePath"),
+            "heading": snippet.properties.get("heading"),
+            "distance": snippet.metadata.distance if snippet.metadata else None,
+            "score": snippet.metadata.score if snippet.metadata else None,
+        }
+        for snippet in context
+    ]
+
+
+def lookup_semantic_cache(query_vector, llm_model: str, temperature: float, max_tokens: int):
+    if semantic_cache is None:
+        return None, None
+    cached, generation = semantic_cache.lookup(query_vector, llm_model, temperature, max_tokens)
+    CACHE_REQUESTS.labels(cache="semantic", result="miss" if cached is None else "hit").inc()
+    return cached, generation
+
+
+def record_usage(llm_model: str, usage):
+    """
+    Count the prompt and completion tokens reported by Groq.
+    """
+    if usage is None:
+        return
+    LLM_PROMPT_TOKENS.labels(model=llm_model).observe(usage.prompt_tokens)
+    LLM_TOKENS.labels(model=llm_model, direction="prompt").inc(usage.prompt_tokens)
+    LLM_TOKENS.labels(model=llm_model, direction="completion").inc(usage.completion_tokens)
+
+
 async def get_response(
         user_message: str,
         llm_model: str = "llama-3.3-70b-versatile",
@@ -32,36 +111,162 @@ async def get_response(
         max_tokens: int = 8192):
     """
     Get a response from the LLM using the provided prompt.
+    Answers to semantically equivalent earlier questions are served from the semantic cache,
+    identical concurrent questions (same normalized text, model and parameters) share one answer.
     """
+    key = ("get_response", normalize_query(user_message), llm_model, temperature, max_tokens)
+    return await single_flight.do(
+        key, "get_response", lambda: generate_response(user_message, llm_model, temperature, max_tokens)
+    )
+
+
+async def generate_response(user_message: str, llm_model: str, temperature: float, max_tokens: int):
+    started_at = time.perf_counter()
+
+    # Embed the user message once, for both the cache lookup and the similarity search
+    query_vector = await get_embeddings(user_message)
+
+    cached, generation = lookup_semantic_cache(query_vector, llm_model, temperature, max_tokens)
+    if cached is not None:
+        CHAT_LATENCY.labels(model=llm_model, mode="complete", cached="true").observe(time.perf_counter() - started_at)
+        return cached["answer"]
+
     # Perform Similarity Search based on the user message
-    context = await similarity_search(user_message, top_k=5)
-
-    # Format the Retrieved Snippets with document title, URL, and the content
-    formatted_snippets = []
-    for snippet in context:
-        formatted_snippets.append(
-            {
-                "Documentation URL": snippet.properties.get("documentURL"),
-                "content": snippet.properties.get("documentContent"),
-            }
+    context = await similarity_search(
+        user_message, top_k=settings.RAG_TOP_K, query_vector=query_vector, mmr=settings.RAG_MMR
+    )
+    # Keep the relevant snippets, without overlaps, within the token budget
+    context = pack_context(context)
+
+    # Create the chat completion
+    async with get_limiter("groq"):
+        with LLM_LATENCY.labels(model=llm_model, stage="completion").time():
+            chat_completion = await get_groq_client().chat.completions.create(
+                messages=build_messages(user_message, context),
+                model=llm_model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=False,
+            )
+    record_usage(llm_model, chat_completion.usage)
+
+    answer = chat_completion.choices[0].message.content
+    if semantic_cache is not None and answer:
+        semantic_cache.store(
+            query_vector, user_message, answer, format_sources(context), llm_model, temperature, max_tokens, generation
         )
+    CHAT_LATENCY.labels(model=llm_model, mode="complete", cached="false").observe(time.perf_counter() - started_at)
+    return answer
 
-    # Format the prompt with real values
-    formatted_prompt = prompt.format(context = str(formatted_snippets))
 
-    # Create the chat completion
-    chat_completion = llm_client.chat.completions.create(
-        messages=[
-            {
-                "role": "system",
-                "content": formatted_prompt,
-            },
-            {"role": "user", "content": user_message},
-        ],
-        model=llm_model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        stream=False,
+async def stream_response(
+        user_message: str,
+        llm_model: str = "llama-3.3-70b-versatile",
+        temperature: float = 0.5,
+        max_tokens: int = 8192) -> AsyncIterator[Dict]:
+    """
+    Stream a response from the LLM as framing events:
+        {"type": "start"}
+        {"type": "sources", "sources": [...]}         once retrieval is done
+        {"type": "token", "content": "..."}          for every generated piece of text
+        {"type": "end", "time_to_first_token_ms": ..., "total_time_ms": ..., "cached": bool}
+
+    Used by both the WebSocket chat and the SSE variant of /llm.
+    A semantic cache hit is sent as a single token event.
+    Identical concurrent questions share one generation, a caller joining late
+    first receives the events already sent to the others.
+    """
+    key = ("stream_response", normalize_query(user_message), llm_model, temperature, max_tokens)
+    events = single_flight.stream(
+        key, "stream_response", lambda: generate_stream(user_message, llm_model, temperature, max_tokens)
     )
+    # Closed right away when the caller stops listening, so the generation can be cancelled
+    async with aclosing(events):
+        async for event in events:
+            yield event
+
+
+async def generate_stream(user_message: str, llm_model: str, temperature: float, max_tokens: int) -> AsyncIterator[Dict]:
+    started_at = time.perf_counter()
+    yield {"type": "start"}
+
+    # Embed the user message once, for both the cache lookup and the similarity search
+    query_vector = await get_embeddings(user_message)
+
+    cached, generation = lookup_semantic_cache(query_vector, llm_model, temperature, max_tokens)
+    if cached is not None:
+        yield {"type": "sources", "sources": cached["sources"]}
+        yield {"type": "token", "content": cached["answer"]}
+        total_time = time.perf_counter() - started_at
+        CHAT_LATENCY.labels(model=llm_model, mode="stream", cached="true").observe(total_time)
+        yield {
+            "type": "end",
+            "time_to_first_token_ms": round(total_time * 1000, 1),
+            "total_time_ms": round(total_time * 1000, 1),
+            "cached": True,
+        }
+        return
 
-    return chat_completion.choices[0].message.content
+    # Perform Similarity Search based on the user message
+    context = await similarity_search(
+        user_message, top_k=settings.RAG_TOP_K, query_vector=query_vector, mmr=settings.RAG_MMR
+    )
+    # Keep the relevant snippets, without overlaps, within the token budget
+    context = pack_context(context)
+    sources = format_sources(context)
+    yield {"type": "sources", "sources": sources}
+
+    time_to_first_token = None
+    answer = []
+    async with get_limiter("groq"):
+        llm_started_at = time.perf_counter()
+        stream = await get_groq_client().chat.completions.create(
+            messages=build_messages(user_message, context),
+            model=llm_model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        # Closing the stream (also when the answer is cancelled) stops the generation on Groq's side
+        async with stream:
+            async for chunk in stream:
+                # Groq reports the token usage on the last chunk
+                if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                    record_usage(llm_model, chunk.x_groq.usage)
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if not token:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = (time.perf_counter() - started_at) * 1000
+                    LLM_LATENCY.labels(model=llm_model, stage="first_token").observe(time.perf_counter() - llm_started_at)
+                answer.append(token)
+                yield {"type": "token", "content": token}
+        LLM_LATENCY.labels(model=llm_model, stage="completion").observe(time.perf_counter() - llm_started_at)
+
+    if semantic_cache is not None and answer:
+        semantic_cache.store(
+            query_vector, user_message, "".join(answer), sources, llm_model, temperature, max_tokens, generation
+        )
+
+    total_time = (time.perf_counter() - started_at) * 1000
+    CHAT_LATENCY.labels(model=llm_model, mode="stream", cached="false").observe(total_time / 1000)
+    logger.debug("Streamed response: time to first token %.0f ms, total %.0f ms", time_to_first_token or 0, total_time)
+    yield {
+        "type": "end",
+        "time_to_first_token_ms": round(time_to_first_token, 1) if time_to_first_token is not None else None,
+        "total_time_ms": round(total_time, 1),
+        "cached": False,
+    }
+
+
+def get_semantic_cache_stats():
+    """
+    Get the hit rate and size of the semantic answer cache.
+
+    :return: The cache statistics, or None if the cache is disabled
+    """
+    if semantic_cache is None:
+        return None
+    return semantic_cache.stats()
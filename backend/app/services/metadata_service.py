@@ -0,0 +1,110 @@
+import bisect
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.services.chunking_service import detect_language, fenced_ranges
+
+# Markdown headings, their text is the first group
+MARKDOWN_HEADING_PATTERN = re.compile(r"^#{1,6}[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+# Title of the front matter of Hugo and Jekyll pages (TOML between +++ or YAML between ---)
+FRONT_MATTER_PATTERN = re.compile(r"\A(\+\+\+|---)[ \t]*\n(.*?)\n\1[ \t]*$", re.DOTALL | re.MULTILINE)
+FRONT_MATTER_TITLE_PATTERN = re.compile(r"^title[ \t]*[=:][ \t]*[\"']?(.*?)[\"']?[ \t]*$", re.MULTILINE)
+
+SECTION_PATTERN = re.compile(settings.METADATA_SECTION_PATTERN)
+VERSION_PATTERN = re.compile(settings.METADATA_VERSION_PATTERN)
+
+
+def blob_url(repository_name: str, file_path: str, ref: str = settings.METADATA_BLOB_REF) -> str:
+    """
+    The GitHub page of a file of the repository.
+    """
+    return f"https://github.com/{repository_name}/blob/{quote(ref)}/{quote(file_path)}"
+
+
+def file_language(file_path: str) -> Optional[str]:
+    """
+    The language of a file: the one of the structure-aware splitting, or its extension.
+    """
+    language = detect_language(file_path)
+    if language is not None:
+        return language
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    return extension or None
+
+
+def doc_section(file_path: str) -> Optional[str]:
+    """
+    The documentation area of a file, the first group of METADATA_SECTION_PATTERN
+    ("content/en/docs/components/pipelines/concepts/dag.md" is in "pipelines").
+    """
+    match = SECTION_PATTERN.search(file_path)
+    return match.group(1) if match else None
+
+
+def doc_version(file_path: str) -> str:
+    """
+    The documentation version of a file: the innermost directory matching METADATA_VERSION_PATTERN
+    ("legacy-v1" is "v1"), METADATA_DEFAULT_VERSION for the current documentation.
+    """
+    for directory in reversed(file_path.split("/")[:-1]):
+        match = VERSION_PATTERN.fullmatch(directory)
+        if match:
+            return match.group(1)
+    return settings.METADATA_DEFAULT_VERSION
+
+
+def file_metadata(repository_name: str, file_path: str) -> Dict[str, str]:
+    """
+    The properties shared by every chunk of a file. Missing values are left out,
+    so they are not stored as empty strings that would match the filters.
+    docVersions is what the version filter matches, the deduplication adds the versions
+    of the duplicates of a chunk to it.
+    """
+    version = doc_version(file_path)
+    metadata = {
+        "documentURL": blob_url(repository_name, file_path),
+        "docSection": doc_section(file_path),
+        "docVersion": version,
+        "docVersions": [version],
+        "language": file_language(file_path),
+    }
+    return {name: value for name, value in metadata.items() if value is not None}
+
+
+def markdown_headings(text: str) -> List[Tuple[int, str]]:
+    """
+    The (character offset, text) of the headings of a Markdown text, outside of its code blocks.
+    The title of the front matter is the heading of the start of the page.
+    """
+    fenced = fenced_ranges(text)
+    fence_starts = [fence_start for fence_start, _ in fenced]
+    headings = []
+    body_start = 0
+    front_matter = FRONT_MATTER_PATTERN.match(text)
+    if front_matter:
+        body_start = front_matter.end()
+        title = FRONT_MATTER_TITLE_PATTERN.search(front_matter.group(2))
+        if title and title.group(1):
+            headings.append((0, title.group(1)))
+    for match in MARKDOWN_HEADING_PATTERN.finditer(text, body_start):
+        fence = bisect.bisect_right(fence_starts, match.start()) - 1
+        if fence >= 0 and match.start() < fenced[fence][1]:
+            continue
+        headings.append((match.start(), match.group(1)))
+    return headings
+
+
+def chunk_heading(headings: List[Tuple[int, str]], start_offset: int, end_offset: int) -> Optional[str]:
+    """
+    The heading of the section a chunk starts in. A chunk before the first heading
+    gets the first heading it contains, if any.
+    """
+    position = bisect.bisect_right(headings, start_offset, key=lambda heading: heading[0])
+    if position > 0:
+        return headings[position - 1][1]
+    if headings and headings[0][0] < end_offset:
+        return headings[0][1]
+    return None
@@ -0,0 +1,98 @@
+import math
+import os
+import re
+from collections import Counter
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+# Files never worth embedding: lockfiles, binaries and media, minified or generated assets,
+# editor and CI metadata. A pattern without "/" matches the file name, otherwise the whole path
+# ("*" also matches "/", so "node_modules/*" matches everything under node_modules).
+DEFAULT_EXCLUDE_PATTERNS = [
+    # Lockfiles
+    "*.lock", "package-lock.json", "npm-shrinkwrap.json", "pnpm-lock.yaml", "go.sum",
+    # Images, fonts, media and archives
+    "*.svg", "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.webp", "*.bmp",
+    "*.ttf", "*.otf", "*.woff", "*.woff2", "*.eot",
+    "*.mp3", "*.mp4", "*.webm", "*.mov", "*.pdf",
+    "*.zip", "*.tar", "*.gz", "*.tgz", "*.jar", "*.whl",
+    # Minified, bundled and generated code
+    "*.min.js", "*.min.css", "*.map", "*.bundle.js", "*.chunk.js",
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "zz_generated*", "*.generated.*",
+    "node_modules/*", "vendor/*", "dist/*",
+    # Site and repository metadata
+    "OWNERS", "OWNERS_ALIASES", "CODEOWNERS", "_redirects", "*.webmanifest", "browserconfig.xml",
+    ".gitignore", ".gitattributes", ".dockerignore",
+]
+
+# Content gitingest writes instead of the content of a binary file
+NON_TEXT_MARKER = "[Non-text file]"
+
+# Undecodable bytes and control characters
+BINARY_CHARACTER_PATTERN = re.compile(r"[\ufffd\x00-\x08\x0b\x0e-\x1f\x7f]")
+
+ENTROPY_MIN_CHARACTERS = 1000  # The character entropy of a shorter text is not meaningful
+
+
+def matches(file_path: str, patterns: List[str]) -> bool:
+    """
+    Whether a file path matches one of the glob patterns. A pattern without "/" is
+    matched against the file name, a pattern with "/" against the whole path.
+    """
+    file_name = os.path.basename(file_path)
+    return any(
+        fnmatchcase(file_path if "/" in pattern else file_name, pattern)
+        for pattern in patterns
+    )
+
+
+def character_entropy(text: str) -> float:
+    """
+    Shannon entropy of the characters of a text, in bits per character.
+    Prose and code stay around 4.5 to 5.5, base64 and other encoded blobs go above 5.9.
+    """
+    counts = Counter(text)
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in counts.values())
+
+
+def get_repository_rules(repository_name: str) -> Dict[str, List[str]]:
+    """
+    The include/exclude patterns of a repository, from PREPROCESSING_REPOSITORY_RULES.
+    """
+    rules = settings.PREPROCESSING_REPOSITORY_RULES.get(repository_name, {})
+    return {"include": rules.get("include", []), "exclude": rules.get("exclude", [])}
+
+
+def filter_reason(file_path: str, content: str, rules: Dict[str, List[str]]) -> Optional[str]:
+    """
+    Why a file of the dump should not be chunked and embedded, None when it should be.
+
+    Path rules come first: the exclude patterns (default, PREPROCESSING_EXCLUDE_PATTERNS and the
+    repository ones), then the include patterns of the repository (when there are some, the other
+    files are dropped). Content heuristics come next, they catch what the paths don't tell:
+    binary-like, minified and encoded contents.
+
+    :param rules: The include/exclude patterns of the repository (see get_repository_rules)
+    :return: "excluded", "not included", "too short", "binary", "minified", "high entropy" or None
+    """
+    if matches(file_path, DEFAULT_EXCLUDE_PATTERNS + settings.PREPROCESSING_EXCLUDE_PATTERNS + rules["exclude"]):
+        return "excluded"
+    if rules["include"] and not matches(file_path, rules["include"]):
+        return "not included"
+
+    if len(content) <= settings.PREPROCESSING_MIN_CHARACTERS:
+        return "too short"
+    if content.startswith(NON_TEXT_MARKER):
+        return "binary"
+    if len(BINARY_CHARACTER_PATTERN.findall(content)) > len(content) * 0.01:
+        return "binary"
+
+    lines = [line for line in content.splitlines() if line.strip()]
+    if lines and sum(len(line) for line in lines) / len(lines) > settings.PREPROCESSING_MAX_LINE_LENGTH:
+        return "minified"
+    if len(content) >= ENTROPY_MIN_CHARACTERS and character_entropy(content) > settings.PREPROCESSING_MAX_ENTROPY:
+        return "high entropy"
+    return None
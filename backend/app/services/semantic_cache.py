@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by the meaning of the question rather than its exact text.
+
+    Question embeddings are kept L2-normalized in a preallocated float32 matrix, next to the id
+    of the model, temperature and max_tokens of each entry. A lookup masks the live entries of
+    the same parameters and makes a single matrix-vector product with their rows. An answer is
+    reused when the cosine similarity is above the threshold and the entry has not expired.
+
+    Every invalidation starts a new generation: an answer generated from the documentation of
+    an older generation (read before the invalidation) is not stored.
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: float, max_entries: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._vectors: Optional[np.ndarray] = None  # Allocated on first store, once the dimension is known
+        self._created_at = np.full(max_entries, -np.inf)
+        self._parameter_ids = np.full(max_entries, -1, dtype=np.int32)
+        self._parameter_id_by_key: Dict[Tuple[str, float, int], int] = {}
+        self._entries: List[Optional[Dict]] = [None] * max_entries
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector, llm_model: str, temperature: float, max_tokens: int) -> Tuple[Optional[Dict], int]:
+        """
+        Find a cached answer for a question embedding.
+
+        :param vector: The embedding of the question
+        :param llm_model: The model the answer must have been generated with
+        :param temperature: The temperature the answer must have been generated with
+        :param max_tokens: The max_tokens the answer must have been generated with
+        :return: The cached entry (query, answer, sources, similarity) or None, and the current
+                 generation, to pass to store
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            parameter_id = self._parameter_id_by_key.get((llm_model, temperature, max_tokens))
+            if self._vectors is None or parameter_id is None:
+                self.misses += 1
+                return None, self.generation
+
+            # Only the live entries answered with the same parameters are compared
+            candidates = np.flatnonzero(
+                (self._parameter_ids == parameter_id) & (self._created_at > time.time() - self.ttl_seconds)
+            )
+            if candidates.size == 0:
+                self.misses += 1
+                return None, self.generation
+            similarities = self._vectors[candidates] @ query
+
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None, self.generation
+
+            self.hits += 1
+            entry = self._entries[candidates[best]]
+            return {**entry, "similarity": float(similarities[best])}, self.generation
+
+    def store(
+        self,
+        vector,
+        query: str,
+        answer: str,
+        sources: List[Dict],
+        llm_model: str,
+        temperature: float,
+        max_tokens: int,
+        generation: int,
+    ):
+        """
+        Store an answer, replacing the oldest (or an expired) entry when the cache is full.
+
+        :param generation: The generation returned by the lookup made before answering,
+                           the answer is dropped when the cache was invalidated since
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            normalized = self._normalize(vector)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, normalized.shape[0]), dtype=np.float32)
+
+            parameters = (llm_model, temperature, max_tokens)
+            parameter_id = self._parameter_id_by_key.setdefault(parameters, len(self._parameter_id_by_key))
+
+            slot = int(np.argmin(self._created_at))
+            self._vectors[slot] = normalized
+            self._created_at[slot] = time.time()
+            self._parameter_ids[slot] = parameter_id
+            self._entries[slot] = {
+                "query": query,
+                "answer": answer,
+                "sources": sources,
+                "llm_model": llm_model,
+                "parameters": parameters,
+            }
+
+    def invalidate(self):
+        """
+        Drop every entry, called whenever the documentation collection changes.
+        """
+        with self._lock:
+            self._created_at[:] = -np.inf
+            self._parameter_ids[:] = -1
+            self._parameter_id_by_key.clear()
+            self._entries = [None] * self.max_entries
+            self.invalidations += 1
+            self.generation += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": int(np.sum(self._created_at > time.time() - self.ttl_seconds)),
+                "invalidations": self.invalidations,
+                "threshold": self.threshold,
+            }
+
+
+semantic_cache = (
+    SemanticCache(
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    )
+    if settings.SEMANTIC_CACHE_ENABLED
+    else None
+)
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import os
+import re
+import stat
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.services.preprocessing_service import NON_TEXT_MARKER
+
+# Where the repository contents come from:
+# - gitingest: a dump downloaded from gitingest.com (the default)
+# - dump: a gitingest dump already on disk
+# - directory: a local directory or git checkout
+# - tarball: a .tar.gz archive, local or downloaded from a URL
+SOURCES = ("gitingest", "dump", "directory", "tarball")
+
+logger = logging.getLogger(__name__)
+
+# GitHub repository names, "<owner>/<repo>": they are path components of the local sources
+REPOSITORY_NAME_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9-]*/[A-Za-z0-9_.-]+")
+
+READ_WINDOW_FILES = 64  # Files read ahead of the pipeline from a directory
+BINARY_SNIFF_BYTES = 8000  # A NUL byte in the first bytes of a file marks it as binary, like git does
+
+
+def is_url(path: str) -> bool:
+    return path.startswith(("http://", "https://"))
+
+
+def check_tarball_url(url: str) -> None:
+    """
+    Tarballs are only downloaded over https from INGESTION_TARBALL_HOSTS, so the API
+    can't make the server request internal addresses.
+
+    :raises ValueError: When the URL is not allowed
+    """
+    parts = urlsplit(url)
+    hosts = {host.lower() for host in settings.INGESTION_TARBALL_HOSTS}
+    if parts.scheme != "https" or (parts.hostname or "").lower() not in hosts or parts.port not in (None, 443):
+        raise ValueError(f"Tarballs can only be downloaded over https from {', '.join(settings.INGESTION_TARBALL_HOSTS)}")
+
+
+async def check_tarball_request(request: httpx.Request) -> None:
+    """
+    Request event hook of the tarball downloads, the redirects are checked like the first URL.
+    """
+    check_tarball_url(str(request.url))
+
+
+def validate_repository_name(repository_name: str) -> None:
+    """
+    Check a repository name requested through the API: "<owner>/<repo>" like on GitHub.
+
+    :raises ValueError: When the name is not a repository name
+    """
+    if not REPOSITORY_NAME_PATTERN.fullmatch(repository_name) or repository_name.split("/")[1] in (".", ".."):
+        raise ValueError(f"Invalid repository name {repository_name!r}, expected <owner>/<repo>")
+
+
+def repository_path(root: str, repository_name: str, *names: str) -> str:
+    """
+    The path of a file or directory of a repository under a root directory
+    (parsed_repositories/<owner>/<repo>/code.txt for example).
+
+    :raises ValueError: When the repository name is not valid or the path is not under the root
+    """
+    validate_repository_name(repository_name)
+    real_root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(real_root, repository_name, *names))
+    if os.path.commonpath([path, real_root]) != real_root:
+        raise ValueError(f"The files of {repository_name} must be under {root}")
+    return path
+
+
+def default_source_path(repository_name: str, source: str) -> Optional[str]:
+    """
+    Where a source is expected when no path is given: the dumps gitingest downloads,
+    the checkouts under repositories/ and the GitHub tarball of the default branch.
+    """
+    if source == "dump":
+        return repository_path("parsed_repositories", repository_name, "code.txt")
+    if source == "directory":
+        return repository_path("repositories", repository_name)
+    if source == "tarball":
+        validate_repository_name(repository_name)
+        return f"https://codeload.github.com/{repository_name}/tar.gz/HEAD"
+    return None
+
+
+def validate_source(
+    repository_name: str, source: Optional[str] = None, path: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
+    """
+    Check a source requested through the API, and its repository name (see validate_repository_name).
+    Local paths must exist and be under one of
+    INGESTION_LOCAL_ROOTS, so the API can't read any file of the server, and tarball URLs
+    must be on INGESTION_TARBALL_HOSTS (see check_tarball_url).
+
+    :return: The source and its path (None for gitingest), with the defaults filled in
+    :raises ValueError: When the source or its path is not valid
+    """
+    validate_repository_name(repository_name)
+    source = source or settings.INGESTION_DEFAULT_SOURCE
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source {source}, expected one of {', '.join(SOURCES)}")
+    if source == "gitingest":
+        if path is not None:
+            raise ValueError("The gitingest source doesn't take a path")
+        return source, None
+
+    path = path or default_source_path(repository_name, source)
+    if is_url(path):
+        if source != "tarball":
+            raise ValueError(f"Only the tarball source can be downloaded, {source} needs a local path")
+        check_tarball_url(path)
+        return source, path
+
+    real_path = os.path.realpath(path)
+    roots = [os.path.realpath(root) for root in settings.INGESTION_LOCAL_ROOTS]
+    if not any(os.path.commonpath([real_path, root]) == root for root in roots):
+        raise ValueError(f"{path} is not under one of the local roots ({', '.join(settings.INGESTION_LOCAL_ROOTS)})")
+    exists = os.path.isdir(real_path) if source == "directory" else os.path.isfile(real_path)
+    if not exists:
+        raise ValueError(f"No {source} found at {path}")
+    return source, real_path
+
+
+def decode_file(data: bytes) -> str:
+    """
+    The text of a file as gitingest writes it, the marker of gitingest for binary files.
+    """
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return NON_TEXT_MARKER
+    return data.decode("utf-8", errors="replace").strip()
+
+
+async def list_directory_files(directory: str) -> List[str]:
+    """
+    The files of a directory, relative to it. In a git checkout, only the tracked files
+    (so .gitignore is respected), otherwise every file outside of the .git directories.
+    """
+    if os.path.isdir(os.path.join(directory, ".git")):
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "git", "-C", directory, "ls-files", "-z",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            output, error = await process.communicate()
+            if process.returncode != 0:
+                raise OSError(f"git ls-files exited with {process.returncode}: {error.decode(errors='replace').strip()}")
+            return sorted(name for name in output.decode("utf-8", errors="replace").split("\0") if name)
+        except OSError as e:
+            logger.warning("Listing the files of %s with git failed, walking the directory: %s", directory, e)
+
+    return await asyncio.to_thread(walk_directory_files, directory)
+
+
+def walk_directory_files(directory: str) -> List[str]:
+    """
+    Every file of a directory outside of the .git directories, relative to it.
+    """
+    files = []
+    for root, directories, filenames in os.walk(directory):
+        directories[:] = sorted(name for name in directories if name != ".git")
+        for filename in sorted(filenames):
+            files.append(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, "/"))
+    return files
+
+
+def read_file(path: str, root: str) -> Optional[bytes]:
+    """
+    The bytes of a file, None when it's not a regular file or is over INGESTION_MAX_FILE_KB.
+    Symlinks are not followed and files resolving outside of the root are skipped,
+    so a checkout can't make the ingestion read other files of the server.
+
+    :param root: The real path of the directory being read
+    """
+    try:
+        status = os.lstat(path)
+        if not stat.S_ISREG(status.st_mode) or status.st_size > settings.INGESTION_MAX_FILE_KB * 1024:
+            return None
+        # A parent directory can still be a symlink
+        if os.path.commonpath([os.path.realpath(path), root]) != root:
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError as e:
+        logger.warning("Error reading %s: %s", path, e)
+        return None
+
+
+def iter_directory_files(directory: str, files: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Lazily read the files of a local directory or git checkout.
+
+    The files are read by a thread pool, READ_WINDOW_FILES ahead of the consumer,
+    and yielded in path order. Waiting for the reads blocks, iterate from a worker thread.
+
+    :param files: The files to read, relative to the directory (see list_directory_files)
+
+    Yields:
+        Tuple[str, str]: (filename relative to the directory, content) for each file.
+    """
+    root = os.path.realpath(directory)
+    file_count = 0
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=settings.INGESTION_READ_WORKERS) as pool:
+        pending = deque()
+        for position, filename in enumerate(files):
+            pending.append((filename, pool.submit(read_file, os.path.join(directory, filename), root)))
+            # The oldest read is consumed once the window is full, then the last ones at the end
+            while pending and (len(pending) >= READ_WINDOW_FILES or position == len(files) - 1):
+                read_filename, future = pending.popleft()
+                data = future.result()
+                if data is None:
+                    skipped += 1
+                    continue
+                file_count += 1
+                yield read_filename, decode_file(data)
+
+    logger.info("Read %d files from %s (%d skipped)", file_count, directory, skipped)
+
+
+def iter_tarball_files(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Lazily read the files of a (compressed) tar archive, as a stream: members are read in
+    order and never extracted to disk. The top directory of GitHub tarballs
+    (owner-repository-commit/) is removed from the file names, .git directories are skipped.
+
+    Yields:
+        Tuple[str, str]: (filename, content) for each file of the archive.
+    """
+    file_count = 0
+    skipped = 0
+    with tarfile.open(path, mode="r|*") as archive:
+        root = None
+        for index, member in enumerate(archive):
+            name = member.name
+            if index == 0 and member.isdir() and "/" not in name.strip("/"):
+                root = name.strip("/") + "/"
+                continue
+            # Archives of a checkout can contain its .git directory
+            if not member.isfile() or ".git" in name.split("/")[:-1]:
+                continue
+            if member.size > settings.INGESTION_MAX_FILE_KB * 1024:
+                skipped += 1
+                continue
+
+            if root is not None and name.startswith(root):
+                name = name[len(root):]
+            file_count += 1
+            yield name, decode_file(archive.extractfile(member).read())
+
+    logger.info("Read %d files from %s (%d skipped)", file_count, path, skipped)
@@ -0,0 +1,70 @@
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.vector_store.base import (
+    TENANT_STATUSES,
+    Condition,
+    NewObject,
+    ObjectMetadata,
+    StoredObject,
+    VectorStore,
+)
+from app.services.vector_store.index_profiles import INDEX_PROFILES, IndexProfile, estimate_index_memory, get_index_profile
+
+# One store per collection and tenant, created on first use
+vector_stores: Dict[Tuple[str, Optional[str]], VectorStore] = {}
+
+
+def get_vector_store(collection_name: str, tenant: Optional[str] = None) -> VectorStore:
+    """
+    Get the vector store of a collection, or of one of its tenants,
+    using the backend selected by VECTOR_STORE_BACKEND.
+    """
+    key = (collection_name, tenant)
+    if key not in vector_stores:
+        if settings.VECTOR_STORE_BACKEND == "weaviate":
+            from app.services.vector_store.weaviate_store import WeaviateVectorStore
+
+            vector_stores[key] = WeaviateVectorStore(collection_name, tenant)
+        elif settings.VECTOR_STORE_BACKEND == "numpy":
+            from app.services.vector_store.numpy_store import NumpyVectorStore
+
+            vector_stores[key] = NumpyVectorStore(collection_name, settings.NUMPY_STORE_PATH, tenant)
+        else:
+            raise ValueError(f"Unknown vector store backend: {settings.VECTOR_STORE_BACKEND}")
+    return vector_stores[key]
+
+
+async def release_vector_store(collection_name: str, tenant: Optional[str] = None):
+    """
+    Close and forget the store of a collection or tenant (deleted, deactivated or offloaded),
+    it is created again on the next use.
+    """
+    vector_store = vector_stores.pop((collection_name, tenant), None)
+    if vector_store is not None:
+        await vector_store.close()
+
+
+async def close_vector_stores():
+    """
+    Close the vector stores of every collection (at shutdown).
+    """
+    for vector_store in list(vector_stores.values()):
+        await vector_store.close()
+    vector_stores.clear()
+
+
+__all__ = [
+    "Condition",
+    "INDEX_PROFILES",
+    "IndexProfile",
+    "NewObject",
+    "ObjectMetadata",
+    "StoredObject",
+    "TENANT_STATUSES",
+    "VectorStore",
+    "close_vector_stores",
+    "estimate_index_memory",
+    "get_index_profile",
+    "get_vector_store",
+    "release_vector_store",
+]
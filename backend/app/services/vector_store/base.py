@@ -0,0 +1,237 @@
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from app.services.vector_store.index_profiles import INDEX_PROFILES, IndexProfile
+
+# A filter condition: (property, operator, value), the conditions of a list are combined with AND.
+# Operators: "equal", "not_equal", "contains_any" (value is a list, the property must be one of them,
+# or share one of them for a list property) and "like" (value is a pattern where * matches any
+# characters and ? a single one)
+Condition = Tuple[str, str, Any]
+
+FILTER_OPERATORS = ("equal", "not_equal", "contains_any", "like")
+
+
+def like(value: Any, pattern: str) -> bool:
+    """
+    Whether a text matches a pattern of the "like" operator, as Weaviate evaluates it.
+    """
+    return isinstance(value, str) and re.fullmatch(
+        ".*".join(".".join(map(re.escape, part.split("?"))) for part in pattern.split("*")), value, re.DOTALL
+    ) is not None
+
+
+def contains_any(value: Any, accepted: set) -> bool:
+    """
+    Whether a property is one of the accepted values, or has one of them for a list property.
+    """
+    if isinstance(value, list):
+        return any(item in accepted for item in value)
+    return value in accepted
+
+
+def matches(properties: Dict[str, Any], filters: Optional[List[Condition]]) -> bool:
+    """
+    Evaluate the filter conditions on the properties of an object.
+    """
+    for name, operator, value in filters or []:
+        if operator == "equal":
+            accepted = properties.get(name) == value
+        elif operator == "not_equal":
+            accepted = properties.get(name) != value
+        elif operator == "contains_any":
+            accepted = contains_any(properties.get(name), set(value))
+        elif operator == "like":
+            accepted = like(properties.get(name), value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if not accepted:
+            return False
+    return True
+
+
+@dataclass
+class ObjectMetadata:
+    distance: Optional[float] = None  # Cosine distance to the query vector, for vector searches
+    score: Optional[float] = None  # Fused score of hybrid searches, higher is better
+
+
+@dataclass
+class StoredObject:
+    """
+    An object of the collection, as returned by every vector store.
+    """
+
+    uuid: str
+    properties: Dict[str, Any]
+    vector: Optional[List[float]] = None
+    metadata: ObjectMetadata = field(default_factory=ObjectMetadata)
+
+
+@dataclass
+class NewObject:
+    """
+    An object to insert, an existing object with the same UUID is replaced.
+    """
+
+    properties: Dict[str, Any]
+    vector: Sequence[float]
+    uuid: Optional[str] = None
+
+
+# Activity status of a tenant: only the active ones are loaded and searchable,
+# inactive tenants are kept on local disk and offloaded ones on cold storage
+TENANT_STATUSES = ("active", "inactive", "offloaded")
+
+
+class VectorStore(ABC):
+    """
+    Storage and vector search of the documentation chunks of one collection.
+
+    In a multi-tenant collection, every tenant is a separate partition with its own vector
+    index: the data methods run on the tenant of the store, the collection and tenant
+    management methods on the store without tenant.
+    """
+
+    def __init__(self, collection_name: str, tenant: Optional[str] = None):
+        self.collection_name = collection_name
+        self.tenant = tenant
+
+    @abstractmethod
+    async def collection_exists(self) -> bool:
+        ...
+
+    @abstractmethod
+    async def create_collection(
+        self, profile: IndexProfile = INDEX_PROFILES["default"], multi_tenancy: bool = False
+    ) -> bool:
+        """
+        Create the collection if it doesn't exist, with the vector index settings of the profile.
+
+        :param multi_tenancy: Whether the objects are stored in tenants, only applies to a new collection
+        :return: True if the collection was created, False if it already existed
+        """
+
+    @abstractmethod
+    async def multi_tenancy_enabled(self) -> bool:
+        ...
+
+    @abstractmethod
+    async def list_tenants(self) -> Dict[str, str]:
+        """
+        The tenants of the collection.
+
+        :return: Dict of {tenant: status}, see TENANT_STATUSES
+        """
+
+    @abstractmethod
+    async def create_tenants(self, tenants: List[str]):
+        """
+        Create the tenants that don't exist yet, active.
+        """
+
+    @abstractmethod
+    async def delete_tenants(self, tenants: List[str]):
+        """
+        Delete tenants with all their objects.
+        """
+
+    @abstractmethod
+    async def set_tenant_status(self, tenant: str, status: str):
+        """
+        Activate, deactivate or offload a tenant (see TENANT_STATUSES).
+        """
+
+    @abstractmethod
+    async def insert_many(self, objects: List[NewObject]) -> Tuple[List[Optional[str]], Dict[int, str]]:
+        """
+        Insert (or replace) objects.
+
+        :return: The UUIDs aligned with objects (None where it failed) and a dict of {index: error}
+        """
+
+    async def insert(self, new_object: NewObject) -> str:
+        uuids, errors = await self.insert_many([new_object])
+        if errors:
+            raise ValueError(errors[0])
+        return uuids[0]
+
+    @abstractmethod
+    async def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+        properties: Optional[List[str]] = None,
+    ) -> Tuple[List[StoredObject], Optional[str]]:
+        """
+        A page of the objects matching the filters, in UUID order.
+
+        :param after: Cursor of the page, returned with the previous page: the UUID of its last object,
+                      or an offset for the filtered pages of Weaviate (its cursor can't be filtered)
+        :param limit: The maximum number of objects of the page
+        :param include_vector: Whether the vectors are returned
+        :param properties: The properties to return, all of them when None
+        :return: The objects and the cursor of the next page (None on the last page)
+        """
+
+    @abstractmethod
+    def iterate(self, properties: Optional[List[str]] = None) -> AsyncIterator[StoredObject]:
+        """
+        Walk through every object of the collection, returning only the given properties.
+        """
+
+    @abstractmethod
+    async def delete_by_id(self, uuid: str):
+        ...
+
+    @abstractmethod
+    async def delete_many(self, filters: List[Condition]) -> int:
+        """
+        Delete the objects matching the filters.
+
+        :return: The number of deleted objects
+        """
+
+    @abstractmethod
+    async def near_vector(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+    ) -> List[StoredObject]:
+        """
+        The top_k objects closest to the vector (cosine distance), closest first.
+
+        :param include_vector: Whether the vectors are returned (for a re-ranking by MMR)
+        """
+
+    @abstractmethod
+    async def hybrid(
+        self,
+        query: str,
+        vector: Sequence[float],
+        top_k: int,
+        alpha: float = 0.5,
+        fusion: str = "rrf",
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+    ) -> List[StoredObject]:
+        """
+        The top_k objects of a BM25 search on documentContent and a vector search, fused in one ranking.
+
+        :param alpha: Weight of the vector search, 0 is pure keyword search and 1 pure vector search
+        :param fusion: "rrf" (reciprocal rank fusion) or "relative_score" (normalized scores)
+        :param include_vector: Whether the vectors are returned
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    async def close(self):
+        pass
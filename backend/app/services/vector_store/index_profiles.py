@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+INDEX_TYPES = ("hnsw", "flat")
+QUANTIZATIONS = ("pq", "bq")
+FILTER_STRATEGIES = ("sweeping", "acorn")
+
+HNSW_DEFAULT_MAX_CONNECTIONS = 32  # Weaviate default
+PQ_CENTROIDS = 256
+
+
+@dataclass(frozen=True)
+class IndexProfile:
+    """
+    Vector index settings of a collection, picked by name when the collection is created.
+    They only apply to Weaviate, the NumPy store always runs an exact search.
+    """
+
+    description: str
+    index_type: str = "hnsw"  # "hnsw" or "flat" (brute force, for small collections)
+    ef: Optional[int] = None  # Search candidate list size of HNSW, None keeps Weaviate's dynamic ef
+    ef_construction: Optional[int] = None  # Candidate list size while building the HNSW graph
+    max_connections: Optional[int] = None  # Edges per HNSW node, fewer edges use less memory but lower the recall
+    quantization: Optional[str] = None  # None, "pq" (product quantization) or "bq" (binary quantization)
+    pq_segments: Optional[int] = None  # Segments per vector, a 1536 dims vector is stored in pq_segments bytes
+    pq_training_limit: Optional[int] = None  # Objects stored before the PQ codebook is trained and applied
+    # Filtered HNSW searches: None keeps Weaviate's default, "acorn" (Weaviate 1.27+) only walks the nodes
+    # matching the filter, "sweeping" walks the whole graph and drops the others, slower on selective filters
+    filter_strategy: Optional[str] = None
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {self.index_type}")
+        if self.quantization is not None and self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {self.quantization}")
+        if self.filter_strategy is not None and self.filter_strategy not in FILTER_STRATEGIES:
+            raise ValueError(f"Unknown filter strategy: {self.filter_strategy}")
+        if self.index_type == "flat" and self.quantization == "pq":
+            raise ValueError("The flat index only supports binary quantization")
+
+
+INDEX_PROFILES: Dict[str, IndexProfile] = {
+    "default": IndexProfile(
+        description="HNSW with Weaviate's default parameters, uncompressed vectors",
+    ),
+    "hnsw-high-recall": IndexProfile(
+        description="Wider HNSW graph and search, for the best recall at a higher memory and latency cost",
+        ef=256,
+        ef_construction=256,
+        max_connections=64,
+    ),
+    "hnsw-compact": IndexProfile(
+        description="Narrower HNSW graph, less memory and faster queries for a lower recall",
+        ef=64,
+        ef_construction=64,
+        max_connections=16,
+    ),
+    "hnsw-acorn": IndexProfile(
+        description="HNSW with Weaviate's default parameters and ACORN filtered search (Weaviate 1.27+), "
+        "faster searches scoped by selective filters",
+        filter_strategy="acorn",
+    ),
+    "hnsw-pq": IndexProfile(
+        description="HNSW with product quantized vectors (4 dimensions per byte), about 16x less vector memory",
+        quantization="pq",
+        pq_segments=384,
+        pq_training_limit=10000,
+    ),
+    "hnsw-bq": IndexProfile(
+        description="HNSW with binary quantized vectors (1 bit per dimension), 32x less vector memory",
+        quantization="bq",
+    ),
+    "flat": IndexProfile(
+        description="Brute force search without any graph, exact results for small collections",
+        index_type="flat",
+    ),
+    "flat-bq": IndexProfile(
+        description="Brute force search over binary quantized vectors, for small collections on a tight memory budget",
+        index_type="flat",
+        quantization="bq",
+    ),
+}
+
+
+def get_index_profile(name: str) -> IndexProfile:
+    if name not in INDEX_PROFILES:
+        raise ValueError(f"Unknown index profile '{name}', available profiles: {', '.join(INDEX_PROFILES)}")
+    return INDEX_PROFILES[name]
+
+
+def estimate_index_memory(profile: IndexProfile, count: int, dimensions: int) -> int:
+    """
+    Rough in-memory size of the index in bytes: the cached (possibly compressed) vectors
+    and the HNSW graph, whose bottom layer has 2 x maxConnections 8-byte links per node.
+    The flat index reads its vectors from disk, only caching them once binary quantized.
+    """
+    if profile.index_type == "flat":
+        return count * dimensions // 8 if profile.quantization == "bq" else 0
+    if profile.quantization == "pq":
+        segments = profile.pq_segments or dimensions // 4
+        vectors = count * segments + PQ_CENTROIDS * dimensions * 4  # Codes and codebook
+    elif profile.quantization == "bq":
+        vectors = count * dimensions // 8
+    else:
+        vectors = count * dimensions * 4
+    graph = count * 2 * (profile.max_connections or HNSW_DEFAULT_MAX_CONNECTIONS) * 8
+    return vectors + graph
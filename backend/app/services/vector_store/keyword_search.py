@@ -0,0 +1,95 @@
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+# Same as Weaviate's "word" tokenization: lowercased runs of letters and digits,
+# so kfp.dsl.component is searched as kfp, dsl and component
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+RRF_K = 60  # Rank offset of the reciprocal rank fusion, same constant as Weaviate's ranked fusion
+
+FUSION_METHODS = ("rrf", "relative_score")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over a list of documents, scored with NumPy.
+    k1 and b are the Weaviate defaults.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.size = len(documents)
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for row, document in enumerate(documents):
+            terms = tokenize(document or "")
+            lengths[row] = len(terms)
+            for term, frequency in Counter(terms).items():
+                rows, frequencies = postings.setdefault(term, ([], []))
+                rows.append(row)
+                frequencies.append(frequency)
+
+        # {term: (rows containing the term, term frequency in each row)}
+        self.postings = {
+            term: (np.array(rows, dtype=np.int64), np.array(frequencies, dtype=np.float32))
+            for term, (rows, frequencies) in postings.items()
+        }
+        average_length = float(lengths.mean()) if self.size else 0.0
+        self.length_norms = k1 * (1 - b + b * lengths / max(average_length, 1e-9))
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        BM25 score of every document for the query, 0 for the documents without any query term.
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            rows, frequencies = self.postings[term]
+            idf = np.log(1 + (self.size - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + self.length_norms[rows])
+        return scores
+
+
+def fuse_results(
+    vector_results: List[Tuple[Hashable, float]],
+    keyword_results: List[Tuple[Hashable, float]],
+    alpha: float,
+    fusion: str = "rrf",
+) -> List[Tuple[Hashable, float]]:
+    """
+    Merge a vector and a keyword result list in a single ranking.
+
+    :param vector_results: (key, score) pairs of the vector search, best first (higher score is better)
+    :param keyword_results: (key, score) pairs of the keyword search, best first
+    :param alpha: Weight of the vector results, 0 is pure keyword search and 1 pure vector search
+    :param fusion: "rrf" sums alpha / (RRF_K + rank) over both lists, "relative_score" sums the
+                   scores min-max normalized within each list, weighted by alpha
+    :return: (key, fused score) pairs, best first
+    """
+    if fusion not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {fusion}")
+
+    fused: Dict[Hashable, float] = {}
+    for results, weight in ((vector_results, alpha), (keyword_results, 1 - alpha)):
+        if not results:
+            continue
+        if fusion == "rrf":
+            for rank, (key, _) in enumerate(results):
+                fused[key] = fused.get(key, 0.0) + weight / (RRF_K + rank)
+        else:
+            scores = [score for _, score in results]
+            low, high = min(scores), max(scores)
+            for key, score in results:
+                normalized = (score - low) / (high - low) if high > low else 1.0
+                fused[key] = fused.get(key, 0.0) + weight * normalized
+
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,51 @@
+from typing import List, Sequence
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]],
+    top_k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    Select a relevant but diverse subset of candidates, by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+        lambda_mult * sim(query, candidate) - (1 - lambda_mult) * max sim(candidate, selected)
+    with the cosine similarity. The candidate similarities are computed once as a matrix,
+    and the similarity to the selected candidates is updated with one row per step.
+
+    :param query_vector: The query embedding
+    :param candidate_vectors: The embeddings of the candidates
+    :param top_k: The number of candidates to select
+    :param lambda_mult: 1 ranks by relevance only, 0 by diversity only
+    :return: The indexes of the selected candidates, in selection order
+    """
+    if len(candidate_vectors) == 0 or top_k <= 0:
+        return []
+
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    query = np.asarray(query_vector, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = vectors @ query
+    similarities = vectors @ vectors.T
+
+    selected: List[int] = []
+    # Highest similarity of each candidate to the selected ones, nothing is selected yet
+    redundancy = np.full(len(vectors), -np.inf, dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+    for _ in range(min(top_k, len(vectors))):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarities[best])
+    return selected
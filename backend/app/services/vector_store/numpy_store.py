@@ -0,0 +1,479 @@
+import asyncio
+import bisect
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from app.services.vector_store.base import (
+    TENANT_STATUSES,
+    Condition,
+    NewObject,
+    ObjectMetadata,
+    StoredObject,
+    VectorStore,
+    contains_any,
+    like,
+)
+from app.services.vector_store.index_profiles import INDEX_PROFILES, IndexProfile
+from app.services.vector_store.keyword_search import BM25Index, fuse_results
+
+INITIAL_CAPACITY = 1024
+HYBRID_CANDIDATES = 100  # Results of each search handed to the fusion of a hybrid search
+LOG_COMPACTION_RECORDS = 10_000  # The log is folded into objects.json past this many records and the object count
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Embedded vector store: the vectors are kept in a float32 matrix memory-mapped from
+    a .npy file, and searched with a vectorized exact cosine similarity.
+
+    Meant for small deployments, tests and offline benchmarks, everything runs in-process.
+    Files, in <path>/<collection name>/ (<path>/<collection name>/<tenant>/ for a tenant):
+        vectors.npy   (capacity x dimension) float32 matrix, only the first `size` rows are used
+        objects.json  UUIDs and properties, aligned with the matrix rows, and the name of the current log
+        objects-N.log Changes since objects.json was written, one JSON line per inserted or deleted object:
+                      appended by every batch, replayed on load and folded into objects.json once
+                      it outgrows it, so a batch only writes its own objects
+        tenants.json  {tenant: status} of a multi-tenant collection, which has no objects of its own
+
+    Every tenant has its own matrix, only the active ones can be loaded. There is no cold
+    storage here, offloaded tenants stay on disk like the inactive ones.
+    """
+
+    def __init__(self, collection_name: str, path: str, tenant: Optional[str] = None):
+        super().__init__(collection_name, tenant)
+        self.collection_directory = os.path.join(path, collection_name)
+        self.tenants_path = os.path.join(self.collection_directory, "tenants.json")
+        self.directory = self.collection_directory
+        if tenant is not None:
+            self.directory = os.path.join(self.collection_directory, tenant)
+        self.vectors_path = os.path.join(self.directory, "vectors.npy")
+        self.objects_path = os.path.join(self.directory, "objects.json")
+        self.log_name: Optional[str] = None  # No log until the first change
+        self.log_records = 0
+        self.write_lock = asyncio.Lock()  # Keeps the log in the order of the changes
+
+        if tenant is not None and self.read_tenants().get(tenant) != "active":
+            raise ValueError(f"Tenant '{tenant}' of '{collection_name}' doesn't exist or is not active")
+
+        self.vectors: Optional[np.ndarray] = None
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.uuids: List[str] = []
+        self.properties: List[Dict] = []
+        self.rows: Dict[str, int] = {}  # {uuid: row}
+        self.columns: Dict[str, np.ndarray] = {}  # Property values as arrays, for the filters
+        self.keyword_index: Optional[BM25Index] = None  # Built on the first hybrid search after a change
+        self.uuid_order: Optional[np.ndarray] = None  # Rows sorted by UUID, for the pagination
+
+        if os.path.exists(self.objects_path):
+            self.load()
+
+    @property
+    def size(self) -> int:
+        return len(self.uuids)
+
+    # Persistence
+
+    def load(self):
+        with open(self.objects_path, "r", encoding="utf-8") as file:
+            snapshot = json.load(file)
+        if isinstance(snapshot, list):
+            # Written without a log (a new tenant)
+            snapshot = {"log": None, "objects": snapshot}
+        self.uuids = [item["uuid"] for item in snapshot["objects"]]
+        self.properties = [item["properties"] for item in snapshot["objects"]]
+        self.rows = {uuid: row for row, uuid in enumerate(self.uuids)}
+
+        self.log_name = snapshot["log"]
+        log_path = os.path.join(self.directory, self.log_name) if self.log_name else None
+        if log_path and os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break  # Cut by a crash while it was written
+                    record = json.loads(line)
+                    if "properties" in record:
+                        self.place_object(record["uuid"], record["properties"])
+                    else:
+                        self.remove_object(self.rows[record["uuid"]])
+                    self.log_records += 1
+
+        # The matrix already has the rows of the replayed changes
+        if os.path.exists(self.vectors_path):
+            self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+            self.norms = np.zeros(self.vectors.shape[0], dtype=np.float32)
+            self.norms[: self.size] = np.linalg.norm(self.vectors[: self.size], axis=1)
+
+    async def persist(self, records: List[Dict]):
+        """
+        Save the changes of a batch, in a worker thread: its records are appended to the log,
+        or objects.json is written again (with a new, empty log) once the log outgrows it.
+        """
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        snapshot = None
+        self.log_records += len(records)
+        if self.log_name is None or self.log_records > max(LOG_COMPACTION_RECORDS, self.size):
+            snapshot = [{"uuid": uuid, "properties": properties} for uuid, properties in zip(self.uuids, self.properties)]
+            self.log_records = 0
+        async with self.write_lock:
+            await asyncio.to_thread(self.write_changes, lines, snapshot)
+
+    def write_changes(self, lines: str, snapshot: Optional[List[Dict]]):
+        if self.vectors is not None:
+            self.vectors.flush()
+        if snapshot is None:
+            with open(os.path.join(self.directory, self.log_name), "a", encoding="utf-8") as file:
+                file.write(lines)
+            return
+
+        # The new objects.json switches to a new log, the previous one is then obsolete
+        previous_log = self.log_name
+        generation = int(previous_log[len("objects-") : -len(".log")]) + 1 if previous_log else 0
+        self.log_name = f"objects-{generation}.log"
+        self.write_snapshot(snapshot)
+        if previous_log:
+            os.remove(os.path.join(self.directory, previous_log))
+
+    def write_snapshot(self, objects: List[Dict]):
+        temporary_path = self.objects_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"log": self.log_name, "objects": objects}, file)
+        os.replace(temporary_path, self.objects_path)
+
+    def read_tenants(self) -> Dict[str, str]:
+        if not os.path.exists(self.tenants_path):
+            return {}
+        with open(self.tenants_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def write_tenants(self, tenants: Dict[str, str]):
+        temporary_path = self.tenants_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(tenants, file)
+        os.replace(temporary_path, self.tenants_path)
+
+    def ensure_capacity(self, dimension: int, rows: int):
+        """
+        Grow the memory-mapped matrix (doubling its capacity) so it can hold rows vectors.
+        """
+        if self.vectors is not None and rows <= self.vectors.shape[0]:
+            return
+        capacity = max(rows, INITIAL_CAPACITY, 2 * (self.vectors.shape[0] if self.vectors is not None else 0))
+
+        temporary_path = self.vectors_path + ".tmp"
+        vectors = np.lib.format.open_memmap(temporary_path, mode="w+", dtype=np.float32, shape=(capacity, dimension))
+        norms = np.zeros(capacity, dtype=np.float32)
+        if self.vectors is not None:
+            vectors[: self.size] = self.vectors[: self.size]
+            norms[: self.size] = self.norms[: self.size]
+        vectors.flush()
+        del vectors
+        os.replace(temporary_path, self.vectors_path)
+
+        self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+        self.norms = norms
+
+    # Filters
+
+    def clear_indexes(self):
+        # The lookup structures are rebuilt on demand after every change
+        self.columns.clear()
+        self.keyword_index = None
+        self.uuid_order = None
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            values = np.empty(self.size, dtype=object)
+            values[:] = [properties.get(name) for properties in self.properties]
+            self.columns[name] = values
+        return self.columns[name]
+
+    def mask(self, filters: Optional[List[Condition]]) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for name, operator, value in filters or []:
+            values = self.column(name)
+            if operator == "equal":
+                mask &= values == value
+            elif operator == "not_equal":
+                mask &= values != value
+            elif operator == "contains_any":
+                accepted = set(value)
+                mask &= np.fromiter((contains_any(item, accepted) for item in values), dtype=bool, count=self.size)
+            elif operator == "like":
+                mask &= np.fromiter((like(item, value) for item in values), dtype=bool, count=self.size)
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
+
+    # VectorStore
+
+    def to_stored_object(
+        self, row: int, include_vector: bool = False, properties: Optional[List[str]] = None, distance=None, score=None
+    ):
+        item_properties = self.properties[row]
+        if properties is not None:
+            item_properties = {name: item_properties.get(name) for name in properties}
+        return StoredObject(
+            uuid=self.uuids[row],
+            properties=dict(item_properties),
+            vector=self.vectors[row].tolist() if include_vector else None,
+            metadata=ObjectMetadata(distance=distance, score=score),
+        )
+
+    async def collection_exists(self) -> bool:
+        if self.tenant is None and os.path.exists(self.tenants_path):
+            return True
+        return os.path.exists(self.objects_path)
+
+    async def create_collection(
+        self, profile: IndexProfile = INDEX_PROFILES["default"], multi_tenancy: bool = False
+    ) -> bool:
+        # Every search is exact, the index profile doesn't change anything here
+        if await self.collection_exists():
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        if multi_tenancy:
+            self.write_tenants({})
+        else:
+            self.write_snapshot([])
+        return True
+
+    async def multi_tenancy_enabled(self) -> bool:
+        return os.path.exists(self.tenants_path)
+
+    async def list_tenants(self) -> Dict[str, str]:
+        return self.read_tenants()
+
+    async def create_tenants(self, tenants: List[str]):
+        existing = self.read_tenants()
+        for tenant in tenants:
+            if tenant in existing:
+                continue
+            directory = os.path.join(self.collection_directory, tenant)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, "objects.json"), "w", encoding="utf-8") as file:
+                json.dump([], file)
+            existing[tenant] = "active"
+        self.write_tenants(existing)
+
+    async def delete_tenants(self, tenants: List[str]):
+        existing = self.read_tenants()
+        for tenant in tenants:
+            existing.pop(tenant, None)
+            shutil.rmtree(os.path.join(self.collection_directory, tenant), ignore_errors=True)
+        self.write_tenants(existing)
+
+    async def set_tenant_status(self, tenant: str, status: str):
+        if status not in TENANT_STATUSES:
+            raise ValueError(f"Unknown tenant status: {status}")
+        existing = self.read_tenants()
+        if tenant not in existing:
+            raise ValueError(f"Tenant '{tenant}' of '{self.collection_name}' doesn't exist")
+        existing[tenant] = status
+        self.write_tenants(existing)
+
+    async def insert_many(self, objects: List[NewObject]) -> Tuple[List[Optional[str]], Dict[int, str]]:
+        if not await self.collection_exists():
+            raise ValueError(f"Collection '{self.collection_name}' does not exist.")
+
+        uuids: List[Optional[str]] = [None] * len(objects)
+        errors: Dict[int, str] = {}
+        records = []
+        for index, item in enumerate(objects):
+            vector = np.asarray(item.vector, dtype=np.float32)
+            if self.vectors is not None and vector.shape != (self.vectors.shape[1],):
+                errors[index] = f"Vector dimension {vector.shape} doesn't match the collection ({self.vectors.shape[1]})"
+                continue
+
+            uuid = str(item.uuid or uuid4())
+            properties = {
+                name: value.isoformat() if isinstance(value, datetime) else value
+                for name, value in item.properties.items()
+            }
+
+            if uuid not in self.rows:
+                self.ensure_capacity(vector.shape[0], self.size + 1)
+            row = self.place_object(uuid, properties)
+            self.vectors[row] = vector
+            self.norms[row] = np.linalg.norm(vector)
+            uuids[index] = uuid
+            records.append({"uuid": uuid, "properties": properties})
+
+        self.clear_indexes()
+        if records:
+            await self.persist(records)
+        return uuids, errors
+
+    async def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+        properties: Optional[List[str]] = None,
+    ) -> Tuple[List[StoredObject], Optional[str]]:
+        if self.uuid_order is None:
+            self.uuid_order = np.array(sorted(range(self.size), key=self.uuids.__getitem__), dtype=np.int64)
+
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(self.uuid_order, after, key=self.uuids.__getitem__)
+
+        rows = self.uuid_order[start:]
+        if filters:
+            rows = rows[self.mask(filters)[rows]]
+        objects = [self.to_stored_object(int(row), include_vector, properties) for row in rows[:limit]]
+        next_cursor = objects[-1].uuid if len(rows) > limit else None
+        return objects, next_cursor
+
+    async def iterate(self, properties: Optional[List[str]] = None) -> AsyncIterator[StoredObject]:
+        for row in range(self.size):
+            yield self.to_stored_object(row, properties=properties)
+
+    def place_object(self, uuid: str, properties: Dict) -> int:
+        """
+        Set the properties of an object, a new one gets the next row.
+
+        :return: The row of the object
+        """
+        row = self.rows.get(uuid)
+        if row is None:
+            row = self.size
+            self.uuids.append(uuid)
+            self.properties.append(properties)
+            self.rows[uuid] = row
+        else:
+            self.properties[row] = properties
+        return row
+
+    def remove_object(self, row: int):
+        """
+        Remove the object of a row, the last object moves into it (see delete_rows).
+        """
+        last = self.size - 1
+        del self.rows[self.uuids[row]]
+        if row != last:
+            self.uuids[row] = self.uuids[last]
+            self.properties[row] = self.properties[last]
+            self.rows[self.uuids[row]] = row
+        self.uuids.pop()
+        self.properties.pop()
+
+    def delete_rows(self, rows: List[int]) -> List[Dict]:
+        """
+        Delete rows, the changes still have to be persisted.
+
+        :return: The log records of the deletions
+        """
+        # Move the last row into each deleted one, so the matrix stays contiguous
+        records = []
+        for row in sorted(rows, reverse=True):
+            last = self.size - 1
+            if row != last:
+                self.vectors[row] = self.vectors[last]
+                self.norms[row] = self.norms[last]
+            records.append({"uuid": self.uuids[row]})
+            self.remove_object(row)
+        self.clear_indexes()
+        return records
+
+    async def delete_by_id(self, uuid: str):
+        row = self.rows.get(str(uuid))
+        if row is not None:
+            await self.persist(self.delete_rows([row]))
+
+    async def delete_many(self, filters: List[Condition]) -> int:
+        rows = np.flatnonzero(self.mask(filters)).tolist()
+        if rows:
+            await self.persist(self.delete_rows(rows))
+        return len(rows)
+
+    def similarities(self, vector: Sequence[float], filters: Optional[List[Condition]] = None) -> np.ndarray:
+        """
+        Cosine similarity of every stored vector to the vector, -inf for the rows filtered out.
+        With filters, only the vectors of the matching rows are read and compared.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        tiny = np.finfo(np.float32).tiny
+        if not filters:
+            return (self.vectors[: self.size] @ query) / np.maximum(self.norms[: self.size] * query_norm, tiny)
+
+        rows = np.flatnonzero(self.mask(filters))
+        similarities = np.full(self.size, -np.inf, dtype=np.float32)
+        similarities[rows] = (self.vectors[rows] @ query) / np.maximum(self.norms[rows] * query_norm, tiny)
+        return similarities
+
+    @staticmethod
+    def top_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+        # Partial sort: only the top_k candidates are ordered
+        top_k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        return candidates[np.argsort(-scores[candidates])]
+
+    async def near_vector(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+    ) -> List[StoredObject]:
+        if self.size == 0 or top_k <= 0:
+            return []
+
+        similarities = self.similarities(vector, filters)
+        return [
+            self.to_stored_object(int(row), include_vector, distance=float(1 - similarities[row]))
+            for row in self.top_rows(similarities, top_k)
+            if similarities[row] != -np.inf
+        ]
+
+    async def hybrid(
+        self,
+        query: str,
+        vector: Sequence[float],
+        top_k: int,
+        alpha: float = 0.5,
+        fusion: str = "rrf",
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+    ) -> List[StoredObject]:
+        if self.size == 0 or top_k <= 0:
+            return []
+
+        if self.keyword_index is None:
+            self.keyword_index = BM25Index([properties.get("documentContent") for properties in self.properties])
+
+        similarities = self.similarities(vector, filters)
+        keyword_scores = self.keyword_index.scores(query)
+        # Rows without any query term (or filtered out) are not keyword results
+        keyword_scores[(keyword_scores <= 0) | (similarities == -np.inf)] = -np.inf
+
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        vector_results = [
+            (int(row), float(similarities[row]))
+            for row in self.top_rows(similarities, candidates)
+            if similarities[row] != -np.inf
+        ]
+        keyword_results = [
+            (int(row), float(keyword_scores[row]))
+            for row in self.top_rows(keyword_scores, candidates)
+            if keyword_scores[row] != -np.inf
+        ]
+
+        return [
+            self.to_stored_object(row, include_vector, distance=float(1 - similarities[row]), score=score)
+            for row, score in fuse_results(vector_results, keyword_results, alpha, fusion)[:top_k]
+        ]
+
+    async def count(self) -> int:
+        return self.size
+
+    async def close(self):
+        if self.vectors is not None:
+            self.vectors.flush()
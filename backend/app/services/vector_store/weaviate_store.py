@@ -0,0 +1,372 @@
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from weaviate.classes.config import Configure, DataType, Property, Tokenization, VectorDistances, VectorFilterStrategy
+from weaviate.classes.data import DataObject
+from weaviate.classes.query import Filter, HybridFusion, MetadataQuery, Sort
+from weaviate.classes.tenants import Tenant, TenantActivityStatus
+from app.core.concurrency import get_limiter
+from app.core.db import get_weaviate_client
+from app.services.vector_store.base import (
+    TENANT_STATUSES,
+    Condition,
+    NewObject,
+    ObjectMetadata,
+    StoredObject,
+    VectorStore,
+)
+from app.services.vector_store.index_profiles import INDEX_PROFILES, IndexProfile
+
+DOCUMENTATION_PROPERTIES = [
+    Property(
+        name="documentSource", data_type=DataType.TEXT
+    ),  # Source of the document (GitHub, Article, whatever...)
+    Property(
+        name="documentURL", data_type=DataType.TEXT
+    ),  # URL of the document (for citations later)
+    Property(
+        name="documentContent", data_type=DataType.TEXT
+    ),  # The Chunk to be stored
+    Property(
+        name="created_at", data_type=DataType.DATE
+    ),  # Timestamp (maybe useful later in case there is update to the documentation)
+    Property(
+        name="repository", data_type=DataType.TEXT, tokenization=Tokenization.FIELD
+    ),  # Repository the chunk comes from (for example kubeflow/website)
+    Property(
+        name="filePath", data_type=DataType.TEXT, tokenization=Tokenization.FIELD
+    ),  # Path of the file inside the repository
+    Property(
+        name="fileHash", data_type=DataType.TEXT, tokenization=Tokenization.FIELD
+    ),  # Content hash of the file, to only re-embed changed files
+    Property(
+        name="chunkIndex", data_type=DataType.INT
+    ),  # Position of the chunk in the file
+    Property(
+        name="chunkCount", data_type=DataType.INT
+    ),  # Number of chunks of the file, to detect partially ingested files
+    Property(
+        name="startOffset", data_type=DataType.INT
+    ),  # Character offset of the chunk start in the file
+    Property(
+        name="endOffset", data_type=DataType.INT
+    ),  # Character offset of the chunk end in the file
+    Property(
+        name="docSection", data_type=DataType.TEXT, tokenization=Tokenization.FIELD
+    ),  # Documentation area of the file (for example pipelines), to scope the searches
+    Property(
+        name="docVersion", data_type=DataType.TEXT, tokenization=Tokenization.FIELD
+    ),  # Documentation version of the file (for example v1 or latest)
+    Property(
+        name="docVersions", data_type=DataType.TEXT_ARRAY, tokenization=Tokenization.FIELD, index_searchable=False
+    ),  # Versions of the file and of the near-duplicate chunks stored as this one, for the version filter
+    Property(
+        name="language", data_type=DataType.TEXT, tokenization=Tokenization.FIELD
+    ),  # Language of the file (markdown, python, yaml or its extension)
+    Property(
+        name="heading", data_type=DataType.TEXT, index_filterable=False
+    ),  # Markdown heading of the section the chunk starts in (for citations)
+    Property(
+        name="aliases", data_type=DataType.TEXT_ARRAY, index_searchable=False, index_filterable=False
+    ),  # Near-duplicate chunks stored as this one, JSON of their filePath, fileHash, chunkIndex and offsets
+]
+
+# Fusion methods of the hybrid search
+FUSION_TYPES = {"rrf": HybridFusion.RANKED, "relative_score": HybridFusion.RELATIVE_SCORE}
+
+# Tenant statuses, the older Weaviate versions report HOT, COLD and FROZEN
+TENANT_ACTIVITY_STATUSES = {
+    "active": TenantActivityStatus.ACTIVE,
+    "inactive": TenantActivityStatus.INACTIVE,
+    "offloaded": TenantActivityStatus.OFFLOADED,
+}
+ACTIVITY_STATUS_NAMES = {
+    TenantActivityStatus.ACTIVE: "active",
+    TenantActivityStatus.HOT: "active",
+    TenantActivityStatus.INACTIVE: "inactive",
+    TenantActivityStatus.COLD: "inactive",
+    TenantActivityStatus.OFFLOADED: "offloaded",
+    TenantActivityStatus.FROZEN: "offloaded",
+    # Transitions, the tenant can't be searched until they finish
+    TenantActivityStatus.OFFLOADING: "offloaded",
+    TenantActivityStatus.ONLOADING: "offloaded",
+}
+
+# Filter strategies of the HNSW index
+FILTER_STRATEGIES = {"sweeping": VectorFilterStrategy.SWEEPING, "acorn": VectorFilterStrategy.ACORN}
+
+
+def build_filter(filters: Optional[List[Condition]]):
+    """
+    Translate the filter conditions to a Weaviate filter.
+    """
+    if not filters:
+        return None
+    conditions = []
+    for name, operator, value in filters:
+        prop = Filter.by_property(name)
+        if operator == "equal":
+            conditions.append(prop.equal(value))
+        elif operator == "not_equal":
+            conditions.append(prop.not_equal(value))
+        elif operator == "contains_any":
+            conditions.append(prop.contains_any(list(value)))
+        elif operator == "like":
+            conditions.append(prop.like(value))
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+    return conditions[0] if len(conditions) == 1 else Filter.all_of(conditions)
+
+
+def build_vector_index_config(profile: IndexProfile):
+    """
+    Translate an index profile to a Weaviate vector index configuration (cosine distance).
+    """
+    quantizer = None
+    if profile.quantization == "pq":
+        quantizer = Configure.VectorIndex.Quantizer.pq(
+            segments=profile.pq_segments, training_limit=profile.pq_training_limit
+        )
+    elif profile.quantization == "bq":
+        quantizer = Configure.VectorIndex.Quantizer.bq()
+
+    if profile.index_type == "flat":
+        return Configure.VectorIndex.flat(distance_metric=VectorDistances.COSINE, quantizer=quantizer)
+    return Configure.VectorIndex.hnsw(
+        distance_metric=VectorDistances.COSINE,
+        ef=profile.ef,
+        ef_construction=profile.ef_construction,
+        max_connections=profile.max_connections,
+        filter_strategy=FILTER_STRATEGIES.get(profile.filter_strategy),
+        quantizer=quantizer,
+    )
+
+
+def to_stored_object(item, include_vector: bool = False, properties: Optional[List[str]] = None) -> StoredObject:
+    vector = None
+    if include_vector and item.vector:
+        vector = item.vector.get("default")
+    item_properties = item.properties
+    if properties is not None:
+        item_properties = {name: item_properties.get(name) for name in properties}
+    metadata = ObjectMetadata()
+    if item.metadata is not None:
+        metadata = ObjectMetadata(distance=item.metadata.distance, score=item.metadata.score)
+    return StoredObject(
+        uuid=str(item.uuid),
+        properties=item_properties,
+        vector=vector,
+        metadata=metadata,
+    )
+
+
+class WeaviateVectorStore(VectorStore):
+    """
+    Vector store backed by a Weaviate collection (cosine distance, index set by the profile).
+    """
+
+    def __init__(self, collection_name: str, tenant: Optional[str] = None):
+        super().__init__(collection_name, tenant)
+        self.multi_tenant: Optional[bool] = None  # Read from the collection config on first use
+
+    async def get_collection(self):
+        client = await get_weaviate_client()
+        collection = client.collections.get(self.collection_name)
+        return collection.with_tenant(self.tenant) if self.tenant is not None else collection
+
+    async def collection_exists(self) -> bool:
+        client = await get_weaviate_client()
+        async with get_limiter("weaviate"):
+            return await client.collections.exists(self.collection_name)
+
+    async def create_collection(
+        self, profile: IndexProfile = INDEX_PROFILES["default"], multi_tenancy: bool = False
+    ) -> bool:
+        if await self.collection_exists():
+            await self.add_missing_properties()
+            return False
+        client = await get_weaviate_client()
+        await client.collections.create(
+            name=self.collection_name,
+            vectorizer_config=Configure.Vectorizer.none(),
+            properties=DOCUMENTATION_PROPERTIES,
+            vector_index_config=build_vector_index_config(profile),
+            multi_tenancy_config=Configure.multi_tenancy(enabled=multi_tenancy),
+        )
+        self.multi_tenant = multi_tenancy
+        return True
+
+    async def multi_tenancy_enabled(self) -> bool:
+        if self.multi_tenant is None:
+            client = await get_weaviate_client()
+            async with get_limiter("weaviate"):
+                config = await client.collections.get(self.collection_name).config.get()
+            self.multi_tenant = config.multi_tenancy_config.enabled
+        return self.multi_tenant
+
+    async def list_tenants(self) -> Dict[str, str]:
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            tenants = await collection.tenants.get()
+        return {name: ACTIVITY_STATUS_NAMES[tenant.activity_status] for name, tenant in tenants.items()}
+
+    async def create_tenants(self, tenants: List[str]):
+        existing = await self.list_tenants()
+        missing = [tenant for tenant in tenants if tenant not in existing]
+        if not missing:
+            return
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            await collection.tenants.create([Tenant(name=tenant) for tenant in missing])
+
+    async def delete_tenants(self, tenants: List[str]):
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            await collection.tenants.remove(list(tenants))
+
+    async def set_tenant_status(self, tenant: str, status: str):
+        if status not in TENANT_STATUSES:
+            raise ValueError(f"Unknown tenant status: {status}")
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            await collection.tenants.update(Tenant(name=tenant, activity_status=TENANT_ACTIVITY_STATUSES[status]))
+
+    async def add_missing_properties(self):
+        """
+        Add the documentation properties introduced after the collection was created.
+        """
+        client = await get_weaviate_client()
+        collection = client.collections.get(self.collection_name)
+        async with get_limiter("weaviate"):
+            config = await collection.config.get(simple=True)
+        existing = {prop.name for prop in config.properties}
+        for prop in DOCUMENTATION_PROPERTIES:
+            if prop.name not in existing:
+                async with get_limiter("weaviate"):
+                    await collection.config.add_property(prop)
+
+    async def insert_many(self, objects: List[NewObject]) -> Tuple[List[Optional[str]], Dict[int, str]]:
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            result = await collection.data.insert_many(
+                [DataObject(properties=item.properties, vector=item.vector, uuid=item.uuid) for item in objects]
+            )
+        # Errors and UUIDs are keyed by the index of the object in the insert_many call
+        uuids = [str(result.uuids[index]) if index in result.uuids else None for index in range(len(objects))]
+        errors = {index: error.message for index, error in result.errors.items()}
+        return uuids, errors
+
+    async def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+        properties: Optional[List[str]] = None,
+    ) -> Tuple[List[StoredObject], Optional[str]]:
+        collection = await self.get_collection()
+
+        if filters:
+            # Weaviate's cursor can't be combined with filters: filtered pages are searched by the
+            # server, sorted by UUID, and their cursor is an offset (up to QUERY_MAXIMUM_RESULTS)
+            if after is not None and not after.isdigit():
+                raise ValueError(f"Invalid cursor of a filtered page: {after}")
+            offset = int(after or 0)
+            async with get_limiter("weaviate"):
+                result = await collection.query.fetch_objects(
+                    filters=build_filter(filters),
+                    sort=Sort.by_id(),
+                    offset=offset,
+                    limit=limit,
+                    include_vector=include_vector,
+                    return_properties=properties,
+                )
+            objects = [to_stored_object(item, include_vector, properties) for item in result.objects]
+            return objects, str(offset + len(objects)) if len(objects) == limit else None
+
+        async with get_limiter("weaviate"):
+            result = await collection.query.fetch_objects(
+                after=after, limit=limit, include_vector=include_vector, return_properties=properties
+            )
+        objects = [to_stored_object(item, include_vector, properties) for item in result.objects]
+        return objects, objects[-1].uuid if len(objects) == limit else None
+
+    async def iterate(self, properties: Optional[List[str]] = None) -> AsyncIterator[StoredObject]:
+        collection = await self.get_collection()
+        async for item in collection.iterator(return_properties=properties):
+            yield to_stored_object(item)
+
+    async def delete_by_id(self, uuid: str):
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            await collection.data.delete_by_id(uuid)
+
+    async def delete_many(self, filters: List[Condition]) -> int:
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            result = await collection.data.delete_many(where=build_filter(filters))
+        return result.successful
+
+    async def near_vector(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+    ) -> List[StoredObject]:
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            response = await collection.query.near_vector(
+                near_vector=list(vector),
+                limit=top_k,
+                filters=build_filter(filters),
+                include_vector=include_vector,
+                return_metadata=MetadataQuery(distance=True),
+            )
+        return [to_stored_object(item, include_vector) for item in response.objects]
+
+    async def hybrid(
+        self,
+        query: str,
+        vector: Sequence[float],
+        top_k: int,
+        alpha: float = 0.5,
+        fusion: str = "rrf",
+        filters: Optional[List[Condition]] = None,
+        include_vector: bool = False,
+    ) -> List[StoredObject]:
+        if fusion not in FUSION_TYPES:
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            response = await collection.query.hybrid(
+                query=query,
+                vector=list(vector),
+                alpha=alpha,
+                fusion_type=FUSION_TYPES[fusion],
+                query_properties=["documentContent"],
+                limit=top_k,
+                filters=build_filter(filters),
+                include_vector=include_vector,
+                # The distance of the vector search, so hybrid results can be cut off like vector search ones
+                return_metadata=MetadataQuery(score=True, distance=True),
+            )
+
+        # Servers that don't report the distance of hybrid results: it's computed from
+        # the vectors when they were requested anyway (for MMR)
+        query_vector = np.asarray(vector, dtype=np.float32)
+        results = []
+        for item in response.objects:
+            result = to_stored_object(item, include_vector)
+            stored_vector = item.vector.get("default") if include_vector and item.vector else None
+            if result.metadata.distance is None and stored_vector is not None:
+                stored_vector = np.asarray(stored_vector, dtype=np.float32)
+                norms = np.linalg.norm(stored_vector) * np.linalg.norm(query_vector)
+                if norms > 0:
+                    result.metadata.distance = float(1 - stored_vector @ query_vector / norms)
+            results.append(result)
+        return results
+
+    async def count(self) -> int:
+        collection = await self.get_collection()
+        async with get_limiter("weaviate"):
+            return await collection.length()
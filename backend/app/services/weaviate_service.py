@@ -1,70 +1,182 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import time
 from datetime import datetime, timezone
-from weaviate.classes.config import Configure, DataType, Property, VectorDistances
-from weaviate.classes.query import Filter, MetadataQuery
-from app.core.db import get_weaviate_client
-from app.services.embedding_service import get_embeddings
-
-# Initialize the Weaviate client globally
-client = get_weaviate_client()
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from prometheus_client import Counter, Histogram
+from app.core.concurrency import get_limiter
+from app.core.config import settings
+from app.core.singleflight import normalize_query, single_flight
+from app.services.dedup_service import parse_alias
+from app.services.embedding_service import get_embeddings, get_embeddings_batch
+from app.services.semantic_cache import semantic_cache
+from app.services.vector_store import (
+    NewObject,
+    StoredObject,
+    VectorStore,
+    get_index_profile,
+    get_vector_store,
+    release_vector_store,
+)
+from app.services.vector_store.mmr import maximal_marginal_relevance
 
 DOCUMENTATION_CLASS_NAME = "KubeflowDocumentation"
 
+SEARCH_LATENCY = Histogram(
+    "vector_search_duration_seconds", "Similarity search latency (embedding excluded)", ["mode", "backend"]
+)
+INGESTION_CHUNKS = Counter(
+    "ingestion_chunks_total", "Chunks processed by the ingestion (rate() gives chunks per second)", ["result"]
+)
+
+# Characters Weaviate doesn't accept in tenant names
+TENANT_NAME_PATTERN = re.compile(r"[^A-Za-z0-9_-]")
+TENANT_NAME_MAX_LENGTH = 64
+TENANT_HASH_LENGTH = 12  # Hex digits of the repository name hash ending every tenant name
+
+# Tenants of the documentation collection, reused for TENANT_CACHE_SECONDS
+tenant_cache = {"tenants": None, "expires_at": 0.0}
+
 
 async def check_collection_exists(class_name=DOCUMENTATION_CLASS_NAME):
     """
-    Check if a collection (class) exists in Weaviate.
+    Check if a collection (class) exists in the vector store.
     """
     try:
-        return client.collections.exists(class_name)
+        return await get_vector_store(class_name).collection_exists()
     except Exception as e:
         print(f"Error checking collection existence: {e}")
         return False
 
 
-async def create_documentation_collection(class_name=DOCUMENTATION_CLASS_NAME):
+async def create_documentation_collection(class_name=DOCUMENTATION_CLASS_NAME, profile=None):
     """
-    Create a collection (class) in Weaviate for storing Kubeflow Documentation, if it doesn't exist.
+    Create a collection (class) in the vector store for storing Kubeflow Documentation, if it doesn't exist.
+    With MULTI_TENANCY_ENABLED, every repository of a new collection is stored in its own tenant.
+
+    :param profile: The name of the vector index profile, defaults to VECTOR_INDEX_PROFILE
     """
+    profile = profile or settings.VECTOR_INDEX_PROFILE
     try:
-        exists = await check_collection_exists(class_name)
-        if not exists:
-            client.collections.create(
-                name=class_name,
-                vectorizer_config=Configure.Vectorizer.none(),
-                properties=[
-                    Property(
-                        name="documentSource", data_type=DataType.TEXT
-                    ),  # Source of the document (GitHub, Article, whatever...)
-                    Property(
-                        name="documentURL", data_type=DataType.TEXT
-                    ),  # URL of the document (for citations later)
-                    Property(
-                        name="documentContent", data_type=DataType.TEXT
-                    ),  # The Chunk to be stored
-                    Property(
-                        name="created_at", data_type=DataType.DATE
-                    ),  # Timestamp (maybe useful later in case there is update to the documentation)
-                ],
-                vector_index_config=Configure.VectorIndex.hnsw(
-                    distance_metric=VectorDistances.COSINE,
-                ),
-            )
-            return {"message": f"Collection {class_name} created successfully"}
+        created = await get_vector_store(class_name).create_collection(
+            get_index_profile(profile), multi_tenancy=settings.MULTI_TENANCY_ENABLED
+        )
+        if created:
+            return {"message": f"Collection {class_name} created successfully with the {profile} index profile"}
         else:
             return {"message": f"Collection {class_name} already exists"}
     except Exception as e:
         raise Exception(f"Error in creating documentation collection: {e}")
 
 
-def add_documentation_item(documentSource, documentURL, documentContent):
+def tenant_name(repository: str) -> str:
     """
-    Add a documentation item to the Weaviate collection.
+    The tenant of a repository: "kubeflow/website" is stored in "kubeflow--website-<hash>".
+    The readable prefix replaces "/" by "--" and the other characters Weaviate doesn't accept
+    in tenant names by "_", so it can be shared by several names ("foo.bar" and "foo_bar"):
+    the hash of the repository name keeps the tenants of different repositories apart.
     """
-    try:
-        documentation_collection = client.collections.get(DOCUMENTATION_CLASS_NAME)
+    prefix = TENANT_NAME_PATTERN.sub("_", repository.replace("/", "--"))
+    digest = hashlib.sha256(repository.encode("utf-8")).hexdigest()[:TENANT_HASH_LENGTH]
+    return f"{prefix[: TENANT_NAME_MAX_LENGTH - TENANT_HASH_LENGTH - 1]}-{digest}"
+
+
+def read_tenant_repositories() -> Dict[str, str]:
+    """
+    The repository of each tenant, {tenant: repository}, as recorded by create_repository_tenant.
+    """
+    if not os.path.exists(settings.TENANT_REPOSITORIES_PATH):
+        return {}
+    with open(settings.TENANT_REPOSITORIES_PATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_tenant_repositories(repositories: Dict[str, str]):
+    directory = os.path.dirname(settings.TENANT_REPOSITORIES_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = settings.TENANT_REPOSITORIES_PATH + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        json.dump(repositories, file)
+    os.replace(temporary_path, settings.TENANT_REPOSITORIES_PATH)
+
+
+async def is_multi_tenant() -> bool:
+    # Collections created before multi-tenancy keep every repository in one index
+    return await get_vector_store(DOCUMENTATION_CLASS_NAME).multi_tenancy_enabled()
+
+
+async def get_tenants(refresh: bool = False) -> Dict[str, str]:
+    """
+    The tenants of the documentation collection as {tenant: status}, cached for TENANT_CACHE_SECONDS
+    so the searches don't list them every time.
+    """
+    if refresh or tenant_cache["tenants"] is None or time.monotonic() >= tenant_cache["expires_at"]:
+        tenant_cache["tenants"] = await get_vector_store(DOCUMENTATION_CLASS_NAME).list_tenants()
+        tenant_cache["expires_at"] = time.monotonic() + settings.TENANT_CACHE_SECONDS
+    return tenant_cache["tenants"]
+
+
+async def create_repository_tenant(repository: str):
+    """
+    Create the tenant of a repository if it doesn't exist, and activate it if it was deactivated
+    or offloaded. Nothing to do when the collection is not multi-tenant.
+    """
+    if not await is_multi_tenant():
+        return
+    vector_store = get_vector_store(DOCUMENTATION_CLASS_NAME)
+    tenant = tenant_name(repository)
+    repositories = read_tenant_repositories()
+    if repositories.get(tenant) != repository:
+        repositories[tenant] = repository
+        write_tenant_repositories(repositories)
+
+    tenants = await get_tenants(refresh=True)
+    if tenant not in tenants:
+        await vector_store.create_tenants([tenant])
+    elif tenants[tenant] != "active":
+        await vector_store.set_tenant_status(tenant, "active")
+    else:
+        return
+    tenant_cache["tenants"] = None
+
+
+async def repository_store(repository: Optional[str] = None) -> VectorStore:
+    """
+    The store of the chunks of a repository: its tenant, or the whole collection when it's not
+    multi-tenant. Items without repository go to the MANUAL_TENANT tenant.
+    """
+    if not await is_multi_tenant():
+        return get_vector_store(DOCUMENTATION_CLASS_NAME)
+    return get_vector_store(DOCUMENTATION_CLASS_NAME, tenant_name(repository or settings.MANUAL_TENANT))
+
+
+async def search_stores(repositories: Optional[List[str]] = None) -> List[VectorStore]:
+    """
+    The stores a search or a scan runs on: the active tenants (of the given repositories only,
+    if any) in tenant order, or the whole collection when it's not multi-tenant.
+    """
+    if not await is_multi_tenant():
+        return [get_vector_store(DOCUMENTATION_CLASS_NAME)]
+    tenants = await get_tenants()
+    if repositories:
+        names = sorted({tenant_name(repository) for repository in repositories})
+    else:
+        names = sorted(tenants)
+    return [get_vector_store(DOCUMENTATION_CLASS_NAME, name) for name in names if tenants.get(name) == "active"]
 
+
+async def add_documentation_item(documentSource, documentURL, documentContent):
+    """
+    Add a documentation item to the collection.
+    """
+    try:
         # Generate embedding vector
-        vector = get_embeddings(documentContent)
+        vector = await get_embeddings(documentContent)
 
         # Current timestamp
         timestamp = datetime.now(timezone.utc)
@@ -76,10 +188,14 @@ def add_documentation_item(documentSource, documentURL, documentContent):
             "created_at": timestamp,
         }
 
-        # Insert the item and get its UUID
-        result = documentation_collection.data.insert(
-            properties=documentation_item, vector=vector
-        )
+        # Insert the item (in the MANUAL_TENANT tenant) and get its UUID
+        await create_repository_tenant(settings.MANUAL_TENANT)
+        vector_store = await repository_store()
+        result = await vector_store.insert(NewObject(properties=documentation_item, vector=vector))
+
+        # Cached answers may not reflect the new item
+        if semantic_cache is not None:
+            semantic_cache.invalidate()
         return {result: documentation_item}
 
     except Exception as e:
@@ -87,71 +203,429 @@ def add_documentation_item(documentSource, documentURL, documentContent):
         return None
 
 
-def retrieve_documentation_items(documentSource=None, documentURL=None):
+async def add_documentation_items(
+    items: List[Dict[str, str]],
+    batch_size: int = settings.WEAVIATE_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+):
     """
-    Retrieve documentation items from the collection, with optional filters.
+    Add many documentation items to the collection using batched embeddings and inserts.
+
+    :param items: Dicts with documentSource, documentURL and documentContent keys, any other property to store,
+                  and an optional uuid key (objects with an existing UUID are replaced). The items are
+                  stored in the tenant of their repository property (MANUAL_TENANT without one)
+    :param batch_size: The number of objects embedded and inserted per round trip
+    :param progress: Optional callback called with (processed items, total items) after each batch
+    :return: Dict with the number of inserted items and the per-item failures as [{"index", "error"}]
     """
-    try:
-        documentation_collection = client.collections.get(DOCUMENTATION_CLASS_NAME)
-
-        # Build filters dynamically
-        filters = []
-        if documentSource:
-            filters.append(Filter.by_property("documentSource").equal(documentSource))
-        if documentURL:
-            filters.append(Filter.by_property("documentURL").equal(documentURL))
-
-        # Combine filters
-        if filters:
-            combined_filter = Filter.all_of(filters)
-            # Execute query
-            result = documentation_collection.query.fetch_objects(
-                filters=combined_filter, include_vector=True
+    for repository in {item.get("repository") or settings.MANUAL_TENANT for item in items}:
+        await create_repository_tenant(repository)
+
+    inserted = 0
+    failures = []
+
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        if progress is not None:
+            progress(start, len(items))
+
+        # Generate embedding vectors for the whole batch. Ingestion batches share a smaller
+        # limit than the upstream ones, so concurrent ingestions can't starve the chat traffic
+        async with get_limiter("ingestion"):
+            vectors, embedding_errors = await get_embeddings_batch(
+                [item["documentContent"] for item in batch]
             )
-        else:
-            result = documentation_collection.query.fetch_objects(include_vector=True)
+        for offset, error in embedding_errors.items():
+            failures.append({"index": start + offset, "error": f"Embedding failed: {error}"})
+
+        # Current timestamp
+        timestamp = datetime.now(timezone.utc)
+
+        # Keep track of the position of each object in the items list, per repository
+        groups: Dict[Optional[str], tuple] = {}
+        for offset, (item, vector) in enumerate(zip(batch, vectors)):
+            if vector is None:
+                continue
+            properties = {key: value for key, value in item.items() if key != "uuid"}
+            properties["created_at"] = timestamp
+            objects, positions = groups.setdefault(item.get("repository"), ([], []))
+            objects.append(NewObject(properties=properties, vector=vector, uuid=item.get("uuid")))
+            positions.append(start + offset)
 
-        return result.objects
+        for repository, (objects, positions) in groups.items():
+            try:
+                vector_store = await repository_store(repository)
+                _, insert_errors = await vector_store.insert_many(objects)
+            except Exception as e:
+                print(f"Error inserting batch starting at {start}: {e}")
+                failures.extend({"index": position, "error": f"Insert failed: {e}"} for position in positions)
+                continue
+
+            # Errors are keyed by the index of the object in the insert_many call
+            for index, error in insert_errors.items():
+                failures.append({"index": positions[index], "error": f"Insert failed: {error}"})
+            inserted += len(objects) - len(insert_errors)
+            # Counted per batch, so the rate follows the ingestion progress
+            INGESTION_CHUNKS.labels(result="inserted").inc(len(objects) - len(insert_errors))
+
+    if progress is not None:
+        progress(len(items), len(items))
+
+    INGESTION_CHUNKS.labels(result="failed").inc(len(failures))
+
+    # Cached answers were generated without the new items
+    if inserted and semantic_cache is not None:
+        semantic_cache.invalidate()
+
+    failures.sort(key=lambda failure: failure["index"])
+    return {"inserted": inserted, "failed": failures}
+
+
+async def get_repository_files(
+    repository: str, alias_files: Optional[Dict[str, set]] = None
+) -> Dict[str, Dict[str, bool]]:
+    """
+    Get the files of a repository already stored in the collection.
+
+    Only the bookkeeping properties are read (no vectors, no content), of the tenant of the
+    repository only in a multi-tenant collection. The near-duplicate chunks that were not
+    embedded count as stored, through the aliases of their canonical chunk.
+
+    :param repository: The name of the repository (for example "kubeflow/website")
+    :param alias_files: Optional dict filled with {filePath: {paths of the files aliased by its chunks}}
+    :return: Dict of {filePath: {fileHash: True if every chunk of that version is stored}}
+    """
+    stored_chunks: Dict[tuple, int] = {}
+    expected_chunks: Dict[tuple, int] = {}
+
+    def count_chunk(file_path, file_hash, chunk_count):
+        key = (file_path, file_hash)
+        stored_chunks[key] = stored_chunks.get(key, 0) + 1
+        expected_chunks[key] = chunk_count or 0
+
+    vector_store = await repository_store(repository)
+    async for item in vector_store.iterate(["repository", "filePath", "fileHash", "chunkCount", "aliases"]):
+        properties = item.properties
+        if properties.get("repository") != repository or not properties.get("filePath"):
+            continue
+        count_chunk(properties["filePath"], properties.get("fileHash"), properties.get("chunkCount"))
+        for alias in map(parse_alias, properties.get("aliases") or []):
+            count_chunk(alias["filePath"], alias["fileHash"], alias["chunkCount"])
+            if alias_files is not None and alias["filePath"] != properties["filePath"]:
+                alias_files.setdefault(properties["filePath"], set()).add(alias["filePath"])
+
+    files: Dict[str, Dict[str, bool]] = {}
+    for (file_path, file_hash), count in stored_chunks.items():
+        files.setdefault(file_path, {})[file_hash] = count >= expected_chunks[(file_path, file_hash)]
+    return files
+
+
+async def delete_repository_files(repository: str, file_paths: List[str], keep_hashes: Dict[str, str] = None) -> int:
+    """
+    Delete the chunks of some files of a repository.
+
+    :param repository: The name of the repository (for example "kubeflow/website")
+    :param file_paths: The paths of the files to delete
+    :param keep_hashes: Optional {filePath: fileHash} of the versions to keep, only the other versions are deleted
+    :return: The number of deleted chunks
+    """
+    vector_store = await repository_store(repository)
+    keep_hashes = keep_hashes or {}
+
+    filters = []
+    # Files to delete entirely, grouped to limit the number of requests
+    removed = [file_path for file_path in file_paths if file_path not in keep_hashes]
+    for start in range(0, len(removed), 100):
+        filters.append([
+            ("repository", "equal", repository),
+            ("filePath", "contains_any", removed[start : start + 100]),
+        ])
+    # Files whose stale versions are deleted
+    for file_path in file_paths:
+        if file_path in keep_hashes:
+            filters.append([
+                ("repository", "equal", repository),
+                ("filePath", "equal", file_path),
+                ("fileHash", "not_equal", keep_hashes[file_path]),
+            ])
+
+    deleted = 0
+    for where in filters:
+        deleted += await vector_store.delete_many(where)
+
+    if deleted and semantic_cache is not None:
+        semantic_cache.invalidate()
+    return deleted
+
+
+def documentation_filters(documentSource=None, documentURL=None):
+    # Build filters dynamically
+    filters = []
+    if documentSource:
+        filters.append(("documentSource", "equal", documentSource))
+    if documentURL:
+        filters.append(("documentURL", "equal", documentURL))
+    return filters
+
+
+def search_filters(filePath=None, docSection=None, docVersion=None, language=None):
+    """
+    Build the filters scoping a similarity search, None when it's not scoped
+    (the repositories are selected by similarity_search).
+
+    :param filePath: A file path, or a pattern where * matches any characters (for example "docs/pipelines/*")
+    """
+    filters = []
+    if filePath:
+        filters.append(("filePath", "like" if "*" in filePath or "?" in filePath else "equal", filePath))
+    if docSection:
+        filters.append(("docSection", "equal", docSection))
+    if docVersion:
+        # Also finds the chunks whose duplicate (an alias) is of that version
+        filters.append(("docVersions", "contains_any", [docVersion]))
+    if language:
+        filters.append(("language", "equal", language))
+    return filters or None
+
+
+async def page_documentation_items(after=None, limit=100, filters=None, include_vector=False, properties=None):
+    """
+    A page of documentation items, across the active tenants in a multi-tenant collection:
+    the cursor is then "<tenant>/<cursor of the tenant>" (see VectorStore.page).
+    """
+    stores = await search_stores()
+    if len(stores) == 1 and stores[0].tenant is None:
+        return await stores[0].page(
+            after=after, limit=limit, filters=filters, include_vector=include_vector, properties=properties
+        )
+
+    after_tenant, _, after_cursor = (after or "").partition("/")
+    stores = [vector_store for vector_store in stores if vector_store.tenant >= after_tenant]
+    items = []
+    for position, vector_store in enumerate(stores):
+        page, next_cursor = await vector_store.page(
+            after=(after_cursor or None) if vector_store.tenant == after_tenant else None,
+            limit=limit - len(items),
+            filters=filters,
+            include_vector=include_vector,
+            properties=properties,
+        )
+        items.extend(page)
+        if next_cursor is not None:
+            return items, f"{vector_store.tenant}/{next_cursor}"
+        if len(items) >= limit:
+            # The next page starts with the next tenant
+            return items, f"{stores[position + 1].tenant}/" if position + 1 < len(stores) else None
+    return items, None
+
+
+async def retrieve_documentation_items(
+    documentSource=None, documentURL=None, after=None, limit=100, include_vector=False, properties=None
+):
+    """
+    Retrieve a page of documentation items from the collection, with optional filters.
+
+    :param after: Cursor of the page, the next_cursor of the previous page
+    :param limit: The maximum number of items of the page
+    :param include_vector: Whether the vectors are returned
+    :param properties: The properties to return, all of them when None
+    :return: Dict with the items and the next_cursor (None on the last page)
+    """
+    try:
+        items, next_cursor = await page_documentation_items(
+            after=after,
+            limit=limit,
+            filters=documentation_filters(documentSource, documentURL),
+            include_vector=include_vector,
+            properties=properties,
+        )
+        return {"items": items, "next_cursor": next_cursor}
 
     except Exception as e:
         print(f"Error retrieving documentation items: {e}")
-        return []
+        return {"items": [], "next_cursor": None}
+
+
+async def iter_documentation_items(
+    documentSource=None, documentURL=None, after=None, limit=None, include_vector=False, properties=None,
+    page_size=500,
+) -> AsyncIterator[StoredObject]:
+    """
+    Walk through the documentation items page by page, only one page is held in memory.
+
+    :param limit: The maximum number of items, all of them when None
+    :param page_size: The number of items fetched per request
+    (see retrieve_documentation_items for the other parameters)
+    """
+    filters = documentation_filters(documentSource, documentURL)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        items, after = await page_documentation_items(
+            after=after,
+            limit=page_size if remaining is None else min(page_size, remaining),
+            filters=filters,
+            include_vector=include_vector,
+            properties=properties,
+        )
+        for item in items:
+            yield item
+        if remaining is not None:
+            remaining -= len(items)
+        if after is None:
+            break
 
 
-def delete_documentation_item(uuid):
+async def delete_documentation_item(uuid, repository=None):
     """
     Delete a documentation item by its UUID.
+
+    :param repository: The repository of the item, in a multi-tenant collection the item is
+                       otherwise looked for in every active tenant
     """
-    if not check_collection_exists():
+    if not await check_collection_exists():
         raise ValueError(f"Collection '{DOCUMENTATION_CLASS_NAME}' does not exist.")
 
     try:
-        documentation_collection = client.collections.get(DOCUMENTATION_CLASS_NAME)
-        documentation_collection.data.delete_by_id(uuid)
+        stores = [await repository_store(repository)] if repository else await search_stores()
+        for vector_store in stores:
+            await vector_store.delete_by_id(uuid)
+        if semantic_cache is not None:
+            semantic_cache.invalidate()
         print(f"documentation item with UUID '{uuid}' deleted successfully.")
     except Exception as e:
         raise ValueError(f"Failed to delete documentation item: {e}")
 
 
-async def similarity_search(prompt, top_k=5):
+async def similarity_search(
+    prompt,
+    top_k=5,
+    query_vector=None,
+    mode=None,
+    alpha=None,
+    fusion=None,
+    mmr=False,
+    fetch_k=None,
+    mmr_lambda=None,
+    filters=None,
+    repositories=None,
+):
     """
     Perform a similarity search on the documentations base.
+    Identical concurrent searches (same normalized prompt and parameters) share one search.
+    With filters, only the matching chunks are searched. In a multi-tenant collection, the search
+    runs on the tenant of each repository (every active tenant by default) and the results are merged.
 
     :param prompt: The text to search for similar items
     :param top_k: The maximum number of results to return
+    :param query_vector: The embedding of the prompt, if the caller already computed it
+    :param mode: "vector" or "hybrid" (BM25 on documentContent fused with the vector search),
+                 defaults to SEARCH_MODE
+    :param alpha: Weight of the vector search in hybrid mode, defaults to HYBRID_ALPHA
+    :param fusion: "rrf" or "relative_score" in hybrid mode, defaults to HYBRID_FUSION
+    :param mmr: Re-rank fetch_k candidates by maximal marginal relevance, to skip near duplicates
+    :param fetch_k: The number of candidates of the MMR re-ranking, defaults to MMR_FETCH_K
+    :param mmr_lambda: 1 ranks by relevance only and 0 by diversity only, defaults to MMR_LAMBDA
+    :param filters: Conditions on the chunk properties (see search_filters)
+    :param repositories: The repositories to search, all of them when None
     :return: List of similar items
     """
+    mode = mode or settings.SEARCH_MODE
+    alpha = settings.HYBRID_ALPHA if alpha is None else alpha
+    fusion = fusion or settings.HYBRID_FUSION
+    if mmr:
+        fetch_k = max(top_k, fetch_k or settings.MMR_FETCH_K)
+        mmr_lambda = settings.MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    else:
+        fetch_k = mmr_lambda = None
+    key = (
+        "similarity_search", normalize_query(prompt), top_k, mode, alpha, fusion, fetch_k, mmr_lambda,
+        tuple((name, operator, repr(value)) for name, operator, value in filters or ()),
+        tuple(sorted(repositories or ())),
+    )
+    results = await single_flight.do(
+        key,
+        "similarity_search",
+        lambda: search_documentation(
+            prompt, top_k, query_vector, mode, alpha, fusion, fetch_k, mmr_lambda, filters, repositories
+        ),
+    )
+    # Every caller gets its own list
+    return list(results)
+
+
+def merge_results(results_per_store: List[List[StoredObject]], mode: str, limit: int) -> List[StoredObject]:
+    """
+    Merge the results of a search fanned out across tenants: by fused score in hybrid mode
+    (each tenant fuses its own rankings), by distance otherwise.
+    """
+    if len(results_per_store) == 1:
+        return results_per_store[0]
+    results = [result for results in results_per_store for result in results]
+
+    def distance(result):
+        return float("inf") if result.metadata.distance is None else result.metadata.distance
+
+    if mode == "hybrid":
+        # Equal ranks of different tenants get equal fused scores, the closest one comes first
+        results.sort(key=lambda result: (-(result.metadata.score or 0), distance(result)))
+    else:
+        results.sort(key=distance)
+    return results[:limit]
+
+
+async def search_documentation(
+    prompt, top_k, query_vector, mode, alpha, fusion, fetch_k=None, mmr_lambda=None, filters=None, repositories=None
+):
     try:
-        documentation_collection = client.collections.get(DOCUMENTATION_CLASS_NAME)
+        if query_vector is None:
+            query_vector = await get_embeddings(prompt)
+
+        # With MMR, a larger pool of candidates is fetched with the vectors, then re-ranked
+        limit = top_k if fetch_k is None else fetch_k
+        include_vector = fetch_k is not None
+
+        # Without tenants, the repositories are a filter of the shared index
+        if repositories and not await is_multi_tenant():
+            filters = [*(filters or []), ("repository", "contains_any", list(repositories))]
+
+        async def search_store(vector_store):
+            if mode == "hybrid":
+                return await vector_store.hybrid(
+                    prompt,
+                    query_vector,
+                    limit,
+                    alpha=alpha,
+                    fusion=fusion,
+                    filters=filters,
+                    include_vector=include_vector,
+                )
+            return await vector_store.near_vector(query_vector, limit, filters=filters, include_vector=include_vector)
+
+        stores = await search_stores(repositories)
+        with SEARCH_LATENCY.labels(mode=mode, backend=settings.VECTOR_STORE_BACKEND).time():
+            responses = await asyncio.gather(
+                *(search_store(vector_store) for vector_store in stores), return_exceptions=True
+            )
 
-        query_vector = get_embeddings(prompt)
+        # A tenant failing (deactivated meanwhile for example) doesn't fail the whole search
+        results_per_store = []
+        for vector_store, response in zip(stores, responses):
+            if isinstance(response, Exception):
+                print(f"Error searching tenant {vector_store.tenant}: {response}")
+            else:
+                results_per_store.append(response)
+        results = merge_results(results_per_store, mode, limit) if results_per_store else []
+        if fetch_k is None:
+            return results
 
-        response = documentation_collection.query.near_vector(
-            near_vector=query_vector,
-            limit=top_k,
-            return_metadata=MetadataQuery(distance=True),
+        # The candidates without a vector can't be compared, they keep their rank after the others
+        candidates = [result for result in results if result.vector is not None]
+        others = [result for result in results if result.vector is None]
+        selected = maximal_marginal_relevance(
+            query_vector, [result.vector for result in candidates], top_k, mmr_lambda
         )
-        return response.objects
+        ranked = [candidates[index] for index in selected] + others
+        return [dataclasses.replace(result, vector=None) for result in ranked[:top_k]]
 
     except Exception as e:
         print(f"Error performing similarity search: {e}")
@@ -162,8 +636,74 @@ async def get_docs_count():
     Get the total number of documents in the collection.
     """
     try:
-        documentation_collection = client.collections.get(DOCUMENTATION_CLASS_NAME)
-        return len(documentation_collection)
+        return sum([await vector_store.count() for vector_store in await search_stores()])
     except Exception as e:
         print(f"Error getting document count: {e}")     
-        return 0
\ No newline at end of file
+        return 0
+
+
+async def list_repository_tenants() -> Dict[str, Dict]:
+    """
+    The tenants of the documentation collection as {tenant: {"repository": ..., "status": ...}},
+    empty when it's not multi-tenant. The repository is None for a tenant created elsewhere.
+    """
+    if not await is_multi_tenant():
+        return {}
+    repositories = read_tenant_repositories()
+    return {
+        tenant: {"repository": repositories.get(tenant), "status": status}
+        for tenant, status in (await get_tenants(refresh=True)).items()
+    }
+
+
+async def drop_repository(repository: str) -> Dict:
+    """
+    Delete every chunk of a repository. In a multi-tenant collection, its tenant is dropped
+    in one operation, with its vector index; otherwise its chunks are deleted by filter.
+
+    :return: Dict with the tenant (None without multi-tenancy) and the number of deleted chunks
+             (None when the tenant was not active)
+    """
+    if not await is_multi_tenant():
+        deleted = await get_vector_store(DOCUMENTATION_CLASS_NAME).delete_many([("repository", "equal", repository)])
+        tenant = None
+    else:
+        tenant = tenant_name(repository)
+        tenants = await get_tenants(refresh=True)
+        if tenant not in tenants:
+            raise ValueError(f"No tenant for repository {repository}")
+        deleted = None
+        if tenants[tenant] == "active":
+            deleted = await get_vector_store(DOCUMENTATION_CLASS_NAME, tenant).count()
+        await release_vector_store(DOCUMENTATION_CLASS_NAME, tenant)
+        await get_vector_store(DOCUMENTATION_CLASS_NAME).delete_tenants([tenant])
+        tenant_cache["tenants"] = None
+        repositories = read_tenant_repositories()
+        if repositories.pop(tenant, None) is not None:
+            write_tenant_repositories(repositories)
+
+    if semantic_cache is not None:
+        semantic_cache.invalidate()
+    return {"repository": repository, "tenant": tenant, "deleted_chunks": deleted}
+
+
+async def set_repository_status(repository: str, status: str) -> Dict:
+    """
+    Activate, deactivate or offload the tenant of a repository. Inactive and offloaded tenants
+    free their memory and are left out of the searches until they are activated again.
+    """
+    if not await is_multi_tenant():
+        raise ValueError(f"Collection '{DOCUMENTATION_CLASS_NAME}' is not multi-tenant")
+    tenant = tenant_name(repository)
+    if tenant not in await get_tenants(refresh=True):
+        raise ValueError(f"No tenant for repository {repository}")
+
+    if status != "active":
+        await release_vector_store(DOCUMENTATION_CLASS_NAME, tenant)
+    await get_vector_store(DOCUMENTATION_CLASS_NAME).set_tenant_status(tenant, status)
+    tenant_cache["tenants"] = None
+
+    # Answers may cite the repository that left (or miss the one that came back)
+    if semantic_cache is not None:
+        semantic_cache.invalidate()
+    return {"repository": repository, "tenant": tenant, "status": status}
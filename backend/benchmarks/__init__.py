@@ -0,0 +1,21 @@
+"""
+Offline benchmarks for the backend, run from the backend directory:
+
+    python -m benchmarks.bench_parser
+"""
+import os
+
+# The benchmarks never call the upstream services, placeholders are enough to load the settings
+for name, value in {
+    "FRONTEND_URL": "http://localhost",
+    "WEAVIATE_HOST": "localhost",
+    "WEAVIATE_PORT": "8080",
+    "WEAVIATE_API_KEY": "benchmark",
+    "GROQ_API_KEY": "benchmark",
+    "LLM_MODEL": "llama-3.3-70b-versatile",
+    "OPENAI_API_KEY": "benchmark",
+    "OPENAI_API_VERSION": "2023-12-01-preview",
+    "OPENAI_AZURE_ENDPOINT": "https://benchmark.openai.azure.com/",
+    "EMBEDDING_CACHE_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,72 @@
+"""
+Compare LangChain's TokenTextSplitter with the single-pass tiktoken chunker,
+serially and across the process pool, on the files of a bundled gitingest dump.
+
+    python -m benchmarks.bench_chunker
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.core.config import settings
+from app.services.chunking_service import chunk_text, chunk_texts, get_encoding
+from app.services.documentation_service import iter_repository_file
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+
+
+def langchain_splitter(texts, chunk_size, chunk_overlap):
+    from langchain.text_splitter import TokenTextSplitter
+
+    # Same encoding as the new chunker, so both produce comparable chunks
+    text_splitter = TokenTextSplitter(
+        encoding_name=settings.CHUNK_ENCODING, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    return [text_splitter.split_text(text) for text in texts]
+
+
+def single_pass_serial(texts, chunk_size, chunk_overlap):
+    return [chunk_text(text, chunk_size, chunk_overlap) for text in texts]
+
+
+def single_pass_parallel(texts, chunk_size, chunk_overlap):
+    return asyncio.run(chunk_texts(texts, chunk_size, chunk_overlap))
+
+
+CHUNKERS = {
+    "langchain TokenTextSplitter": langchain_splitter,
+    "single-pass (1 process)": single_pass_serial,
+    "single-pass (process pool)": single_pass_parallel,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=100)
+    arg_parser.add_argument("--repeat", type=int, default=1, help="Repeat the files to get a bigger corpus")
+    args = arg_parser.parse_args()
+
+    texts = [content for _, content in iter_repository_file(args.source) if len(content) > 50] * args.repeat
+    encoding = get_encoding(settings.CHUNK_ENCODING)
+    total_tokens = sum(len(encoding.encode_ordinary(text)) for text in texts)
+    print(f"{len(texts)} files, {total_tokens} tokens ({settings.CHUNK_ENCODING})")
+
+    # Start the workers before timing, as the API process does once at the first ingestion
+    single_pass_parallel(texts[:1], args.chunk_size, args.chunk_overlap)
+
+    for name, chunker in CHUNKERS.items():
+        started_at = time.perf_counter()
+        chunks = chunker(texts, args.chunk_size, args.chunk_overlap)
+        elapsed = time.perf_counter() - started_at
+        print(
+            f"{name:>28}: {sum(len(file_chunks) for file_chunks in chunks)} chunks, {elapsed:.2f} s, "
+            f"{len(texts) / elapsed:.0f} files/s, {total_tokens / elapsed / 1000:.0f}k tokens/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
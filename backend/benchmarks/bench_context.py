@@ -0,0 +1,124 @@
+"""
+Compare the RAG prompt context built as the Python repr of the snippets (the previous
+build_messages) with the packed context (context_service.pack_context), in tokens,
+for questions taken from the chunks of a bundled gitingest dump.
+
+The snippets are retrieved with the fake embedder, whose distances are not calibrated
+like the ada-002 ones, so the distance cutoff is off unless --max-distance is given.
+
+With --mmr, the snippets are re-ranked by maximal marginal relevance like in get_response.
+
+    python -m benchmarks.bench_context --top-k 5 --token-budget 3000
+    python -m benchmarks.bench_context --mmr --fetch-k 20 --mmr-lambda 0.5
+"""
+import argparse
+import asyncio
+import os
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.core.config import settings
+from app.services.chunking_service import chunk_texts, get_encoding
+from app.services.context_service import format_context, pack_context
+from app.services.documentation_service import iter_repository_file
+from app.services.vector_store import ObjectMetadata, StoredObject
+from app.services.vector_store.mmr import maximal_marginal_relevance
+from benchmarks.fake_embedder import fake_embedding, fake_embeddings
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+REPOSITORY_NAME = "kubeflow/website"
+
+
+def legacy_context(snippets):
+    """
+    The context of the previous build_messages.
+    """
+    return str([
+        {
+            "Documentation URL": snippet.properties.get("documentURL"),
+            "content": snippet.properties.get("documentContent"),
+        }
+        for snippet in snippets
+    ])
+
+
+async def load_chunks(args):
+    files = [(filename, content) for filename, content in iter_repository_file(args.source) if len(content) > 50]
+    file_chunks = await chunk_texts([content for _, content in files], args.chunk_size, args.chunk_overlap)
+    return [
+        {
+            "documentURL": "https://github.com/" + REPOSITORY_NAME,
+            "documentContent": chunk["content"],
+            "repository": REPOSITORY_NAME,
+            "filePath": filename,
+            "fileHash": filename,
+            "chunkIndex": index,
+            "startOffset": chunk["startOffset"],
+            "endOffset": chunk["endOffset"],
+        }
+        for (filename, _), chunks in zip(files, file_chunks)
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=100)
+    arg_parser.add_argument("--questions", type=int, default=200)
+    arg_parser.add_argument("--top-k", type=int, default=settings.RAG_TOP_K)
+    arg_parser.add_argument("--token-budget", type=int, default=settings.CONTEXT_TOKEN_BUDGET)
+    arg_parser.add_argument("--max-distance", type=float, default=None)
+    arg_parser.add_argument("--mmr", action="store_true")
+    arg_parser.add_argument("--fetch-k", type=int, default=settings.MMR_FETCH_K)
+    arg_parser.add_argument("--mmr-lambda", type=float, default=settings.MMR_LAMBDA)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    chunks = asyncio.run(load_chunks(args))
+    vectors = fake_embeddings([chunk["documentContent"] for chunk in chunks])
+    encoding = get_encoding(settings.CHUNK_ENCODING)
+
+    # Questions: a sentence-sized piece of random chunks
+    rng = np.random.default_rng(args.seed)
+    legacy_tokens = []
+    packed_tokens = []
+    legacy_snippets = []
+    packed_snippets = []
+    for row in rng.choice(len(chunks), size=min(args.questions, len(chunks)), replace=False):
+        content = chunks[row]["documentContent"]
+        start = int(rng.integers(0, max(1, len(content) - 200)))
+        question = content[start : start + 200]
+
+        question_vector = fake_embedding(question)
+        distances = 1 - vectors @ question_vector
+        top = np.argsort(distances)[: args.top_k]
+        if args.mmr:
+            candidates = np.argsort(distances)[: max(args.top_k, args.fetch_k)]
+            top = candidates[maximal_marginal_relevance(question_vector, vectors[candidates], args.top_k, args.mmr_lambda)]
+        context = [
+            StoredObject(uuid=str(index), properties=chunks[index], metadata=ObjectMetadata(distance=float(distances[index])))
+            for index in top
+        ]
+        packed = pack_context(context, token_budget=args.token_budget, max_distance=args.max_distance)
+
+        legacy_tokens.append(len(encoding.encode_ordinary(legacy_context(context))))
+        packed_tokens.append(len(encoding.encode_ordinary(format_context(packed))))
+        legacy_snippets.append(len(context))
+        packed_snippets.append(len(packed))
+
+    legacy_mean = np.mean(legacy_tokens)
+    packed_mean = np.mean(packed_tokens)
+    mmr = f", MMR over {args.fetch_k} candidates (lambda {args.mmr_lambda})" if args.mmr else ""
+    print(f"{len(legacy_tokens)} questions, top_k {args.top_k}, budget {args.token_budget} tokens{mmr}")
+    print(f"  repr context: {legacy_mean:7.0f} tokens on average (p95 {np.percentile(legacy_tokens, 95):.0f}), "
+          f"{np.mean(legacy_snippets):.1f} snippets")
+    print(f"packed context: {packed_mean:7.0f} tokens on average (p95 {np.percentile(packed_tokens, 95):.0f}), "
+          f"{np.mean(packed_snippets):.1f} snippets")
+    print(f"saved: {(1 - packed_mean / legacy_mean) * 100:.1f}% of the context tokens")
+
+
+if __name__ == "__main__":
+    main()
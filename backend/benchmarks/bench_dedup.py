@@ -0,0 +1,87 @@
+"""
+Measure the near-duplicate chunk elimination (dedup_service.deduplicate_chunks) on the
+chunks of a bundled gitingest dump: the embeddings and vector index memory it saves at a
+few thresholds, how long it takes, and the exact Jaccard similarity of the dropped chunks
+with their canonical chunk (the MinHash signatures only estimate it).
+
+    python -m benchmarks.bench_dedup --thresholds 0.8 0.9 0.95
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.core.config import settings
+from app.services.chunking_service import chunk_texts
+from app.services.dedup_service import deduplicate_chunks, parse_alias, shingle_hashes
+from app.services.documentation_service import iter_repository_file
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+
+
+async def load_chunks(args):
+    files = [(filename, content) for filename, content in iter_repository_file(args.source) if len(content) > 50]
+    file_chunks = await chunk_texts([content for _, content in files], args.chunk_size, args.chunk_overlap)
+    return [
+        {
+            "documentContent": chunk["content"],
+            "filePath": filename,
+            "fileHash": filename,
+            "chunkIndex": index,
+            "chunkCount": len(chunks),
+            "startOffset": chunk["startOffset"],
+            "endOffset": chunk["endOffset"],
+        }
+        for (filename, _), chunks in zip(files, file_chunks)
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+def exact_jaccard(kept, chunks):
+    """
+    The exact Jaccard similarity of the shingles of each dropped chunk and its canonical chunk.
+    """
+    by_position = {(chunk["filePath"], chunk["chunkIndex"]): chunk for chunk in chunks}
+    word_hashes = {}
+    similarities = []
+    for canonical in kept:
+        canonical_shingles = set(shingle_hashes(canonical["documentContent"], word_hashes).tolist())
+        for alias in canonical.get("aliases", []):
+            alias = parse_alias(alias)
+            duplicate = by_position[(alias["filePath"], alias["chunkIndex"])]
+            shingles = set(shingle_hashes(duplicate["documentContent"], word_hashes).tolist())
+            similarities.append(len(canonical_shingles & shingles) / len(canonical_shingles | shingles))
+    return similarities
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=100)
+    arg_parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9, 0.95])
+    arg_parser.add_argument("--num-perm", type=int, default=settings.DEDUP_NUM_PERM)
+    args = arg_parser.parse_args()
+
+    chunks = asyncio.run(load_chunks(args))
+    print(f"{len(chunks)} chunks, {args.num_perm} permutations, index profile {settings.VECTOR_INDEX_PROFILE}")
+    for threshold in args.thresholds:
+        started_at = time.perf_counter()
+        kept, report = deduplicate_chunks(chunks, threshold=threshold, num_perm=args.num_perm)
+        elapsed = time.perf_counter() - started_at
+
+        similarities = exact_jaccard(kept, chunks)
+        jaccard = (
+            f"exact Jaccard min {min(similarities):.2f} / mean {np.mean(similarities):.2f}" if similarities else "-"
+        )
+        print(f"threshold {threshold:.2f}: {report['duplicate_chunks']:5d} duplicates "
+              f"({report['duplicate_chunks'] / max(1, len(chunks)) * 100:.1f}%), "
+              f"{report['vector_mb_saved']:.2f} MB of vectors, {report['index_memory_mb_saved']:.2f} MB of index saved, "
+              f"{jaccard}, {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
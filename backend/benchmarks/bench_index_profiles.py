@@ -0,0 +1,155 @@
+"""
+Compare the vector index profiles (see app/services/vector_store/index_profiles.py)
+on the chunks of a bundled gitingest dump: estimated index memory, build time,
+query latency and recall@k against an exact search.
+
+Needs a running Weaviate (WEAVIATE_HOST/WEAVIATE_PORT, localhost:8080 by default).
+The chunks are embedded offline with the fake embedder, or with Azure OpenAI using
+--embeddings openai (export the OPENAI_* settings first).
+
+    python -m benchmarks.bench_index_profiles --profiles default hnsw-pq hnsw-bq flat
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import time
+
+import numpy as np
+from weaviate.util import generate_uuid5
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.core.db import get_weaviate_client
+from app.services.chunking_service import chunk_texts
+from app.services.documentation_service import iter_repository_file
+from app.services.vector_store import INDEX_PROFILES, NewObject, estimate_index_memory
+from app.services.vector_store.weaviate_store import WeaviateVectorStore
+from benchmarks.fake_embedder import fake_embeddings
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    similarities = queries @ corpus.T
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    return top
+
+
+async def load_corpus(args):
+    texts = [content for _, content in iter_repository_file(args.source) if len(content) > 50]
+    chunks = [
+        chunk["content"]
+        for file_chunks in await chunk_texts(texts, args.chunk_size, args.chunk_overlap)
+        for chunk in file_chunks
+    ]
+
+    if args.embeddings == "openai":
+        from app.services.embedding_service import get_embeddings_batch
+
+        vectors, errors = await get_embeddings_batch(chunks)
+        if errors:
+            raise RuntimeError(f"{len(errors)} chunks failed to be embedded, first error: {next(iter(errors.values()))}")
+        return chunks, np.asarray(vectors, dtype=np.float32)
+    return chunks, fake_embeddings(chunks)
+
+
+async def benchmark_profile(name, profile, corpus, queries, truth, args):
+    collection_name = "IndexBenchmark_" + name.replace("-", "_")
+    client = await get_weaviate_client()
+    await client.collections.delete(collection_name)
+    store = WeaviateVectorStore(collection_name)
+
+    # PQ is only applied once the collection holds the training limit, which a small corpus may never reach
+    if profile.quantization == "pq" and profile.pq_training_limit and profile.pq_training_limit > len(corpus):
+        profile = dataclasses.replace(profile, pq_training_limit=len(corpus))
+    await store.create_collection(profile)
+
+    started_at = time.perf_counter()
+    for start in range(0, len(corpus), args.batch_size):
+        _, errors = await store.insert_many([
+            NewObject(properties={"chunkIndex": row}, vector=corpus[row].tolist(), uuid=generate_uuid5(row))
+            for row in range(start, min(start + args.batch_size, len(corpus)))
+        ])
+        if errors:
+            raise RuntimeError(f"Insert failed for {name}: {next(iter(errors.values()))}")
+    build_time = time.perf_counter() - started_at
+    # Let the asynchronous compression and indexing settle before querying
+    await asyncio.sleep(args.settle)
+
+    rows = {str(generate_uuid5(row)): row for row in range(len(corpus))}
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, truth):
+        started_at = time.perf_counter()
+        results = await store.near_vector(query.tolist(), args.k)
+        latencies.append(time.perf_counter() - started_at)
+        found = {rows[result.uuid] for result in results}
+        recalls.append(len(found & set(expected.tolist())) / args.k)
+
+    if not args.keep:
+        await client.collections.delete(collection_name)
+
+    return {
+        "profile": name,
+        "description": profile.description,
+        "objects": len(corpus),
+        "estimated_memory_mb": round(estimate_index_memory(profile, len(corpus), corpus.shape[1]) / 2**20, 1),
+        "build_seconds": round(build_time, 2),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        f"recall@{args.k}": round(float(np.mean(recalls)), 4),
+    }
+
+
+async def run(args):
+    chunks, vectors = await load_corpus(args)
+
+    # Held-out chunks are the queries, the exact search over the others is the ground truth
+    order = np.random.default_rng(args.seed).permutation(len(chunks))
+    queries = vectors[order[: args.queries]]
+    corpus = vectors[order[args.queries :]]
+    truth = exact_neighbours(corpus, queries, args.k)
+    print(f"{len(corpus)} chunks of {corpus.shape[1]} dims ({args.embeddings} embeddings), {len(queries)} queries")
+
+    results = []
+    for name in args.profiles:
+        result = await benchmark_profile(name, INDEX_PROFILES[name], corpus, queries, truth, args)
+        results.append(result)
+        print(
+            f"{name:>17}: ~{result['estimated_memory_mb']} MB, build {result['build_seconds']} s, "
+            f"p50 {result['latency_p50_ms']} ms, p95 {result['latency_p95_ms']} ms, "
+            f"recall@{args.k} {result[f'recall@{args.k}']}"
+        )
+
+    client = await get_weaviate_client()
+    await client.close()
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--profiles", nargs="+", choices=list(INDEX_PROFILES), default=list(INDEX_PROFILES))
+    arg_parser.add_argument("--embeddings", choices=["fake", "openai"], default="fake")
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=100)
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--batch-size", type=int, default=200)
+    arg_parser.add_argument("--settle", type=float, default=5.0, help="Seconds to wait between inserting and querying")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections")
+    arg_parser.add_argument("--output", help="Write the results to this JSON file")
+    args = arg_parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
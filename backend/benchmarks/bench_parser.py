@@ -0,0 +1,112 @@
+"""
+Compare the legacy whole-file regex parser with the memory-mapped streaming parser
+on a synthetic gitingest dump built by repeating a bundled one.
+
+    python -m benchmarks.bench_parser --size-mb 300
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import tempfile
+import time
+import tracemalloc
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.services.documentation_service import iter_repository_file
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+
+
+def legacy_parse(file_path):
+    """
+    The previous parse_repository_file: read everything, regex over the whole string, slice.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        content = file.read()
+
+    separator_pattern = r'={48,}\s*File:\s*(.*?)\s*={48,}'
+    matches = list(re.finditer(separator_pattern, content, re.DOTALL))
+    filenames = [match.group(1).strip() for match in matches]
+    start_positions = [match.start() for match in matches]
+
+    file_contents = []
+    for i in range(len(start_positions)):
+        content_start = start_positions[i] + len(matches[i].group(0))
+        content_end = start_positions[i + 1] if i < len(start_positions) - 1 else len(content)
+        file_contents.append((filenames[i], content[content_start:content_end].strip()))
+    return file_contents
+
+
+PARSERS = {
+    "legacy": legacy_parse,
+    "streaming": iter_repository_file,
+}
+
+
+def build_dump(source, size_mb, directory):
+    """
+    Write a dump of about size_mb megabytes by repeating the source dump.
+    """
+    with open(source, "rb") as file:
+        data = file.read()
+    path = os.path.join(directory, f"dump_{size_mb}mb.txt")
+    with open(path, "wb") as file:
+        written = 0
+        while written < size_mb * 1024 * 1024:
+            file.write(data)
+            written += len(data)
+    return path
+
+
+def run(parser_name, path, results):
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    files = 0
+    characters = 0
+    # Consume the files one by one, as the ingestion pipeline does
+    for _, content in PARSERS[parser_name](path):
+        files += 1
+        characters += len(content)
+    elapsed = time.perf_counter() - started_at
+    _, peak_heap = tracemalloc.get_traced_memory()
+    results.put({
+        "parser": parser_name,
+        "files": files,
+        "characters": characters,
+        "seconds": elapsed,
+        "peak_heap_mb": peak_heap / 1024 / 1024,
+        # Includes the pages of the memory-mapped dump, which the kernel can reclaim at any time
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--size-mb", type=int, default=300)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = build_dump(args.source, args.size_mb, directory)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Dump: {size_mb:.0f} MB")
+
+        # Each parser runs in its own process so the peak RSS is not shared
+        context = multiprocessing.get_context("spawn")
+        for parser_name in PARSERS:
+            results = context.Queue()
+            process = context.Process(target=run, args=(parser_name, path, results))
+            process.start()
+            result = results.get()
+            process.join()
+            print(
+                f"{result['parser']:>10}: {result['files']} files, {result['seconds']:.2f} s, "
+                f"{size_mb / result['seconds']:.0f} MB/s, peak Python heap {result['peak_heap_mb']:.1f} MB, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
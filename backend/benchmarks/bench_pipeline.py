@@ -0,0 +1,262 @@
+"""
+Cost of each stage of the ingestion pipeline (documentation_service), fully offline,
+on a bundled gitingest dump and synthetic dumps made of several copies of it.
+
+The network is replaced by stand-ins: the dump is copied instead of downloaded, the
+chunks are embedded with the deterministic fake embedder and stored in the embedded
+NumPy vector store. Every scale runs in its own process, and each stage reports its
+wall time, peak RSS and throughput. Results are saved as JSON, pass a previous
+result file to --compare to see the regressions between two versions.
+
+    python -m benchmarks.bench_pipeline --scales 1 10 100 --output pipeline.json
+"""
+import os
+import tempfile
+
+# The embedded vector store stands in for Weaviate, this must be set before the settings are loaded
+os.environ["VECTOR_STORE_BACKEND"] = "numpy"
+os.environ.setdefault("NUMPY_STORE_PATH", os.path.join(tempfile.gettempdir(), "bench_pipeline_store"))
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.core.config import settings
+from app.services import documentation_service, weaviate_service
+from app.services.chunking_service import get_executor
+from benchmarks.fake_embedder import fake_embeddings
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+REPOSITORY_NAME = "benchmark/pipeline"
+
+SEPARATOR = "=" * 48
+
+
+class PeakRSS:
+    """
+    Peak resident memory of the current process while the block runs, sampled from /proc
+    (Linux). Elsewhere, falls back to the high-water mark of the whole process.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def current() -> int:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def sample(self):
+        while self.running:
+            self.peak = max(self.peak, self.current())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        if os.path.exists("/proc/self/statm"):
+            self.peak = self.current()
+            self.running = True
+            self.thread = threading.Thread(target=self.sample, daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.thread is not None:
+            self.running = False
+            self.thread.join()
+            self.peak = max(self.peak, self.current())
+        else:
+            # Kilobytes on Linux, bytes on macOS
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = max_rss if platform.system() == "Darwin" else max_rss * 1024
+
+
+def build_dump(source, scale, directory):
+    """
+    Write a dump made of scale copies of the source dump, each copy under its own
+    directory so every file path stays unique.
+    """
+    files = list(documentation_service.iter_repository_file(source))
+    path = os.path.join(directory, f"dump_{scale}x.txt")
+    with open(path, "w", encoding="utf-8") as file:
+        for copy in range(scale):
+            for filename, content in files:
+                filename = filename if scale == 1 else f"copy{copy}/{filename}"
+                file.write(f"{SEPARATOR}\nFile: {filename}\n{SEPARATOR}\n{content}\n\n")
+    return path
+
+
+async def fake_embeddings_batch(texts, batch_size=None):
+    return list(fake_embeddings(texts)), {}
+
+
+async def run_stages(dump_path, directory, chunk_size, chunk_overlap):
+    stages = []
+    dump_mb = os.path.getsize(dump_path) / 1024 / 1024
+
+    async def measure(stage, function, count_items, unit):
+        with PeakRSS() as rss:
+            started_at = time.perf_counter()
+            result = await function()
+            elapsed = time.perf_counter() - started_at
+        items = count_items(result)
+        stages.append({
+            "stage": stage,
+            "wall_seconds": round(elapsed, 3),
+            "peak_rss_mb": round(rss.peak / 1024 / 1024, 1),
+            "items": items,
+            "unit": unit,
+            "items_per_second": round(items / elapsed, 1) if elapsed > 0 else None,
+            "mb_per_second": round(dump_mb / elapsed, 1) if elapsed > 0 else None,
+        })
+        print(
+            f"{stage:>18}: {elapsed:8.2f} s, peak RSS {stages[-1]['peak_rss_mb']:7.1f} MB, "
+            f"{items} {unit} ({stages[-1]['items_per_second']}/s)"
+        )
+        return result
+
+    # Download stand-in: copy the dump where the pipeline expects it
+    downloaded_path = os.path.join(directory, "parsed_repositories", REPOSITORY_NAME, "code.txt")
+
+    async def download():
+        os.makedirs(os.path.dirname(downloaded_path), exist_ok=True)
+        shutil.copyfile(dump_path, downloaded_path)
+        return downloaded_path
+
+    await measure("download", download, lambda _: round(dump_mb, 1), "MB")
+
+    async def download_and_save_repository(repository_name):
+        return downloaded_path
+
+    documentation_service.download_and_save_repository = download_and_save_repository
+    weaviate_service.get_embeddings_batch = fake_embeddings_batch
+
+    async def parse():
+        return sum(1 for _ in await documentation_service.parse_repository_file(REPOSITORY_NAME))
+
+    async def preprocess():
+        return sum(1 for _ in await documentation_service.preprocess_repository_file(REPOSITORY_NAME))
+
+    await measure("parse", parse, lambda files: files, "files")
+    await measure("preprocess", preprocess, lambda files: files, "files")
+
+    # Each stage runs the real function, chunking streams through parsing and preprocessing
+    chunks = await measure(
+        "chunk",
+        lambda: documentation_service.chunk_repository_contents(REPOSITORY_NAME, chunk_size, chunk_overlap),
+        len,
+        "chunks",
+    )
+
+    await weaviate_service.create_documentation_collection()
+    await measure(
+        "embed + insert",
+        lambda: weaviate_service.add_documentation_items(chunks),
+        lambda result: result["inserted"],
+        "chunks",
+    )
+    del chunks
+
+    # A second sync of the same dump, where every file is unchanged
+    await measure(
+        "resync (unchanged)",
+        lambda: documentation_service.embed_repository_to_vector_db(REPOSITORY_NAME, chunk_size, chunk_overlap),
+        lambda report: report["files"]["unchanged"],
+        "files",
+    )
+    return stages
+
+
+def run_scale(source, scale, chunk_size, chunk_overlap, results):
+    with tempfile.TemporaryDirectory() as directory:
+        # Every scale starts from an empty store
+        shutil.rmtree(settings.NUMPY_STORE_PATH, ignore_errors=True)
+        dump_path = build_dump(source, scale, directory)
+        print(f"Scale {scale}x: {os.path.getsize(dump_path) / 1024 / 1024:.1f} MB dump")
+        stages = asyncio.run(run_stages(dump_path, directory, chunk_size, chunk_overlap))
+        get_executor().shutdown()  # The idle chunking workers would keep this process from exiting
+        shutil.rmtree(settings.NUMPY_STORE_PATH, ignore_errors=True)
+        results.put({"scale": scale, "dump_mb": round(os.path.getsize(dump_path) / 1024 / 1024, 1), "stages": stages})
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    """
+    Print the wall time and peak RSS changes of every stage against a previous result file.
+    """
+    with open(previous_path, "r", encoding="utf-8") as file:
+        previous = json.load(file)
+    previous_stages = {
+        (run["scale"], stage["stage"]): stage for run in previous["runs"] for stage in run["stages"]
+    }
+    print(f"\nCompared with {previous_path} (commit {previous.get('commit')}):")
+    for run in results["runs"]:
+        for stage in run["stages"]:
+            before = previous_stages.get((run["scale"], stage["stage"]))
+            if before is None or not before["wall_seconds"]:
+                continue
+            time_change = (stage["wall_seconds"] - before["wall_seconds"]) / before["wall_seconds"] * 100
+            rss_change = stage["peak_rss_mb"] - before["peak_rss_mb"]
+            print(f"{run['scale']:>4}x {stage['stage']:>18}: time {time_change:+6.1f}%, peak RSS {rss_change:+8.1f} MB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=100)
+    arg_parser.add_argument("--output", help="Write the results to this JSON file")
+    arg_parser.add_argument("--compare", help="A previous result file to compare with")
+    args = arg_parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+        "runs": [],
+    }
+
+    # Each scale runs in its own process so the peak RSS is not shared
+    context = multiprocessing.get_context("spawn")
+    for scale in args.scales:
+        queue = context.Queue()
+        process = context.Process(
+            target=run_scale, args=(args.source, scale, args.chunk_size, args.chunk_overlap, queue)
+        )
+        process.start()
+        results["runs"].append(queue.get())
+        process.join()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare the previous preprocessing (files over 50 characters, every file in overlapping
+token windows) with the content-aware filtering (preprocessing_service) and the
+structure-aware splitting of Markdown, Python and YAML (chunking_service), on a bundled
+gitingest dump: files kept, chunks and tokens sent to the embeddings API.
+
+    python -m benchmarks.bench_preprocessing --chunk-size 1000 --chunk-overlap 100
+"""
+import argparse
+import asyncio
+import os
+from collections import Counter
+
+import benchmarks  # noqa: F401  (loads the placeholder settings)
+from app.services.chunking_service import chunk_texts, detect_language
+from app.services.documentation_service import iter_repository_file
+from app.services.preprocessing_service import filter_reason, get_repository_rules
+
+DEFAULT_SOURCE = os.path.join("parsed_repositories", "kubeflow", "website", "code.txt")
+
+
+def summarize(name, files, file_chunks):
+    chunks = sum(len(chunks) for chunks in file_chunks)
+    tokens = sum(chunk["tokenCount"] for chunks in file_chunks for chunk in chunks)
+    print(f"{name:>20}: {len(files):4d} files, {chunks:5d} chunks, {tokens:8d} tokens embedded "
+          f"({tokens / max(1, chunks):.0f} tokens per chunk)")
+    return chunks, tokens
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--source", default=DEFAULT_SOURCE)
+    arg_parser.add_argument("--repository", default="kubeflow/website", help="Repository of the include/exclude rules")
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    arg_parser.add_argument("--chunk-overlap", type=int, default=100)
+    args = arg_parser.parse_args()
+
+    files = list(iter_repository_file(args.source))
+    rules = get_repository_rules(args.repository)
+
+    legacy_files = [(filename, content) for filename, content in files if len(content) > 50]
+    reasons = Counter(filter_reason(filename, content, rules) for filename, content in files)
+    kept_files = [(filename, content) for filename, content in files if filter_reason(filename, content, rules) is None]
+
+    legacy_chunks = asyncio.run(
+        chunk_texts([content for _, content in legacy_files], args.chunk_size, args.chunk_overlap)
+    )
+    filtered_chunks = asyncio.run(
+        chunk_texts([content for _, content in kept_files], args.chunk_size, args.chunk_overlap)
+    )
+    split_chunks = asyncio.run(chunk_texts(
+        [content for _, content in kept_files],
+        args.chunk_size,
+        args.chunk_overlap,
+        languages=[detect_language(filename) for filename, _ in kept_files],
+    ))
+
+    print(f"{len(files)} files, chunk size {args.chunk_size}, overlap {args.chunk_overlap}")
+    print("removed: " + ", ".join(f"{count} {reason}" for reason, count in reasons.items() if reason is not None))
+    chunks, tokens = summarize("previous", legacy_files, legacy_chunks)
+    summarize("filtered", kept_files, filtered_chunks)
+    new_chunks, new_tokens = summarize("filtered + split", kept_files, split_chunks)
+    print(f"saved: {(1 - new_chunks / chunks) * 100:.1f}% of the chunks, {(1 - new_tokens / tokens) * 100:.1f}% of the tokens")
+
+    languages = Counter(detect_language(filename) or "other" for filename, _ in kept_files)
+    print("languages: " + ", ".join(f"{count} {language}" for language, count in languages.most_common()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Deterministic stand-in for the embeddings API, so the benchmarks run offline.
+
+Words are hashed into the dimensions of the vector (feature hashing): texts sharing words
+get close vectors, like real embeddings of related chunks, and the same text always gets
+the same vector, in every process and every run.
+"""
+import hashlib
+import math
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from app.services.vector_store.keyword_search import tokenize
+
+DIMENSIONS = 1536  # Same as text-embedding-ada-002
+
+
+def fake_embedding(text: str, dimensions: int = DIMENSIONS) -> np.ndarray:
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term, count in Counter(tokenize(text)).items():
+        digest = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+        sign = 1.0 if digest & 1 else -1.0
+        vector[(digest >> 1) % dimensions] += sign * (1 + math.log(count))
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+def fake_embeddings(texts: List[str], dimensions: int = DIMENSIONS) -> np.ndarray:
+    """
+    The fake embeddings of the texts, as a (len(texts) x dimensions) float32 matrix.
+    """
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for row, text in enumerate(texts):
+        matrix[row] = fake_embedding(text, dimensions)
+    return matrix
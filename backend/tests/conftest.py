@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+# Settings are read when app.core.config is imported, the upstreams are never contacted by the tests
+for name, value in {
+    "FRONTEND_URL": "http://localhost:3000",
+    "WEAVIATE_HOST": "localhost",
+    "WEAVIATE_PORT": "8080",
+    "WEAVIATE_API_KEY": "test",
+    "GROQ_API_KEY": "test",
+    "LLM_MODEL": "llama-3.3-70b-versatile",
+    "OPENAI_API_KEY": "test",
+    "OPENAI_API_VERSION": "2023-12-01-preview",
+    "OPENAI_AZURE_ENDPOINT": "https://test.openai.azure.com/",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+def encoding_available() -> bool:
+    """
+    Whether the tiktoken encoding can be loaded: it is downloaded on first use,
+    then read from the tiktoken cache (TIKTOKEN_CACHE_DIR).
+    """
+    from app.core.config import settings
+    from app.services.chunking_service import get_encoding
+
+    try:
+        get_encoding(settings.CHUNK_ENCODING)
+    except Exception:
+        return False
+    return True
+
+
+def pytest_collection_modifyitems(config, items):
+    network_items = [item for item in items if item.get_closest_marker("network")]
+    if network_items and not encoding_available():
+        skip = pytest.mark.skip(reason="the tiktoken encoding is not cached and can't be downloaded")
+        for item in network_items:
+            item.add_marker(skip)
@@ -0,0 +1,98 @@
+import pytest
+
+from app.services.chunking_service import chunk_offsets, get_encoding, window_offsets
+
+pytestmark = pytest.mark.network
+
+ENCODING = "cl100k_base"
+TEXT = " ".join(f"Kubeflow pipeline step {index} compiles the component." for index in range(60))
+
+
+def token_count(text):
+    return len(get_encoding(ENCODING).encode_ordinary(text))
+
+
+def test_windows_match_the_token_windows():
+    encoding = get_encoding(ENCODING)
+    tokens = encoding.encode_ordinary(TEXT)
+    offsets = window_offsets(TEXT, 100, 20, ENCODING)
+
+    assert [(start_token, end_token) for _, _, start_token, end_token in offsets][:3] == [(0, 100), (80, 180), (160, 260)]
+    assert offsets[-1][3] == len(tokens)
+    for start, end, start_token, end_token in offsets:
+        assert TEXT[start:end] == encoding.decode(tokens[start_token:end_token])
+
+
+def test_windows_overlap_by_chunk_overlap():
+    offsets = window_offsets(TEXT, 100, 20, ENCODING)
+    for (_, previous_end, _, previous_end_token), (start, _, start_token, _) in zip(offsets, offsets[1:]):
+        assert previous_end_token - start_token == 20
+        assert start < previous_end
+
+
+def test_windows_never_split_a_character():
+    text = "Pipelines 🚀 déployés à l'échelle, 流水线 " * 80
+    offsets = window_offsets(text, 50, 10, ENCODING)
+    assert offsets[0][0] == 0
+    assert offsets[-1][1] == len(text)
+    for start, end, _, _ in offsets:
+        # Every chunk is valid text, without a replacement character from a cut multi-byte character
+        assert "�" not in text[start:end]
+        assert text[start:end].encode("utf-8").decode("utf-8") == text[start:end]
+
+
+def test_short_and_empty_texts():
+    assert window_offsets("", 100, 20, ENCODING) == []
+    text = "A single short sentence."
+    assert window_offsets(text, 100, 20, ENCODING) == [(0, len(text), 0, token_count(text))]
+
+
+def test_overlap_must_be_smaller_than_the_chunk():
+    with pytest.raises(ValueError):
+        window_offsets(TEXT, 100, 100, ENCODING)
+    with pytest.raises(ValueError):
+        chunk_offsets("# Title\n\ntext", 100, 100, ENCODING, language="markdown")
+
+
+def test_plain_text_is_split_in_windows():
+    assert chunk_offsets(TEXT, 100, 20, ENCODING) == window_offsets(TEXT, 100, 20, ENCODING)
+
+
+def test_markdown_is_split_at_the_headings():
+    sections = [f"## Section {index}\n\n" + " ".join(["Katib tunes hyperparameters."] * 12) + "\n\n" for index in range(6)]
+    text = "".join(sections)
+    offsets = chunk_offsets(text, 120, 20, ENCODING, language="markdown")
+
+    assert len(offsets) > 1
+    assert all(text[start:end].startswith("## Section") for start, end, _, _ in offsets)
+    assert all(token_count(text[start:end]) <= 120 for start, end, _, _ in offsets)
+    # The chunks cover the text without overlapping
+    assert offsets[0][0] == 0
+    assert offsets[-1][1] == len(text)
+    assert all(previous[1] == current[0] for previous, current in zip(offsets, offsets[1:]))
+
+
+def test_markdown_headings_inside_code_blocks_are_not_boundaries():
+    code = "```bash\n" + "\n".join(f"# step {index}\nkubectl apply -f manifest-{index}.yaml" for index in range(40)) + "\n```\n"
+    text = "# Install\n\n" + code
+    offsets = chunk_offsets(text, 2000, 100, ENCODING, language="markdown")
+    assert [(start, end) for start, end, _, _ in offsets] == [(0, len(text))]
+
+
+def test_sections_larger_than_a_chunk_are_cut_in_windows():
+    text = "def compile_pipeline():\n" + "".join(f"    step_{index} = component_{index}()\n" for index in range(200))
+    offsets = chunk_offsets(text, 100, 20, ENCODING, language="python")
+    assert len(offsets) > 1
+    assert all(token_count(text[start:end]) <= 100 for start, end, _, _ in offsets)
+    assert offsets[-1][1] == len(text)
+
+
+def test_python_is_split_at_the_definitions():
+    functions = [
+        f"def step_{index}():\n" + "".join(f"    value_{line} = {line}\n" for line in range(3)) + "\n\n"
+        for index in range(12)
+    ]
+    text = "".join(functions)
+    offsets = chunk_offsets(text, 90, 10, ENCODING, language="python")
+    assert len(offsets) > 1
+    assert all(text[start:end].startswith("def step_") for start, end, _, _ in offsets)
@@ -0,0 +1,79 @@
+import pytest
+
+from app.services.chunking_service import get_encoding
+from app.services.context_service import format_context, pack_context
+from app.services.vector_store import ObjectMetadata, StoredObject
+
+pytestmark = pytest.mark.network
+
+ENCODING = "cl100k_base"
+TEXT = "".join(f"Step {index} of the Kubeflow pipeline trains the model. " for index in range(40))
+
+
+def make_snippet(uuid, start, end, distance=0.2, file_path="docs/a.md", **properties):
+    return StoredObject(
+        uuid=uuid,
+        properties={
+            "documentContent": TEXT[start:end],
+            "documentURL": f"https://example.com/{file_path}",
+            "repository": "kubeflow/website",
+            "filePath": file_path,
+            "fileHash": "hash-" + file_path,
+            "startOffset": start,
+            "endOffset": end,
+            **properties,
+        },
+        metadata=ObjectMetadata(distance=distance),
+    )
+
+
+def test_snippets_past_the_distance_cutoff_are_dropped():
+    snippets = [make_snippet("a", 0, 100, 0.1), make_snippet("b", 500, 600, 0.8, "docs/b.md")]
+    assert [snippet.uuid for snippet in pack_context(snippets, 10_000, 0.5, ENCODING)] == ["a"]
+    assert len(pack_context(snippets, 10_000, None, ENCODING)) == 2
+
+
+def test_duplicated_contents_are_kept_once():
+    snippets = [make_snippet("a", 0, 100), make_snippet("b", 0, 100, file_path="docs/b.md")]
+    assert [snippet.uuid for snippet in pack_context(snippets, 10_000, None, ENCODING)] == ["a"]
+
+
+def test_overlapping_chunks_of_a_file_are_merged():
+    snippets = [make_snippet("b", 80, 200, 0.1), make_snippet("a", 0, 120, 0.3)]
+    [merged] = pack_context(snippets, 10_000, None, ENCODING)
+    # The best snippet is kept, with the text of both chunks sent once
+    assert merged.uuid == "b"
+    assert merged.properties["documentContent"] == TEXT[0:200]
+    assert (merged.properties["startOffset"], merged.properties["endOffset"]) == (0, 200)
+    assert merged.metadata.distance == 0.1
+
+
+def test_chunks_of_other_files_or_versions_are_not_merged():
+    snippets = [
+        make_snippet("a", 0, 120),
+        make_snippet("b", 80, 200, file_path="docs/b.md"),
+        make_snippet("c", 90, 210, fileHash="other-version"),
+        make_snippet("d", 120, 240),
+    ]
+    # Adjacent chunks don't overlap
+    assert [snippet.uuid for snippet in pack_context(snippets, 10_000, None, ENCODING)] == ["a", "b", "c", "d"]
+
+
+def test_snippets_are_packed_best_first_into_the_budget():
+    snippets = [make_snippet(str(index), index * 300, index * 300 + 200, file_path=f"docs/{index}.md") for index in range(5)]
+    budget = len(get_encoding(ENCODING).encode_ordinary(format_context(snippets[:2]))) + 2
+    packed = pack_context(snippets, budget, None, ENCODING)
+    assert [snippet.uuid for snippet in packed] == ["0", "1"]
+
+
+def test_the_best_snippet_alone_over_budget_is_truncated():
+    snippets = [make_snippet("a", 0, len(TEXT)), make_snippet("b", 0, 50, file_path="docs/b.md")]
+    packed = pack_context(snippets, 50, None, ENCODING)
+    assert [snippet.uuid for snippet in packed] == ["a"]
+    assert TEXT.startswith(packed[0].properties["documentContent"])
+    assert len(get_encoding(ENCODING).encode_ordinary(format_context(packed))) <= 50
+
+
+def test_empty_snippets_are_skipped():
+    empty = make_snippet("a", 0, 0)
+    assert pack_context([empty], 10_000, None, ENCODING) == []
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from app.services.dedup_service import (
+    MinHasher,
+    deduplicate_chunks,
+    lsh_bands,
+    parse_alias,
+    shingle_hashes,
+)
+
+WORDS = [f"word{index}" for index in range(300)]
+
+
+def make_chunk(text, file_path="docs/a.md", **properties):
+    return {
+        "documentContent": text,
+        "repository": "kubeflow/website",
+        "docSection": "pipelines",
+        "filePath": file_path,
+        "fileHash": "hash-" + file_path,
+        "chunkIndex": 0,
+        **properties,
+    }
+
+
+def jaccard(first, second):
+    first, second = set(first.tolist()), set(second.tolist())
+    return len(first & second) / len(first | second)
+
+
+def test_shingles_are_word_5_grams():
+    word_hashes = {}
+    assert len(shingle_hashes(" ".join(WORDS[:10]), word_hashes)) == 6
+    # Case and punctuation don't matter, like the keyword search tokenization
+    assert np.array_equal(shingle_hashes("Word1, word2 WORD3 word4 word5", {}), shingle_hashes("word1 word2 word3 word4 word5", {}))
+    assert len(shingle_hashes("", word_hashes)) == 0
+    # Texts shorter than a shingle are a single shingle
+    assert len(shingle_hashes("two words", word_hashes)) == 1
+
+
+def test_minhash_estimates_the_jaccard_similarity():
+    hasher = MinHasher(num_perm=256)
+    first = shingle_hashes(" ".join(WORDS[:200]), {})
+    second = shingle_hashes(" ".join(WORDS[50:250]), {})
+    estimate = float(np.mean(hasher.signature(first) == hasher.signature(second)))
+    assert estimate == pytest.approx(jaccard(first, second), abs=0.1)
+
+
+def test_minhash_is_deterministic():
+    shingles = shingle_hashes(" ".join(WORDS[:50]), {})
+    assert np.array_equal(MinHasher(64).signature(shingles), MinHasher(64).signature(shingles))
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9])
+def test_lsh_bands_split_every_permutation(threshold):
+    bands, rows = lsh_bands(threshold, 128)
+    assert bands * rows == 128
+    # The band collision probability rises past 1/2 around the threshold
+    assert 1 - (1 - threshold**rows) ** bands > 0.5
+
+
+def test_near_duplicates_become_aliases_of_the_first_chunk():
+    text = " ".join(WORDS[:200])
+    near_copy = " ".join(WORDS[:199] + ["changed"])
+    chunks = [make_chunk(text), make_chunk(" ".join(WORDS[100:])), make_chunk(near_copy, "docs/b.md")]
+
+    kept, report = deduplicate_chunks(chunks)
+
+    assert [chunk["filePath"] for chunk in kept] == ["docs/a.md", "docs/a.md"]
+    assert [parse_alias(alias)["filePath"] for alias in kept[0]["aliases"]] == ["docs/b.md"]
+    assert "aliases" not in kept[1]
+    assert report["chunks"] == 3
+    assert report["duplicate_chunks"] == report["embeddings_saved"] == 1
+    # The input chunks are left untouched
+    assert "aliases" not in chunks[0]
+
+
+def test_dissimilar_chunks_are_kept():
+    chunks = [make_chunk(" ".join(WORDS[:100])), make_chunk(" ".join(WORDS[100:200]))]
+    kept, report = deduplicate_chunks(chunks)
+    assert len(kept) == 2
+    assert report["duplicate_chunks"] == 0
+
+
+def test_duplicates_are_only_searched_within_the_scope():
+    text = " ".join(WORDS[:200])
+    chunks = [make_chunk(text), make_chunk(text, docSection="notebooks"), make_chunk(text, repository="other/repo")]
+    kept, _ = deduplicate_chunks(chunks)
+    assert len(kept) == 3
+
+
+def test_copies_across_versions_keep_their_version_for_the_filters():
+    text = " ".join(WORDS[:200])
+    chunks = [
+        make_chunk(text, "docs/a.md", docVersion="latest", docVersions=["latest"]),
+        make_chunk(text, "docs/v1/a.md", docVersion="v1", docVersions=["v1"]),
+    ]
+    kept, _ = deduplicate_chunks(chunks)
+    assert len(kept) == 1
+    assert kept[0]["docVersions"] == ["latest", "v1"]
+    assert parse_alias(kept[0]["aliases"][0])["docVersion"] == "v1"
+
+
+def test_empty_chunks_are_kept_without_comparison():
+    kept, report = deduplicate_chunks([make_chunk(""), make_chunk("")])
+    assert len(kept) == 2
+    assert report["duplicate_chunks"] == 0
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.services import embedding_service
+
+REQUEST = httpx.Request("POST", "https://example.com/embeddings")
+
+
+def api_error(error_class, status_code):
+    return error_class("failed", response=httpx.Response(status_code, request=REQUEST), body=None)
+
+
+class FakeEmbeddings:
+    """
+    Embeds a text as [len(text)], after raising the queued errors, and rejects the texts containing "bad".
+    """
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.requests = []
+
+    async def create(self, input, model):
+        inputs = [input] if isinstance(input, str) else input
+        self.requests.append(inputs)
+        if self.errors:
+            raise self.errors.pop(0)
+        if any("bad" in text for text in inputs):
+            raise api_error(openai.BadRequestError, 400)
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=index, embedding=[float(len(text))]) for index, text in enumerate(inputs)]
+        )
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = FakeEmbeddings()
+    client = SimpleNamespace(embeddings=fake, with_options=lambda **options: client)
+    monkeypatch.setattr(embedding_service, "get_openai_client", lambda: client)
+    monkeypatch.setattr(embedding_service, "embedding_cache", None)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(embedding_service.asyncio, "sleep", sleep)
+    fake.delays = delays
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_an_invalid_input_is_retried_alone(embeddings):
+    vectors, errors = await embedding_service.get_embeddings_batch(["a", "bad", "ccc"], batch_size=3)
+    assert vectors == [[1.0], None, [3.0]]
+    assert list(errors) == [1]
+    assert embeddings.requests == [["a", "bad", "ccc"], ["a"], ["bad"], ["ccc"]]
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_and_server_errors_retry_the_batch(embeddings):
+    embeddings.errors = [api_error(openai.RateLimitError, 429), api_error(openai.InternalServerError, 503)]
+    vectors, errors = await embedding_service.get_embeddings_batch(["a", "bb"], batch_size=2)
+    assert vectors == [[1.0], [2.0]]
+    assert errors == {}
+    # The batch is sent again as a whole, after a growing delay
+    assert embeddings.requests == [["a", "bb"]] * 3
+    assert embeddings.delays == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_the_batch_fails_once_the_retries_are_exhausted(embeddings, monkeypatch):
+    monkeypatch.setattr(embedding_service.settings, "EMBEDDING_BATCH_RETRIES", 1)
+    embeddings.errors = [openai.APITimeoutError(REQUEST)] * 2
+    vectors, errors = await embedding_service.get_embeddings_batch(["a", "bb", "ccc"], batch_size=2)
+    # The first batch failed, the second one went through
+    assert vectors == [None, None, [3.0]]
+    assert list(errors) == [0, 1]
+    assert len(embeddings.requests) == 3
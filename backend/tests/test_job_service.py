@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app.services import job_service
+from app.services.job_service import JobManager
+
+
+@pytest.fixture
+def release(monkeypatch):
+    release = asyncio.Event()
+
+    async def embed_repository_to_vector_db(*args, **kwargs):
+        await release.wait()
+        return {}
+
+    monkeypatch.setattr(job_service, "embed_repository_to_vector_db", embed_repository_to_vector_db)
+    return release
+
+
+@pytest.mark.asyncio
+async def test_a_repository_is_ingested_by_one_job_at_a_time(release):
+    manager = JobManager(max_concurrent_jobs=2, history=10)
+    job = manager.submit("kubeflow/website")
+    assert manager.submit("kubeflow/website") is job
+    other = manager.submit("kubeflow/pipelines")
+    assert other is not job
+
+    release.set()
+    await asyncio.gather(job.task, other.task)
+    assert job.status == "completed"
+    # A finished job doesn't block the next ingestion
+    assert manager.submit("kubeflow/website") is not job
+    await manager.shutdown()
@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.vector_store.keyword_search import RRF_K, BM25Index, fuse_results, tokenize
+
+
+def test_tokenize_splits_like_weaviate_word_tokenization():
+    assert tokenize("Use kfp.dsl.component, NOT snake_case!") == ["use", "kfp", "dsl", "component", "not", "snake", "case"]
+
+
+def test_bm25_scores_only_documents_with_query_terms():
+    index = BM25Index(["compile a pipeline", "deploy a notebook server", "pipeline pipeline pipeline"])
+    scores = index.scores("pipeline")
+    assert scores[1] == 0
+    assert scores[2] > scores[0] > 0
+
+
+def test_bm25_rare_terms_weigh_more():
+    index = BM25Index(["pipeline katib", "pipeline notebook", "pipeline serving"])
+    scores = index.scores("pipeline katib")
+    assert scores[0] > scores[1] == scores[2] > 0
+
+
+def test_bm25_shorter_documents_score_higher_at_equal_frequency():
+    index = BM25Index(["katib", "katib tunes the hyperparameters of a model"])
+    scores = index.scores("katib")
+    assert scores[0] > scores[1]
+
+
+def test_bm25_query_terms_are_counted_once_and_missing_documents_are_empty():
+    index = BM25Index(["katib experiment", None, ""])
+    assert index.scores("katib katib")[0] == index.scores("katib")[0]
+    assert index.scores("katib")[1:].tolist() == [0, 0]
+    assert BM25Index([]).scores("katib").tolist() == []
+
+
+def test_rrf_sums_the_weighted_reciprocal_ranks():
+    fused = dict(fuse_results([("a", 0.9), ("b", 0.8)], [("b", 12.0), ("c", 3.0)], alpha=0.5))
+    assert fused["a"] == pytest.approx(0.5 / RRF_K)
+    assert fused["b"] == pytest.approx(0.5 / (RRF_K + 1) + 0.5 / RRF_K)
+    assert fused["c"] == pytest.approx(0.5 / (RRF_K + 1))
+
+
+def test_rrf_ranks_results_found_by_both_searches_first():
+    fused = fuse_results([("a", 0.9), ("b", 0.8)], [("b", 12.0), ("c", 3.0)], alpha=0.5)
+    assert [key for key, _ in fused] == ["b", "a", "c"]
+
+
+def test_relative_score_normalizes_each_list():
+    fused = dict(
+        fuse_results([("a", 0.9), ("b", 0.5)], [("b", 10.0), ("c", 2.0)], alpha=0.25, fusion="relative_score")
+    )
+    assert fused == pytest.approx({"a": 0.25, "b": 0.75, "c": 0.0})
+
+
+def test_relative_score_with_a_single_result_gives_full_weight():
+    assert fuse_results([("a", 0.3)], [], alpha=0.7, fusion="relative_score") == [("a", pytest.approx(0.7))]
+
+
+def test_alpha_selects_a_single_search():
+    vector_results, keyword_results = [("a", 0.9), ("b", 0.8)], [("b", 5.0), ("a", 1.0)]
+    assert [key for key, _ in fuse_results(vector_results, keyword_results, alpha=1.0)][0] == "a"
+    assert [key for key, _ in fuse_results(vector_results, keyword_results, alpha=0.0)][0] == "b"
+
+
+def test_unknown_fusion_method():
+    with pytest.raises(ValueError):
+        fuse_results([], [], alpha=0.5, fusion="borda")
@@ -0,0 +1,95 @@
+import pytest
+
+from app.services.metadata_service import (
+    blob_url,
+    chunk_heading,
+    doc_section,
+    doc_version,
+    file_language,
+    file_metadata,
+    markdown_headings,
+)
+
+
+@pytest.mark.parametrize(
+    "file_path, expected",
+    [
+        ("content/en/docs/components/pipelines/concepts/dag.md", "pipelines"),
+        ("content/en/docs/started/installing-kubeflow.md", "started"),
+        ("docs/katib/overview.md", "katib"),
+        ("content/en/docs/_index.md", None),
+        ("README.md", None),
+    ],
+)
+def test_doc_section(file_path, expected):
+    assert doc_section(file_path) == expected
+
+
+@pytest.mark.parametrize(
+    "file_path, expected",
+    [
+        ("content/en/docs/components/pipelines/legacy-v1/overview.md", "v1"),
+        ("content/en/docs/v1.7/pipelines/overview.md", "v1.7"),
+        # The innermost versioned directory wins
+        ("docs/v1/archive/v2/page.md", "v2"),
+        ("content/en/docs/components/pipelines/overview.md", "latest"),
+        # Only directories are versions, and they must match entirely
+        ("docs/v1.md", "latest"),
+        ("docs/pipelines-v1-notes/page.md", "latest"),
+    ],
+)
+def test_doc_version(file_path, expected):
+    assert doc_version(file_path) == expected
+
+
+def test_blob_url_quotes_the_path():
+    assert (
+        blob_url("kubeflow/website", "content/en/docs/my page.md", "v1.9")
+        == "https://github.com/kubeflow/website/blob/v1.9/content/en/docs/my%20page.md"
+    )
+
+
+def test_file_language():
+    assert file_language("docs/overview.md") == "markdown"
+    assert file_language("sdk/compiler.py") == "python"
+    assert file_language("manifests/kustomization.JSON") == "json"
+    assert file_language("Makefile") is None
+
+
+def test_file_metadata_leaves_missing_values_out():
+    metadata = file_metadata("kubeflow/website", "README.md")
+    assert metadata == {
+        "documentURL": "https://github.com/kubeflow/website/blob/HEAD/README.md",
+        "docVersion": "latest",
+        "docVersions": ["latest"],
+        "language": "markdown",
+    }
+
+
+def test_markdown_headings_skip_code_blocks():
+    text = "# Install\n\nRun:\n\n```bash\n# not a heading\nkfp run\n```\n\n## Configure ##\n"
+    assert markdown_headings(text) == [(0, "Install"), (text.index("## Configure"), "Configure")]
+
+
+@pytest.mark.parametrize(
+    "front_matter",
+    ['+++\ntitle = "Pipelines Overview"\nweight = 1\n+++\n', "---\ntitle: 'Pipelines Overview'\n---\n"],
+)
+def test_markdown_headings_start_with_the_front_matter_title(front_matter):
+    text = front_matter + "\nIntro.\n\n## Concepts\n"
+    assert markdown_headings(text) == [(0, "Pipelines Overview"), (text.index("## Concepts"), "Concepts")]
+
+
+def test_front_matter_lines_are_not_headings():
+    text = "---\n# comment: of the front matter\ndescription: No title\n---\n\nBody\n"
+    assert markdown_headings(text) == []
+
+
+def test_chunk_heading():
+    headings = [(10, "Install"), (100, "Configure")]
+    assert chunk_heading(headings, 10, 50) == "Install"
+    assert chunk_heading(headings, 150, 200) == "Configure"
+    # A chunk before the first heading gets the first heading it contains
+    assert chunk_heading(headings, 0, 50) == "Install"
+    assert chunk_heading(headings, 0, 5) is None
+    assert chunk_heading([], 0, 50) is None
@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.services.vector_store.mmr import maximal_marginal_relevance
+
+QUERY = [1.0, 0.0]
+# Two near copies of the best candidate, and a less relevant but different one
+CANDIDATES = [[1.0, 0.1], [1.0, 0.11], [0.7, -0.7]]
+
+
+def test_relevance_only_ranks_by_similarity():
+    assert maximal_marginal_relevance(QUERY, CANDIDATES, 3, lambda_mult=1.0) == [0, 1, 2]
+
+
+def test_diversity_skips_near_duplicates():
+    assert maximal_marginal_relevance(QUERY, CANDIDATES, 2, lambda_mult=0.5) == [0, 2]
+
+
+def test_first_pick_is_the_most_relevant_whatever_lambda():
+    assert maximal_marginal_relevance(QUERY, CANDIDATES, 1, lambda_mult=0.0) == [0]
+
+
+def test_similarity_is_scale_invariant():
+    scaled = [np.asarray(vector) * factor for vector, factor in zip(CANDIDATES, (10, 0.1, 3))]
+    assert maximal_marginal_relevance(QUERY, scaled, 2) == maximal_marginal_relevance(QUERY, CANDIDATES, 2)
+
+
+def test_top_k_larger_than_candidates_selects_each_once():
+    selected = maximal_marginal_relevance(QUERY, CANDIDATES, 10)
+    assert sorted(selected) == [0, 1, 2]
+
+
+def test_empty_inputs():
+    assert maximal_marginal_relevance(QUERY, [], 3) == []
+    assert maximal_marginal_relevance(QUERY, CANDIDATES, 0) == []
+
+
+def test_zero_vectors_do_not_fail():
+    assert sorted(maximal_marginal_relevance([0.0, 0.0], [[0.0, 0.0], [1.0, 0.0]], 2)) == [0, 1]
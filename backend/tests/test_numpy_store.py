@@ -0,0 +1,156 @@
+import json
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from app.services.vector_store import NewObject
+from app.services.vector_store import numpy_store
+from app.services.vector_store.numpy_store import NumpyVectorStore
+
+VECTORS = {
+    "a": [1.0, 0.0, 0.0],
+    "b": [0.0, 1.0, 0.0],
+    "c": [0.0, 0.0, 1.0],
+    "d": [1.0, 1.0, 0.0],
+}
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    store = NumpyVectorStore("Docs", str(tmp_path))
+    await store.create_collection()
+    uuids, errors = await store.insert_many(
+        [
+            NewObject({"name": name, "section": "even" if index % 2 else "odd"}, vector, name)
+            for index, (name, vector) in enumerate(VECTORS.items())
+        ]
+    )
+    assert uuids == list(VECTORS)
+    assert errors == {}
+    return store
+
+
+def assert_consistent(store):
+    """
+    Rows, UUIDs, properties, vectors and norms of a store all describe the same objects.
+    """
+    assert store.rows == {uuid: row for row, uuid in enumerate(store.uuids)}
+    for row, uuid in enumerate(store.uuids):
+        assert store.properties[row]["name"] == uuid
+        assert store.vectors[row].tolist() == VECTORS[uuid]
+        assert store.norms[row] == pytest.approx(np.linalg.norm(VECTORS[uuid]))
+
+
+@pytest.mark.asyncio
+async def test_insert_and_search(store):
+    assert await store.count() == 4
+    results = await store.near_vector([1.0, 0.1, 0.0], 2)
+    assert [result.uuid for result in results] == ["a", "d"]
+    assert results[0].metadata.distance == pytest.approx(1 - 1 / np.linalg.norm([1.0, 0.1]), abs=1e-6)
+    assert_consistent(store)
+
+
+@pytest.mark.asyncio
+async def test_insert_with_an_existing_uuid_replaces_the_object(store):
+    await store.insert_many([NewObject({"name": "b", "section": "new"}, [0.0, 2.0, 0.0], "b")])
+    assert await store.count() == 4
+    row = store.rows["b"]
+    assert store.properties[row]["section"] == "new"
+    assert store.norms[row] == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_vectors_of_another_dimension_are_rejected(store):
+    uuids, errors = await store.insert_many([NewObject({"name": "e"}, [1.0, 0.0], "e")])
+    assert uuids == [None]
+    assert list(errors) == [0]
+    assert await store.count() == 4
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_row_moves_the_last_row_into_it(store):
+    await store.delete_by_id("a")
+    # "d" was the last row, it now fills the first one
+    assert store.uuids == ["d", "b", "c"]
+    assert_consistent(store)
+    assert [result.uuid for result in await store.near_vector([1.0, 1.0, 0.0], 1)] == ["d"]
+
+
+@pytest.mark.asyncio
+async def test_deleting_the_last_row(store):
+    await store.delete_by_id("d")
+    assert store.uuids == ["a", "b", "c"]
+    assert_consistent(store)
+
+
+@pytest.mark.asyncio
+async def test_deleting_several_rows_including_the_last_one(store):
+    # The rows are deleted from the last one, so a moved row is never deleted twice
+    await store.persist(store.delete_rows([0, 3, 1]))
+    assert store.uuids == ["c"]
+    assert_consistent(store)
+    await store.delete_by_id("missing")
+    assert await store.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_many_uses_the_filters(store):
+    assert await store.delete_many([("section", "equal", "odd")]) == 2
+    assert sorted(store.uuids) == ["b", "d"]
+    assert_consistent(store)
+    assert [result.uuid for result in await store.near_vector([1.0, 0.0, 0.0], 4, [("section", "equal", "even")])] == ["d", "b"]
+
+
+@pytest.mark.asyncio
+async def test_deletions_are_persisted(store, tmp_path):
+    await store.delete_by_id("a")
+    reloaded = NumpyVectorStore("Docs", str(tmp_path))
+    assert reloaded.uuids == ["d", "b", "c"]
+    assert_consistent(reloaded)
+
+
+@pytest.mark.asyncio
+async def test_batches_are_appended_to_the_log(store, tmp_path):
+    with open(store.objects_path, encoding="utf-8") as file:
+        snapshot = file.read()
+    await store.insert_many([NewObject({"name": "b", "section": "new"}, VECTORS["b"], "b")])
+    await store.delete_by_id("c")
+
+    # objects.json is left as is, the log has one line per change
+    with open(store.objects_path, encoding="utf-8") as file:
+        assert file.read() == snapshot
+    with open(tmp_path / "Docs" / store.log_name, encoding="utf-8") as file:
+        assert [json.loads(line) for line in file] == [
+            {"uuid": "b", "properties": {"name": "b", "section": "new"}},
+            {"uuid": "c"},
+        ]
+
+    reloaded = NumpyVectorStore("Docs", str(tmp_path))
+    assert reloaded.uuids == store.uuids == ["a", "b", "d"]
+    assert reloaded.properties == store.properties
+    assert_consistent(reloaded)
+
+
+@pytest.mark.asyncio
+async def test_the_log_is_folded_into_objects_json(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(numpy_store, "LOG_COMPACTION_RECORDS", 2)
+    previous_log = store.log_name
+    for name in ("a", "b", "c", "d", "a"):
+        await store.insert_many([NewObject({"name": name, "section": "new"}, VECTORS[name], name)])
+    await store.delete_by_id("b")
+
+    assert store.log_name != previous_log
+    assert {path.name for path in (tmp_path / "Docs").iterdir()} == {"objects.json", store.log_name, "vectors.npy"}
+    reloaded = NumpyVectorStore("Docs", str(tmp_path))
+    assert reloaded.uuids == store.uuids
+    assert [properties["section"] for properties in reloaded.properties] == ["new"] * 3
+    assert_consistent(reloaded)
+
+
+@pytest.mark.asyncio
+async def test_a_record_cut_by_a_crash_is_ignored(store, tmp_path):
+    with open(tmp_path / "Docs" / store.log_name, "a", encoding="utf-8") as file:
+        file.write('{"uuid": "a"')
+    reloaded = NumpyVectorStore("Docs", str(tmp_path))
+    assert reloaded.uuids == ["a", "b", "c", "d"]
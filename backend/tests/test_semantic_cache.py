@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from app.services import semantic_cache as semantic_cache_module
+from app.services.semantic_cache import SemanticCache
+
+PARAMETERS = ("llama", 0.2, 512)
+
+
+def store(cache, vector, answer, parameters=PARAMETERS, generation=0):
+    cache.store(vector, answer, answer, [], *parameters, generation=generation)
+
+
+def test_the_closest_answer_of_the_same_parameters_is_returned():
+    cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=8)
+    store(cache, [1.0, 0.0, 0.0], "x")
+    store(cache, [0.0, 1.0, 0.0], "y")
+    store(cache, [1.0, 0.05, 0.0], "x other model", ("mixtral", 0.2, 512))
+
+    entry, generation = cache.lookup([2.0, 0.1, 0.0], *PARAMETERS)
+    assert entry["answer"] == "x"
+    assert entry["similarity"] == pytest.approx(np.float32(1 / np.linalg.norm([1.0, 0.05])), abs=1e-6)
+    assert generation == 0
+    assert cache.lookup([1.0, 0.05, 0.0], "mixtral", 0.2, 512)[0]["answer"] == "x other model"
+
+    # Close to an answer of other parameters only, or unseen parameters
+    assert cache.lookup([0.0, 1.0, 0.0], "mixtral", 0.2, 512)[0] is None
+    assert cache.lookup([1.0, 0.0, 0.0], "llama", 0.7, 512)[0] is None
+    assert cache.lookup([0.0, 0.0, 1.0], *PARAMETERS)[0] is None
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_expired_entries_are_ignored(monkeypatch):
+    cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=8)
+    now = 1000.0
+    monkeypatch.setattr(semantic_cache_module.time, "time", lambda: now)
+    store(cache, [1.0, 0.0], "x")
+    assert cache.lookup([1.0, 0.0], *PARAMETERS)[0]["answer"] == "x"
+    now += 61
+    assert cache.lookup([1.0, 0.0], *PARAMETERS)[0] is None
+
+
+def test_the_oldest_entry_is_replaced_when_full():
+    cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=2)
+    store(cache, [1.0, 0.0, 0.0], "x")
+    store(cache, [0.0, 1.0, 0.0], "y", ("mixtral", 0.2, 512))
+    store(cache, [0.0, 0.0, 1.0], "z")
+    assert cache.lookup([1.0, 0.0, 0.0], *PARAMETERS)[0] is None
+    assert cache.lookup([0.0, 0.0, 1.0], *PARAMETERS)[0]["answer"] == "z"
+    assert cache.lookup([0.0, 1.0, 0.0], "mixtral", 0.2, 512)[0]["answer"] == "y"
+
+
+def test_answers_of_an_older_generation_are_not_stored():
+    cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=8)
+    store(cache, [1.0, 0.0], "x")
+    _, generation = cache.lookup([0.0, 1.0], *PARAMETERS)
+    cache.invalidate()
+    assert cache.lookup([1.0, 0.0], *PARAMETERS)[0] is None
+
+    store(cache, [0.0, 1.0], "stale", generation=generation)
+    assert cache.lookup([0.0, 1.0], *PARAMETERS)[0] is None
+    store(cache, [0.0, 1.0], "fresh", generation=cache.generation)
+    assert cache.lookup([0.0, 1.0], *PARAMETERS)[0]["answer"] == "fresh"
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight, normalize_query
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  What is\tKubeflow?\n") == normalize_query("what IS kubeflow?")
+
+
+class Upstream:
+    """
+    A fake upstream call, counting its calls and blocked until released.
+    """
+
+    def __init__(self, events=("a", "b", "c"), error=None):
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+        self.events = events
+        self.error = error
+
+    async def call(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return "result"
+
+    async def stream(self):
+        self.calls += 1
+        try:
+            for event in self.events:
+                yield event
+                await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_upstream_call():
+    flights, upstream = SingleFlight(enabled=True), Upstream()
+    callers = [asyncio.create_task(flights.do("key", "test", upstream.call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    assert await asyncio.gather(*callers) == ["result"] * 3
+    assert upstream.calls == 1
+    # Nothing is kept once the call is done
+    assert flights.flights == {}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_disabled_flights_are_not_coalesced():
+    upstream = Upstream()
+    upstream.release.set()
+    flights = SingleFlight(enabled=True)
+    await asyncio.gather(flights.do("first", "test", upstream.call), flights.do("second", "test", upstream.call))
+    assert upstream.calls == 2
+
+    flights = SingleFlight(enabled=False)
+    await asyncio.gather(flights.do("key", "test", upstream.call), flights.do("key", "test", upstream.call))
+    assert upstream.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_to_every_caller():
+    flights, upstream = SingleFlight(enabled=True), Upstream(error=RuntimeError("upstream down"))
+    callers = [asyncio.create_task(flights.do("key", "test", upstream.call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.flights == {}
+
+
+@pytest.mark.asyncio
+async def test_a_cancelled_caller_does_not_cancel_the_others():
+    flights, upstream = SingleFlight(enabled=True), Upstream()
+    first = asyncio.create_task(flights.do("key", "test", upstream.call))
+    second = asyncio.create_task(flights.do("key", "test", upstream.call))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    upstream.release.set()
+    assert await second == "result"
+    assert first.cancelled()
+    assert not upstream.cancelled
+
+
+@pytest.mark.asyncio
+async def test_the_call_is_cancelled_when_every_caller_is_gone():
+    flights, upstream = SingleFlight(enabled=True), Upstream()
+    callers = [asyncio.create_task(flights.do("key", "test", upstream.call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert upstream.cancelled
+    assert flights.flights == {}
+
+    # The next caller starts a new call
+    upstream.release.set()
+    assert await flights.do("key", "test", upstream.call) == "result"
+    assert upstream.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_streams_are_shared_and_replayed_to_late_callers():
+    flights, upstream = SingleFlight(enabled=True), Upstream()
+    first = asyncio.create_task(collect(flights.stream("key", "test", upstream.stream)))
+    await asyncio.sleep(0.01)
+    # Joins after the first event was streamed
+    late = asyncio.create_task(collect(flights.stream("key", "test", upstream.stream)))
+    await asyncio.sleep(0.01)
+    upstream.release.set()
+    assert await first == await late == ["a", "b", "c"]
+    assert upstream.calls == 1
+    assert flights.flights == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_errors_are_raised_after_the_events():
+    flights, upstream = SingleFlight(enabled=True), Upstream(error=RuntimeError("upstream down"))
+    upstream.release.set()
+    received = []
+    with pytest.raises(RuntimeError):
+        async for event in flights.stream("key", "test", upstream.stream):
+            received.append(event)
+    assert received == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_the_stream_is_cancelled_when_every_caller_is_gone():
+    flights, upstream = SingleFlight(enabled=True), Upstream()
+    first = asyncio.create_task(collect(flights.stream("key", "test", upstream.stream)))
+    second = asyncio.create_task(collect(flights.stream("key", "test", upstream.stream)))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    assert not upstream.cancelled
+
+    second.cancel()
+    await asyncio.gather(second, return_exceptions=True)
+    await asyncio.sleep(0.01)
+    assert upstream.cancelled
+    assert flights.flights == {}
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from app.services.source_service import repository_path, validate_repository_name
+
+
+@pytest.mark.parametrize("repository_name", ["kubeflow/website", "kubeflow/kubeflow.github.io", "a-b/c_d-e"])
+def test_repository_names(repository_name):
+    validate_repository_name(repository_name)
+
+
+@pytest.mark.parametrize(
+    "repository_name",
+    ["../../x", "kubeflow/..", "kubeflow/.", "kubeflow", "kubeflow/website/..", "/etc/passwd", "kube flow/website", ""],
+)
+def test_invalid_repository_names(repository_name):
+    with pytest.raises(ValueError):
+        validate_repository_name(repository_name)
+
+
+def test_repository_paths_stay_under_the_root(tmp_path):
+    root = str(tmp_path / "parsed_repositories")
+    assert repository_path(root, "kubeflow/website", "code.txt") == os.path.join(
+        os.path.realpath(root), "kubeflow", "website", "code.txt"
+    )
+    with pytest.raises(ValueError):
+        repository_path(root, "../../x", "code.txt")
+    with pytest.raises(ValueError):
+        repository_path(root, "kubeflow/website", "..", "..", "..", "code.txt")
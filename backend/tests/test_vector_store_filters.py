@@ -0,0 +1,59 @@
+import pytest
+
+from app.services.vector_store.base import contains_any, like, matches
+
+PROPERTIES = {
+    "repository": "kubeflow/website",
+    "filePath": "content/en/docs/components/pipelines/overview.md",
+    "docSection": "pipelines",
+    "docVersions": ["latest", "v1"],
+}
+
+
+@pytest.mark.parametrize(
+    "value, pattern, expected",
+    [
+        ("content/en/docs/a.md", "content/*", True),
+        ("content/en/docs/a.md", "*.md", True),
+        ("content/en/docs/a.md", "*.py", False),
+        ("v1", "v?", True),
+        ("v10", "v?", False),
+        # Regular expression characters are literal
+        ("a.md", "a?md", True),
+        ("abmd", "a.md", False),
+        ("[draft] a+b", "[draft]*+b", True),
+        ("first line\nsecond line", "first*line", True),
+        (None, "*", False),
+        (3, "*", False),
+    ],
+)
+def test_like(value, pattern, expected):
+    assert like(value, pattern) is expected
+
+
+def test_contains_any_checks_list_properties_item_by_item():
+    assert contains_any("pipelines", {"pipelines", "katib"})
+    assert not contains_any("notebooks", {"pipelines", "katib"})
+    assert contains_any(["latest", "v1"], {"v1"})
+    assert not contains_any(["latest"], {"v1"})
+    assert not contains_any(None, {"v1"})
+
+
+def test_matches_combines_the_conditions_with_and():
+    assert matches(PROPERTIES, None)
+    assert matches(PROPERTIES, [])
+    assert matches(PROPERTIES, [("repository", "equal", "kubeflow/website"), ("docVersions", "contains_any", ["v1"])])
+    assert not matches(PROPERTIES, [("repository", "equal", "kubeflow/website"), ("docSection", "not_equal", "pipelines")])
+    assert matches(PROPERTIES, [("filePath", "like", "*/pipelines/*")])
+    assert matches(PROPERTIES, [("docSection", "contains_any", ["katib", "pipelines"])])
+
+
+def test_missing_properties_only_match_not_equal():
+    assert not matches(PROPERTIES, [("language", "equal", "markdown")])
+    assert not matches(PROPERTIES, [("language", "like", "*")])
+    assert matches(PROPERTIES, [("language", "not_equal", "markdown")])
+
+
+def test_unsupported_operator():
+    with pytest.raises(ValueError):
+        matches(PROPERTIES, [("docSection", "greater_than", "a")])
@@ -0,0 +1,63 @@
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.services import weaviate_service
+from app.services.vector_store import close_vector_stores
+from app.services.weaviate_service import (
+    TENANT_NAME_MAX_LENGTH,
+    TENANT_NAME_PATTERN,
+    create_documentation_collection,
+    create_repository_tenant,
+    drop_repository,
+    list_repository_tenants,
+    tenant_name,
+)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("foo.bar", "foo_bar"),
+        ("a/b", "a--b"),
+        ("kubeflow/" + "x" * 80, "kubeflow/" + "x" * 81),
+        ("Kubeflow/Website", "kubeflow/website"),
+    ],
+)
+def test_near_identical_repositories_get_different_tenants(first, second):
+    assert tenant_name(first) != tenant_name(second)
+
+
+@pytest.mark.parametrize("repository", ["kubeflow/website", "owner/repo.with.dots", "o/" + "long-name" * 20])
+def test_tenant_names_are_valid_and_stable(repository):
+    tenant = tenant_name(repository)
+    assert tenant == tenant_name(repository)
+    assert len(tenant) <= TENANT_NAME_MAX_LENGTH
+    assert not TENANT_NAME_PATTERN.search(tenant)
+    assert tenant.startswith(TENANT_NAME_PATTERN.sub("_", repository.replace("/", "--"))[:20])
+
+
+@pytest_asyncio.fixture
+async def numpy_collection(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_STORE_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_STORE_PATH", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "TENANT_REPOSITORIES_PATH", str(tmp_path / "store" / "tenant_repositories.json"))
+    monkeypatch.setattr(settings, "MULTI_TENANCY_ENABLED", True)
+    monkeypatch.setitem(weaviate_service.tenant_cache, "tenants", None)
+    await create_documentation_collection()
+    yield
+    await close_vector_stores()
+
+
+@pytest.mark.asyncio
+async def test_tenants_keep_their_repository_name(numpy_collection):
+    await create_repository_tenant("foo.bar")
+    await create_repository_tenant("foo_bar")
+    tenants = await list_repository_tenants()
+    assert {tenant: info["repository"] for tenant, info in tenants.items()} == {
+        tenant_name("foo.bar"): "foo.bar",
+        tenant_name("foo_bar"): "foo_bar",
+    }
+
+    await drop_repository("foo.bar")
+    assert list(await list_repository_tenants()) == [tenant_name("foo_bar")]
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.vector_store.weaviate_store import WeaviateVectorStore
+
+
+class FakeQuery:
+    """
+    The query API of a collection, keeping the arguments of every fetch_objects call.
+    """
+
+    def __init__(self, uuids):
+        self.uuids = uuids
+        self.calls = []
+
+    async def fetch_objects(self, **arguments):
+        self.calls.append(arguments)
+        uuids = self.uuids[arguments.get("offset") or 0 :][: arguments["limit"]]
+        objects = [SimpleNamespace(uuid=uuid, properties={"repository": "r"}, vector=None, metadata=None) for uuid in uuids]
+        return SimpleNamespace(objects=objects)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = WeaviateVectorStore("Docs")
+    query = FakeQuery([f"uuid-{index}" for index in range(5)])
+
+    async def get_collection():
+        return SimpleNamespace(query=query)
+
+    monkeypatch.setattr(store, "get_collection", get_collection)
+    return store, query
+
+
+@pytest.mark.asyncio
+async def test_filtered_pages_are_searched_by_the_server(store):
+    store, query = store
+    filters = [("repository", "equal", "r")]
+    objects, cursor = await store.page(limit=2, filters=filters)
+    assert [item.uuid for item in objects] == ["uuid-0", "uuid-1"]
+    assert cursor == "2"
+
+    objects, cursor = await store.page(after=cursor, limit=3, filters=filters)
+    assert [item.uuid for item in objects] == ["uuid-2", "uuid-3", "uuid-4"]
+    assert cursor == "5"
+    assert (await store.page(after=cursor, limit=3, filters=filters)) == ([], None)
+
+    # One request per page, filtered and sorted by the server
+    assert len(query.calls) == 3
+    assert all(call["filters"] is not None and call["sort"] is not None for call in query.calls)
+    assert [call["offset"] for call in query.calls] == [0, 2, 5]
+
+
+@pytest.mark.asyncio
+async def test_unfiltered_pages_use_the_cursor(store):
+    store, query = store
+    objects, cursor = await store.page(limit=5)
+    assert cursor == "uuid-4"
+    assert query.calls == [{"after": None, "limit": 5, "include_vector": False, "return_properties": None}]
+
+
+@pytest.mark.asyncio
+async def test_filtered_pages_reject_a_uuid_cursor(store):
+    store, _ = store
+    with pytest.raises(ValueError):
+        await store.page(after="uuid-1", filters=[("repository", "equal", "r")])
+
+
+@pytest.mark.asyncio
+async def test_create_tenants_lists_the_tenants_once(monkeypatch):
+    store = WeaviateVectorStore("Docs")
+    created = []
+    listed = []
+
+    async def list_tenants():
+        listed.append(True)
+        return {"existing": "active"}
+
+    async def create(tenants):
+        created.extend(tenant.name for tenant in tenants)
+
+    async def get_collection():
+        return SimpleNamespace(tenants=SimpleNamespace(create=create))
+
+    monkeypatch.setattr(store, "list_tenants", list_tenants)
+    monkeypatch.setattr(store, "get_collection", get_collection)
+    await store.create_tenants(["existing", "first", "second"])
+    assert created == ["first", "second"]
+    assert len(listed) == 1
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.core.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(message)
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_every_socket_is_its_own_conversation():
+    manager = ConnectionManager(send_queue_size=4, send_timeout=1)
+    first, second = FakeWebSocket(), FakeWebSocket()
+    first_connection = await manager.connect(first, "first")
+    second_connection = await manager.connect(second, "second")
+    assert manager.active_connections == {"first": first_connection, "second": second_connection}
+
+    await manager.send_message(first_connection, "hello")
+    await asyncio.sleep(0)
+    assert first.sent == ["hello"]
+    assert second.sent == []
+
+    manager.disconnect(first_connection)
+    assert list(manager.active_connections) == ["second"]
+    await manager.send_message(first_connection, "ignored")
+    manager.disconnect(second_connection)
+    assert manager.active_connections == {}
+
+
+@pytest.mark.asyncio
+async def test_a_socket_that_is_not_reading_is_closed():
+    manager = ConnectionManager(send_queue_size=1, send_timeout=0.01)
+    websocket = FakeWebSocket()
+    connection = await manager.connect(websocket, "conversation")
+    connection.sender.cancel()  # Nothing drains the queue anymore
+
+    await manager.send_message(connection, "first")
+    await manager.send_message(connection, "second")
+    assert connection.closed
+    assert websocket.closed_with == 1013
+    manager.disconnect(connection)